@@ -0,0 +1,100 @@
+"""
+Compares the discovery index with the previous iterdir() scan on a
+synthetic Steam library.
+
+Usage: python benchmarks/bench_discovery.py [--dirs N]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+
+def build_library(home, num_dirs):
+    """Creates num_dirs game folders plus a few Proton builds and runtimes."""
+    common = home / ".steam/steam/steamapps/common"
+    common.mkdir(parents=True)
+    for i in range(num_dirs):
+        (common / f"Game {i}").mkdir()
+    for name in ["Proton 8.0", "Proton 9.0", "Proton - Experimental"]:
+        (common / name).mkdir()
+        proton = common / name / "proton"
+        proton.write_text("#!/bin/sh\n")
+        proton.chmod(0o755)
+    for name in ["SteamLinuxRuntime_sniper", "SteamLinuxRuntime_soldier"]:
+        (common / name).mkdir()
+        (common / name / "_v2-entry-point").write_text("")
+
+
+def legacy_scan(search_paths, runtime_search_paths):
+    """The loops previously used by check.find_existing_protons and find_steam_runtime."""
+    found_protons = []
+    for path in search_paths:
+        if not path.exists():
+            continue
+        try:
+            for item in path.iterdir():
+                if item.is_dir():
+                    proton_exec = item / "proton"
+                    if proton_exec.exists() and os.access(proton_exec, os.X_OK):
+                        found_protons.append(item)
+        except PermissionError:
+            continue
+
+    found_runtimes = []
+    seen_paths = set()
+    for path in runtime_search_paths:
+        if not path.exists():
+            continue
+        try:
+            for item in path.iterdir():
+                if item.is_dir() and item.name.startswith("SteamLinuxRuntime"):
+                    if (item / "_v2-entry-point").exists() or (item / "run").exists():
+                        if item.resolve() not in seen_paths:
+                            found_runtimes.append(item)
+                            seen_paths.add(item.resolve())
+        except PermissionError:
+            continue
+    return found_protons, found_runtimes
+
+
+def timed(label, func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<28} {elapsed * 1000:8.2f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dirs", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    home = Path(tempfile.mkdtemp(prefix="proton-cli-bench-"))
+    try:
+        build_library(home, args.dirs)
+        # Search paths are derived from $HOME when the package is imported
+        os.environ["HOME"] = str(home)
+        sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+        from proton_cli.constants import SEARCH_PATHS, RUNTIME_SEARCH_PATHS
+        from proton_cli import discovery
+
+        print(f"Synthetic library: {args.dirs} directories")
+        legacy = timed("legacy iterdir scan", lambda: legacy_scan(SEARCH_PATHS, RUNTIME_SEARCH_PATHS), args.repeat)
+        cold = timed("index, full rescan", lambda: discovery.scan(refresh=True), args.repeat)
+        warm = timed("index, unchanged dirs", lambda: discovery.scan(), args.repeat)
+
+        assert sorted(legacy[0]) == sorted(cold[0]) == sorted(warm[0])
+        assert sorted(legacy[1]) == sorted(cold[1]) == sorted(warm[1])
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Runs the downloader against a local HTTP server with Range support and
+checks the three ways a download can go: chunked over parallel
+connections, resumed from a '.part.json' chunk map, and the sequential
+fallback for servers that ignore Range.
+
+Reports timings, the bytes each case pulled from the server and whether
+the result matches the source.
+
+Usage: python benchmarks/bench_download.py [--size MB] [--chunk KB] [--connections N] [--delay MS]
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+import http.server
+import socketserver
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from proton_cli.downloader import download_file
+from proton_cli.verify import Checksum
+
+RANGE = re.compile(r"bytes=(\d+)-(\d*)$")
+
+
+def serve(data, delay):
+    """Serves data at every path. /plain/... ignores Range like a dumb server would."""
+    served = {"bytes": 0}
+    lock = threading.Lock()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            # Simulated network round trip
+            time.sleep(delay)
+            match = RANGE.match(self.headers.get("Range", ""))
+            if match and not self.path.startswith("/plain/"):
+                start = int(match.group(1))
+                end = min(int(match.group(2) or len(data) - 1), len(data) - 1)
+                body = data[start:end + 1]
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+            else:
+                body = data
+                self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", '"bench"')
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client closes a probe that got the whole file instead of one byte
+                return
+            with lock:
+                served["bytes"] += len(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, served
+
+
+def run(label, served, data, url, dest, **kwargs):
+    before = served["bytes"]
+    checksum = Checksum("sha256", hashlib.sha256(data).hexdigest())
+    start = time.perf_counter()
+    dest = download_file(url, dest, quiet=True, checksum=checksum, **kwargs)
+    elapsed = time.perf_counter() - start
+    ok = dest.read_bytes() == data and not dest.with_name(dest.name + ".part.json").exists()
+    print(f"{label:<20} {elapsed * 1000:>7.0f} ms  {(served['bytes'] - before) / 2**20:>7.1f} MB served  "
+          f"{'ok' if ok else 'MISMATCH'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=64, help="file size in MB")
+    parser.add_argument("--chunk", type=int, default=1024, help="chunk size in KB")
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--delay", type=float, default=20, help="per-request latency in ms")
+    args = parser.parse_args()
+
+    data = os.urandom(args.size * 2**20)
+    chunk_size = args.chunk * 1024
+    server, served = serve(data, args.delay / 1000)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    work = Path(tempfile.mkdtemp(prefix="bench-download-"))
+    results = []
+    try:
+        results.append(run("Single connection", served, data, f"{base}/file.tar.gz", work / "single.tar.gz",
+                           connections=1, chunk_size=chunk_size))
+        results.append(run(f"{args.connections} connections", served, data, f"{base}/file.tar.gz",
+                           work / "chunked.tar.gz", connections=args.connections, chunk_size=chunk_size))
+
+        # An interrupted download: every other chunk is already in the part file
+        url = f"{base}/file.tar.gz"
+        dest = work / "resumed.tar.gz"
+        part_path = dest.with_name(dest.name + ".part")
+        done = list(range(0, -(-len(data) // chunk_size), 2))
+        part = bytearray(len(data))
+        for index in done:
+            part[index * chunk_size:(index + 1) * chunk_size] = data[index * chunk_size:(index + 1) * chunk_size]
+        part_path.write_bytes(bytes(part))
+        with open(dest.with_name(dest.name + ".part.json"), 'w') as f:
+            json.dump({"url": url, "size": len(data), "validator": '"bench"',
+                       "chunk_size": chunk_size, "done": done}, f)
+        results.append(run("Resumed (half done)", served, data, url, str(dest),
+                           connections=args.connections, chunk_size=chunk_size))
+
+        results.append(run("Without Range", served, data, f"{base}/plain/file.tar.gz", work / "plain.tar.gz",
+                           connections=args.connections, chunk_size=chunk_size))
+    finally:
+        server.shutdown()
+        shutil.rmtree(work, ignore_errors=True)
+
+    print(f"All verified:        {'yes' if all(results) else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Compares the extraction engine with the previous tarfile loop, once
+writing in archive order and once with a pool of --workers writer
+threads (the extract_workers setting). Each variant runs --repeat times
+into a fresh directory and the best time counts, since filesystem
+caches make single runs noisy.
+
+Usage: python benchmarks/bench_extract.py [--files N] [--compression xz|gz] [--workers N] [--repeat N]
+"""
+import io
+import os
+import sys
+import time
+import shutil
+import tarfile
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from proton_cli.extract import unpack_stream, find_decompressor
+
+
+def make_archive(path, num_files, compression):
+    """Writes a synthetic archive resembling a runtime tree: many small files, a few large ones."""
+    rng = os.urandom(1024 * 1024)
+    with tarfile.open(path, f"w:{compression}") as tar:
+        for i in range(num_files):
+            if i % 500 == 0:
+                size = 2 * 1024 * 1024
+            else:
+                size = 512 + (i * 37) % 16384
+            data = (rng * 3)[i % 1024:i % 1024 + size]
+            info = tarfile.TarInfo(f"SyntheticRuntime/files/lib/dir{i // 200}/file{i}.so")
+            info.size = len(data)
+            info.mode = 0o644
+            tar.addfile(info, io.BytesIO(data))
+
+
+def legacy_extract(tar_path, dest, compression):
+    """The loop previously used by pull_proton/pull_runtime, without its per-file progress output."""
+    with tarfile.open(tar_path, f"r:{compression}") as tar:
+        for member in tar.getmembers():
+            if member.name.startswith("/") or ".." in member.name:
+                continue
+            tar.extract(member, path=dest)
+
+
+def engine_extract(tar_path, dest, compression, workers):
+    with open(tar_path, 'rb') as f:
+        unpack_stream(f, str(dest), compression, workers=workers)
+
+
+def timed(label, func, work, repeat):
+    best = None
+    for i in range(repeat):
+        dest = work / f"{label}-{i}".replace(" ", "_")
+        dest.mkdir()
+        start = time.perf_counter()
+        func(dest)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        shutil.rmtree(dest, ignore_errors=True)
+    print(f"{label:<28} {best:8.2f}s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--compression", default="xz", choices=["xz", "gz"])
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix="proton-cli-bench-"))
+    try:
+        archive = work / f"synthetic.tar.{args.compression}"
+        print(f"Building archive with {args.files} files...")
+        make_archive(archive, args.files, args.compression)
+        print(f"Archive size: {archive.stat().st_size / 1024 / 1024:.1f} MB")
+        print(f"External decompressor: {find_decompressor(args.compression) or 'none (stdlib)'}")
+        print(f"CPUs: {os.cpu_count()}")
+
+        repeat = max(1, args.repeat)
+        legacy = timed("legacy tarfile loop", lambda d: legacy_extract(archive, d, args.compression), work, repeat)
+        ordered = timed("engine, archive order", lambda d: engine_extract(archive, d, args.compression, 1), work, repeat)
+        pooled = timed(f"engine, {args.workers} writers",
+                       lambda d: engine_extract(archive, d, args.compression, args.workers), work, repeat)
+        print(f"Speedup, archive order: {legacy / ordered:.2f}x")
+        print(f"Speedup, {args.workers} writers: {legacy / pooled:.2f}x")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Applies a .reg file with many tweaks to many synthetic prefixes using the
+offline registry engine, and checks that untouched hives round-trip unchanged.
+
+Usage: python benchmarks/bench_registry.py [--prefixes N] [--tweaks N] [--keys N]
+"""
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from proton_cli.registry_hive import Hive, PrefixRegistry, read_reg_file
+
+
+def write_hive(path, root, num_keys):
+    """Writes a hive in Wine's format with num_keys keys of a few values each."""
+    lines = ["WINE REGISTRY Version 2", f";; All keys relative to {root}", "#arch=win64", ""]
+    for i in range(num_keys):
+        lines.append(f"[Software\\\\Vendor{i % 50}\\\\Product{i}] 1700000000")
+        lines.append("#time=1da0000000000000")
+        lines.append(f'@="Default {i}"')
+        lines.append(f'"Path"="C:\\\\Program Files\\\\Product{i}"')
+        lines.append(f'"Version"=dword:{i:08x}')
+        lines.append('"Blob"=hex:00,01,02,03,04,05,06,07,08,09,0a,0b,0c,0d,0e,0f,10,11,12,13,14,15,16,17,18,\\')
+        lines.append('  19,1a,1b,1c,1d')
+        lines.append("")
+    path.write_text("\n".join(lines) + "\n")
+
+
+def write_reg_file(path, num_tweaks):
+    lines = ["Windows Registry Editor Version 5.00", ""]
+    for i in range(num_tweaks):
+        root = "HKEY_CURRENT_USER" if i % 2 else "HKEY_LOCAL_MACHINE"
+        lines.append(f"[{root}\\Software\\Tweaks\\Tweak{i}]")
+        lines.append(f'"Enabled"=dword:{i % 2:08x}')
+        lines.append(f'"Name"="Tweak \\"{i}\\""')
+        lines.append("")
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prefixes", type=int, default=20)
+    parser.add_argument("--tweaks", type=int, default=50)
+    parser.add_argument("--keys", type=int, default=6000)
+    args = parser.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix="bench-registry-"))
+    try:
+        template = work / "template" / "pfx"
+        template.mkdir(parents=True)
+        write_hive(template / "system.reg", "\\\\Machine", args.keys)
+        write_hive(template / "user.reg", "\\\\User\\\\S-1-5-21-0-0-0-1000", args.keys // 10)
+        prefixes = []
+        for i in range(args.prefixes):
+            prefix = work / f"prefix{i}"
+            shutil.copytree(template.parent, prefix)
+            prefixes.append(prefix)
+
+        original = (template / "system.reg").read_text()
+        hive = Hive(template / "system.reg")
+        hive.key("Software\\Vendor1\\Product1").get("Path")
+        hive.modified = True
+        hive.save()
+        assert (template / "system.reg").read_text() == original, "round trip changed the hive"
+
+        reg_file = work / "tweaks.reg"
+        write_reg_file(reg_file, args.tweaks)
+
+        start = time.perf_counter()
+        ops = read_reg_file(reg_file)
+        for prefix in prefixes:
+            with PrefixRegistry(prefix) as reg:
+                reg.apply(ops)
+        elapsed = time.perf_counter() - start
+
+        with PrefixRegistry(prefixes[-1]) as reg:
+            value = reg.get("HKCU\\Software\\Tweaks\\Tweak1", "name")
+        assert value is not None, "tweak missing after apply"
+
+        size = (template / "system.reg").stat().st_size / 1024 / 1024
+        print(f"{args.tweaks} tweaks x {args.prefixes} prefixes "
+              f"(system.reg {size:.1f} MB): {elapsed:.3f}s, {elapsed / args.prefixes * 1000:.1f}ms per prefix")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
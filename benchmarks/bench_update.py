@@ -0,0 +1,98 @@
+"""
+Runs the self-updater against a local HTTP stand-in of the GitHub contents
+API. A copy of the package plays the installed version, and --changed of
+its files are modified on the "remote" side.
+
+Reports the delta update against downloading every file one by one, the
+way the updater used to.
+
+Usage: python benchmarks/bench_update.py [--changed N] [--delay MS]
+"""
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import urllib.request
+import http.server
+import socketserver
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from proton_cli.update import git_blob_sha, plan_update, fetch_files, install_files
+
+PACKAGE = Path(__file__).resolve().parent.parent / "proton_cli"
+
+
+def serve(root, delay):
+    class Handler(http.server.SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=str(root), **kwargs)
+
+        def do_GET(self):
+            # Simulated network round trip
+            time.sleep(delay)
+            super().do_GET()
+
+        def log_message(self, *args):
+            pass
+
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--changed", type=int, default=3)
+    parser.add_argument("--delay", type=float, default=50, help="per-request latency in ms")
+    args = parser.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix="bench-update-"))
+    try:
+        remote = work / "remote"
+        installed = work / "site" / "proton_cli"
+        shutil.copytree(PACKAGE, remote, ignore=shutil.ignore_patterns("__pycache__"))
+        shutil.copytree(remote, installed)
+
+        names = sorted(p.name for p in remote.glob("*.py"))
+        for name in names[:args.changed]:
+            with open(remote / name, 'a') as f:
+                f.write("\n# changed upstream\n")
+
+        server = serve(remote, args.delay / 1000)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        files = [{
+            "name": name,
+            "type": "file",
+            "sha": git_blob_sha((remote / name).read_bytes()),
+            "download_url": f"{base}/{name}"
+        } for name in names]
+
+        start = time.perf_counter()
+        for file_info in files:
+            with urllib.request.urlopen(file_info["download_url"]) as response:
+                response.read()
+        full = time.perf_counter() - start
+
+        start = time.perf_counter()
+        changed, removed = plan_update(files, installed)
+        install_files(fetch_files(changed), removed, installed)
+        delta = time.perf_counter() - start
+
+        changed_after, _ = plan_update(files, installed)
+        server.shutdown()
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    print(f"Files:            {len(files)} ({len(changed)} changed)")
+    print(f"Full sequential:  {full * 1000:.0f} ms")
+    print(f"Delta update:     {delta * 1000:.0f} ms")
+    print(f"Up to date after: {'yes' if not changed_after else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Measures Proton command latency on a prefix with and without a persistent
+wineserver, using the configured Proton build.
+
+Usage: python benchmarks/bench_wineserver.py <prefix> [--runs N] [--timeout S]
+"""
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from proton_cli.config import load_config, get_setting, set_setting
+from proton_cli.constants import PREFIXES_DIR
+from proton_cli.core import get_proton_env, create_proton_command, run_proton
+from proton_cli.wineserver import stop_server
+
+
+def time_runs(cmd, env, prefix_path, proton_path, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run_proton(cmd, env, prefix_path, proton_path)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("prefix")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=int, default=60)
+    args = parser.parse_args()
+
+    conf = load_config()
+    proton_path = conf.get("proton_path")
+    runtime_path = conf.get("runtime_path")
+    prefix_path = PREFIXES_DIR / args.prefix
+    if not proton_path or not prefix_path.exists():
+        sys.exit("Configure Proton and create the prefix first.")
+
+    # A command that exits immediately, so the timing is dominated by startup
+    cmd = create_proton_command(proton_path, runtime_path, ["run", "cmd", "/c", "exit"])
+    env = get_proton_env(prefix_path, runtime_path, proton_path)
+    previous = get_setting("wineserver_timeout")
+
+    try:
+        stop_server(prefix_path, proton_path)
+        set_setting("wineserver_timeout", 0)
+        cold = time_runs(cmd, env, prefix_path, proton_path, args.runs)
+
+        set_setting("wineserver_timeout", args.timeout)
+        run_proton(cmd, env, prefix_path, proton_path)
+        warm = time_runs(cmd, env, prefix_path, proton_path, args.runs)
+    finally:
+        set_setting("wineserver_timeout", previous)
+        stop_server(prefix_path, proton_path)
+
+    for name, timings in (("cold wineserver", cold), ("persistent", warm)):
+        print(f"{name:<16} median {statistics.median(timings):.3f}s  "
+              f"min {min(timings):.3f}s  max {max(timings):.3f}s")
+    print(f"speedup: {statistics.median(cold) / statistics.median(warm):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+import os
+import csv
+import json
+import math
+import time
+import itertools
+import statistics
+import subprocess
+from pathlib import Path
+from .constants import Colors, BASE_DIR, PREFIXES_DIR
+from .config import load_config
+from .core import get_proton_env, create_proton_command, apply_user_options, run_wineserver, debug_log
+from .check import scan_protons
+from .discovery import find_runtimes
+from .fsutil import clone_tree
+from .prefix_template import initialize_prefix
+from .profiles import profile_for
+from .run_batch import _stop_job
+from .wineserver import find_server
+
+BENCH_DIR = BASE_DIR / "bench"
+# Two-sided 95% critical values of Student's t distribution, index = degrees of freedom
+T_95 = [None, 12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+METRICS = ["wall_time", "frametime_avg", "frametime_p1", "frametime_p99"]
+
+
+def t_critical(df):
+    if df < 1:
+        return None
+    return T_95[int(df)] if df < len(T_95) else 1.96
+
+
+def percentile(sorted_values, pct):
+    """Linear interpolation between the closest ranks, like numpy's default."""
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100
+    low = math.floor(k)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (k - low)
+
+
+def mean_ci(values):
+    """:return: Tuple of (mean, half width of the 95% confidence interval or None)"""
+    if not values:
+        return None, None
+    mean = statistics.mean(values)
+    if len(values) < 2:
+        return mean, None
+    return mean, t_critical(len(values) - 1) * statistics.stdev(values) / math.sqrt(len(values))
+
+
+def diff_ci(values, baseline):
+    """
+    Difference of the means with a 95% confidence interval from Welch's
+    t-test, which doesn't assume both candidates vary alike.
+
+    :return: Tuple of (difference, half width or None)
+    """
+    diff = statistics.mean(values) - statistics.mean(baseline)
+    if len(values) < 2 or len(baseline) < 2:
+        return diff, None
+    var_a = statistics.variance(values) / len(values)
+    var_b = statistics.variance(baseline) / len(baseline)
+    if var_a + var_b == 0:
+        return diff, 0.0
+    df = (var_a + var_b) ** 2 / (var_a ** 2 / (len(values) - 1) + var_b ** 2 / (len(baseline) - 1))
+    return diff, t_critical(max(1, math.floor(df))) * math.sqrt(var_a + var_b)
+
+
+def read_frametimes(csv_path):
+    """Returns the frame times in ms from a MangoHud log, after its system info header."""
+    frametimes = []
+    column = None
+    with open(csv_path, 'r', newline='', errors='ignore') as f:
+        for row in csv.reader(f):
+            if column is None:
+                if "frametime" in row:
+                    column = row.index("frametime")
+                continue
+            try:
+                frametimes.append(float(row[column]))
+            except (ValueError, IndexError):
+                continue
+    return frametimes
+
+
+def frametime_stats(log_dir):
+    """Frame time statistics over all MangoHud logs of a run, or None without logs."""
+    frametimes = []
+    for csv_path in sorted(Path(log_dir).glob("*.csv")):
+        if not csv_path.name.endswith("_summary.csv"):
+            frametimes.extend(read_frametimes(csv_path))
+    if not frametimes:
+        return None
+    frametimes.sort()
+    return {
+        "frames": len(frametimes),
+        "avg": statistics.mean(frametimes),
+        "p1": percentile(frametimes, 1),
+        "p99": percentile(frametimes, 99),
+    }
+
+
+def _find_by_name(found, names, kind):
+    selected = []
+    for name in names:
+        matches = [p for p in found if p.name == name or str(p) == name]
+        if not matches:
+            raise ValueError(f"{kind} '{name}' not found. Known: {', '.join(p.name for p in found) or 'none'}")
+        selected.append(matches[0])
+    return selected
+
+
+def resolve_candidates(proton_names, runtime_names, option_sets, conf):
+    """
+    Builds the candidates to compare: every combination of the given Proton
+    builds, runtimes and option strings. Dimensions not given use the
+    configured Proton and runtime and no options.
+    """
+    if proton_names == ["all"]:
+        protons = sorted(scan_protons(), key=lambda p: p.name)
+    elif proton_names:
+        protons = _find_by_name(scan_protons(), proton_names, "Proton")
+    else:
+        protons = [conf.get("proton_path")]
+    if any(p is None or not p.exists() for p in protons):
+        raise ValueError("Proton not found. Please use 'check' command first.")
+
+    runtimes = [conf.get("runtime_path")]
+    if runtime_names:
+        named = [n for n in runtime_names if n != "none"]
+        found = dict(zip(named, _find_by_name(find_runtimes(), named, "Runtime")))
+        runtimes = [found.get(n) for n in runtime_names]
+
+    option_sets = option_sets or [""]
+    candidates = []
+    for proton, runtime, options in itertools.product(protons, runtimes, option_sets):
+        label = []
+        if len(protons) > 1 or (len(runtimes) == 1 and len(option_sets) == 1):
+            label.append(proton.name)
+        if len(runtimes) > 1:
+            label.append(runtime.name if runtime else "no runtime")
+        if len(option_sets) > 1:
+            label.append(options or "no options")
+        candidates.append({"label": " / ".join(label), "proton": proton, "runtime": runtime, "options": options})
+    return candidates
+
+
+def prepare_base(prefix_path, candidate, work_dir, index):
+    """
+    Clones the prefix once per Proton build and runtime and lets Proton
+    update it, so the measured runs don't pay for the prefix upgrade.
+    """
+    base = work_dir / f"base-{index}"
+    clone_tree(str(prefix_path), str(base))
+    initialize_prefix(base, candidate["proton"], candidate["runtime"])
+    return base
+
+
+def run_once(candidate, base, exe_file, args, run_dir, log_path, mangohud, timeout):
+    """Runs the exe once in a fresh clone of base and returns the measurements."""
+    proton_path = candidate["proton"]
+    runtime_path = candidate["runtime"]
+    prefix_path = run_dir / "prefix"
+    clone_tree(str(base), str(prefix_path))
+
+    env = get_proton_env(prefix_path, runtime_path, proton_path, exe_path=exe_file)
+    wrappers = apply_user_options(env, candidate["options"])
+    if mangohud:
+        mangohud_dir = run_dir / "mangohud"
+        mangohud_dir.mkdir()
+        env["MANGOHUD"] = "1"
+        # Log every frame from the start, into a directory of this run
+        config = f"output_folder={mangohud_dir},autostart_log=1,log_interval=0"
+        env["MANGOHUD_CONFIG"] = f"{env['MANGOHUD_CONFIG']},{config}" if env.get("MANGOHUD_CONFIG") else config
+    cmd = create_proton_command(proton_path, runtime_path, ["run", str(exe_file)] + list(args), wrappers,
+                                profile_for(exe_file))
+    debug_log(f"Bench run: {cmd}")
+
+    result = {"status": "error", "exit_code": None, "wall_time": None}
+    start = time.monotonic()
+    try:
+        with open(log_path, 'wb') as log:
+            proc = subprocess.Popen(cmd, env=env, cwd=exe_file.parent, stdin=subprocess.DEVNULL,
+                                    stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+            try:
+                result["exit_code"] = proc.wait(timeout=timeout)
+                result["wall_time"] = time.monotonic() - start
+                result["status"] = "ok" if result["exit_code"] == 0 else "failed"
+            except subprocess.TimeoutExpired:
+                _stop_job(proc, proton_path, prefix_path, env)
+                result["exit_code"] = proc.returncode
+                result["status"] = "timeout"
+            except KeyboardInterrupt:
+                # The run has a session of its own and doesn't see Ctrl+C
+                _stop_job(proc, proton_path, prefix_path, env)
+                raise
+    except Exception as e:
+        result["error"] = str(e)
+    # Nothing of this run may keep running into the next one
+    run_wineserver(proton_path, prefix_path, env, "-k")
+
+    frametime = frametime_stats(run_dir / "mangohud") if mangohud else None
+    if frametime:
+        result.update({f"frametime_{key}": value for key, value in frametime.items() if key != "frames"})
+        result["frames"] = frametime["frames"]
+    return result
+
+
+def summarize(candidates, results):
+    """Per candidate: the number of good runs and mean and confidence interval of each metric."""
+    summary = []
+    for i, candidate in enumerate(candidates):
+        runs = [r for r in results if r["candidate"] == i and not r["warmup"]]
+        good = [r for r in runs if r["status"] == "ok"]
+        entry = {"label": candidate["label"], "runs": len(runs), "ok": len(good)}
+        for metric in METRICS:
+            values = [r[metric] for r in good if r.get(metric) is not None]
+            mean, ci = mean_ci(values)
+            entry[metric] = {"values": values, "mean": mean, "ci": ci}
+        summary.append(entry)
+    return summary
+
+
+def _format(stat, unit, digits):
+    if stat["mean"] is None:
+        return "-"
+    if stat["ci"] is None:
+        return f"{stat['mean']:.{digits}f}{unit}"
+    return f"{stat['mean']:.{digits}f}±{stat['ci']:.{digits}f}{unit}"
+
+
+def print_table(summary):
+    # Lower is better for all metrics; compare frame times when every candidate has them
+    primary = "frametime_avg" if all(e["frametime_avg"]["values"] for e in summary) else "wall_time"
+    baseline = summary[0][primary]["values"]
+
+    print(f"\n{Colors.HEADER}{'Candidate':<28} {'OK':>5} {'Wall time':>14} {'Frametime':>14} "
+          f"{'p1':>8} {'p99':>8}  vs {summary[0]['label'][:20]}{Colors.ENDC}")
+    print(f"{Colors.GRAY}{'-' * 110}{Colors.ENDC}")
+    for i, entry in enumerate(summary):
+        versus = ""
+        values = entry[primary]["values"]
+        if i > 0 and values and baseline:
+            diff, ci = diff_ci(values, baseline)
+            base_mean = statistics.mean(baseline)
+            pct = diff / base_mean * 100 if base_mean else 0.0
+            ci_pct = f" ±{ci / base_mean * 100:.1f}%" if ci is not None and base_mean else ""
+            significant = ci is not None and abs(diff) > ci
+            color = (Colors.OKGREEN if diff < 0 else Colors.FAIL) if significant else Colors.GRAY
+            versus = f"{color}{pct:+.1f}%{ci_pct}{Colors.ENDC}"
+        ok_color = Colors.OKGREEN if entry["ok"] == entry["runs"] else Colors.FAIL
+        print(f"{entry['label'][:28]:<28} {ok_color}{entry['ok']:>2}/{entry['runs']:<2}{Colors.ENDC} "
+              f"{_format(entry['wall_time'], 's', 2):>14} {_format(entry['frametime_avg'], 'ms', 2):>14} "
+              f"{_format(entry['frametime_p1'], '', 1):>8} {_format(entry['frametime_p99'], '', 1):>8}  {versus}")
+    print(f"{Colors.GRAY}Means with 95% confidence intervals. Frame times in ms from MangoHud logs, "
+          f"compared by {primary.replace('_', ' ')}.{Colors.ENDC}")
+
+
+def run_bench(exe_path, args, prefix_name=None, runs=5, proton_names=None, runtime_names=None,
+              option_sets=None, warmup=1, timeout=None, mangohud=False, json_path=None):
+    """
+    Runs exe_path `runs` times per candidate, interleaved so drift such as
+    thermal throttling spreads evenly, every run in a fresh clone of the prefix.
+
+    :return: Number of measured runs that did not exit with status 0
+    """
+    from .trash import move_to_trash, trigger_purge
+    conf = load_config()
+    exe_file = Path(exe_path).resolve()
+    if not exe_file.exists():
+        print(f"{Colors.FAIL}✖ File not found: {exe_path}{Colors.ENDC}")
+        return 1
+
+    prefix_name = prefix_name or "default"
+    prefix_path = PREFIXES_DIR / prefix_name
+    if not prefix_path.exists():
+        print(f"{Colors.FAIL}✖ Prefix '{prefix_name}' not found.{Colors.ENDC}")
+        return 1
+    if find_server(prefix_path):
+        print(f"{Colors.FAIL}✖ Prefix '{prefix_name}' is in use, close its programs first.{Colors.ENDC}")
+        return 1
+
+    try:
+        candidates = resolve_candidates(proton_names, runtime_names, option_sets, conf)
+    except ValueError as e:
+        print(f"{Colors.FAIL}✖ {e}{Colors.ENDC}")
+        return 1
+
+    work_dir = BENCH_DIR / f"bench-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+    work_dir.mkdir(parents=True)
+    print(f"{Colors.HEADER}➜ Benchmarking {exe_file.name}{Colors.ENDC} {Colors.GRAY}({len(candidates)} candidates, "
+          f"{runs} runs each, {warmup} warm-up, prefix '{prefix_name}'){Colors.ENDC}")
+    print(f"{Colors.GRAY}Logs: {work_dir}{Colors.ENDC}")
+
+    results = []
+    bases = {}
+    try:
+        for candidate in candidates:
+            key = (candidate["proton"], candidate["runtime"])
+            if key not in bases:
+                print(f" {Colors.OKBLUE}➜{Colors.ENDC} Preparing prefix for {candidate['proton'].name}")
+                bases[key] = prepare_base(prefix_path, candidate, work_dir, len(bases))
+
+        for round_index in range(warmup + runs):
+            warm = round_index < warmup
+            for i, candidate in enumerate(candidates):
+                run_dir = work_dir / f"run-{i + 1}-{round_index + 1}"
+                run_dir.mkdir()
+                result = run_once(candidate, bases[(candidate["proton"], candidate["runtime"])], exe_file, args,
+                                  run_dir, run_dir / "output.log", mangohud, timeout)
+                if (run_dir / "prefix").exists():
+                    move_to_trash(run_dir / "prefix")
+                result.update({"candidate": i, "round": round_index + 1, "warmup": warm})
+                results.append(result)
+
+                color = Colors.OKGREEN if result["status"] == "ok" else Colors.FAIL
+                wall_time = f"{result['wall_time']:.2f}s" if result["wall_time"] is not None else "-"
+                frames = f", {result['frametime_avg']:.2f}ms avg frametime" if result.get("frametime_avg") else ""
+                tag = "warm-up" if warm else f"run {round_index - warmup + 1}/{runs}"
+                print(f" {color}■{Colors.ENDC} {candidate['label'][:40]} {Colors.GRAY}{tag}{Colors.ENDC} "
+                      f"{color}{result['status']}{Colors.ENDC} {Colors.GRAY}{wall_time}{frames}{Colors.ENDC}")
+    except KeyboardInterrupt:
+        print(f"\n{Colors.WARNING}⚠ Benchmark interrupted, summarizing finished runs.{Colors.ENDC}")
+    except Exception as e:
+        print(f"{Colors.FAIL}✖ Benchmark failed: {e}{Colors.ENDC}")
+    finally:
+        for base in bases.values():
+            move_to_trash(base)
+        trigger_purge()
+
+    summary = summarize(candidates, results)
+    print_table(summary)
+
+    report = {
+        "exe": str(exe_file),
+        "args": list(args),
+        "prefix": prefix_name,
+        "runs": runs,
+        "warmup": warmup,
+        "candidates": [dict(c, proton=str(c["proton"]), runtime=str(c["runtime"]) if c["runtime"] else None)
+                       for c in candidates],
+        "results": results,
+        "summary": summary,
+    }
+    json_path = Path(json_path) if json_path else work_dir / "results.json"
+    with open(json_path, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"{Colors.OKGREEN}✔ Results saved to: {json_path}{Colors.ENDC}")
+
+    return sum(1 for r in results if not r["warmup"] and r["status"] != "ok")
@@ -1,28 +1,24 @@
 import os
 from pathlib import Path
-from .constants import Colors, SEARCH_PATHS, RUNTIME_SEARCH_PATHS
+from .constants import Colors
 from .config import save_config
+from .discovery import find_protons, find_runtimes
 
-def find_existing_protons():
+def scan_protons(verbose=False, refresh=False):
+    """Returns all Proton installations found in SEARCH_PATHS."""
+    found_protons = find_protons(refresh)
+
+    if verbose:
+        for item in found_protons:
+            print(f" {Colors.OKGREEN}✔{Colors.ENDC} {item.name} {Colors.GRAY}→ {item.parent}{Colors.ENDC}")
+
+    return found_protons
+
+def find_existing_protons(refresh=False):
     """Searches for Proton installations in common system directories."""
     print(f"{Colors.HEADER}➜ Scanning for Proton Versions...{Colors.ENDC}")
     
-    found_protons = []
-
-    for path in SEARCH_PATHS:
-        if not path.exists():
-            continue
-            
-        try:
-            for item in path.iterdir():
-                if item.is_dir():
-                    proton_exec = item / "proton"
-                    
-                    if proton_exec.exists() and os.access(proton_exec, os.X_OK):
-                        found_protons.append(item)
-                        print(f" {Colors.OKGREEN}✔{Colors.ENDC} {item.name} {Colors.GRAY}→ {path}{Colors.ENDC}")
-        except PermissionError:
-            continue
+    found_protons = scan_protons(verbose=True, refresh=refresh)
 
     if found_protons:
         found_protons.sort(key=lambda x: x.name, reverse=False)
@@ -53,7 +49,7 @@ def find_existing_protons():
     print(f"\n{Colors.FAIL}✖ No installed Proton version found on the system.{Colors.ENDC}")
     return None
 
-def find_steam_runtime():
+def find_steam_runtime(refresh=False):
     """Searches for Steam Runtime installations."""
     print(f"{Colors.HEADER}➜ Scanning for Steam Runtime...{Colors.ENDC}")
     
@@ -61,20 +57,11 @@ def find_steam_runtime():
     seen_paths = set()
     priority_names = ["SteamLinuxRuntime_sniper", "SteamLinuxRuntime_soldier", "SteamLinuxRuntime"]
 
-    for path in RUNTIME_SEARCH_PATHS:
-        if not path.exists():
-            continue
-            
-        try:
-            for item in path.iterdir():
-                if item.is_dir() and item.name.startswith("SteamLinuxRuntime"):
-                    if (item / "_v2-entry-point").exists() or (item / "run").exists():
-                        if item.resolve() not in seen_paths:
-                            found_runtimes.append(item)
-                            seen_paths.add(item.resolve())
-                            print(f" {Colors.OKGREEN}✔{Colors.ENDC} {item.name} {Colors.GRAY}→ {path}{Colors.ENDC}")
-        except PermissionError:
-            continue
+    for item in find_runtimes(refresh):
+        if item.resolve() not in seen_paths:
+            found_runtimes.append(item)
+            seen_paths.add(item.resolve())
+            print(f" {Colors.OKGREEN}✔{Colors.ENDC} {item.name} {Colors.GRAY}→ {item.parent}{Colors.ENDC}")
 
     if found_runtimes:
         found_runtimes.sort(key=lambda x: priority_names.index(x.name) if x.name in priority_names else 99)
@@ -105,8 +92,8 @@ def find_steam_runtime():
     print(f"{Colors.WARNING}⚠ Steam Runtime not found. Applications will run with system libraries.{Colors.ENDC}")
     return None
 
-def check_proton():
-    proton_path = find_existing_protons()
+def check_proton(refresh=False):
+    proton_path = find_existing_protons(refresh)
     runtime_path = None
     
     if not proton_path:
@@ -131,7 +118,7 @@ def check_proton():
                 print(f"{Colors.FAIL}✖ Invalid path or 'proton' executable not found.{Colors.ENDC}")
 
     if proton_path:
-        runtime_path = find_steam_runtime()
+        runtime_path = find_steam_runtime(refresh)
 
     save_config(proton_path, runtime_path)
     if proton_path:
@@ -1,35 +1,121 @@
+import os
 import json
 from pathlib import Path
 from .constants import BASE_DIR, CONFIG_FILE, Colors
+from .trace import traced
+
+# Optional settings stored next to the Proton/runtime paths: name -> (default, description)
+SETTINGS = {
+    "pool_size": (0, "Pre-initialized spare prefixes kept ready for prefix-make"),
+    "compiled_shortcuts": (False, "Shortcut scripts exec Proton directly instead of starting proton-cli"),
+    "wineserver_timeout": (0, "Seconds a prefix's wineserver stays up after its last program (0 = off)"),
+    "shader_cache": (True, "Keep shader caches per executable and Proton version outside the prefixes"),
+    "shader_cache_max_mb": (10240, "Size limit of the shared shader cache, least recently used go first"),
+    "telemetry_interval": (1.0, "Seconds between samples of a launch's process tree with --telemetry"),
+    "extract_workers": (1, "Threads writing small files while extracting archives (1 = in archive order)"),
+}
+
+def _read_config():
+    if CONFIG_FILE.exists():
+        try:
+            with open(CONFIG_FILE, 'r') as f:
+                data = json.load(f)
+                if isinstance(data, dict):
+                    return data
+        except Exception:
+            pass
+    return {}
+
+def _write_config(data):
+    if not BASE_DIR.exists():
+        BASE_DIR.mkdir(parents=True, exist_ok=True)
+
+    tmp_file = CONFIG_FILE.with_name(CONFIG_FILE.name + ".tmp")
+    with open(tmp_file, 'w') as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_file, CONFIG_FILE)
 
 def save_config(proton_path, runtime_path=None):
     try:
-        if not BASE_DIR.exists():
-            BASE_DIR.mkdir(parents=True, exist_ok=True)
-            
-        data = {
+        data = _read_config()
+        data.update({
             "proton_path": str(proton_path) if proton_path else None,
             "runtime_path": str(runtime_path) if runtime_path else None
-        }
-        
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(data, f, indent=4)
-            
+        })
+
+        _write_config(data)
+
         print(f"{Colors.OKGREEN}✔ Configuration saved to: {Colors.GRAY}{CONFIG_FILE}{Colors.ENDC}")
+
+        if get_setting("compiled_shortcuts"):
+            from .shortcuts import recompile_all
+            recompile_all()
     except Exception as e:
         print(f"{Colors.FAIL}✖ Could not save configuration: {e}{Colors.ENDC}")
 
+@traced
 def load_config():
-    if CONFIG_FILE.exists():
-        try:
-            with open(CONFIG_FILE, 'r') as f:
-                data = json.load(f)
-                path_str = data.get("proton_path")
-                runtime_str = data.get("runtime_path")
-                return {
-                    "proton_path": Path(path_str) if path_str else None,
-                    "runtime_path": Path(runtime_str) if runtime_str else None
-                }
-        except Exception:
-            return {"proton_path": None, "runtime_path": None}
-    return {"proton_path": None, "runtime_path": None}
\ No newline at end of file
+    data = _read_config()
+    path_str = data.get("proton_path")
+    runtime_str = data.get("runtime_path")
+    return {
+        "proton_path": Path(path_str) if path_str else None,
+        "runtime_path": Path(runtime_str) if runtime_str else None
+    }
+
+def get_setting(key, default=None):
+    if default is None and key in SETTINGS:
+        default = SETTINGS[key][0]
+    return _read_config().get(key, default)
+
+def set_setting(key, value):
+    data = _read_config()
+    data[key] = value
+    _write_config(data)
+
+def _parse_value(value):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+def run_config(key=None, value=None):
+    if not key:
+        print(f"{Colors.HEADER}{'Setting':<25} {'Value':<15} Description{Colors.ENDC}")
+        for name, (default, description) in SETTINGS.items():
+            print(f"{Colors.OKGREEN}{name:<25}{Colors.ENDC} {json.dumps(get_setting(name, default)):<15} {Colors.GRAY}{description}{Colors.ENDC}")
+        return
+
+    if key not in SETTINGS:
+        print(f"{Colors.FAIL}✖ Unknown setting: {key}{Colors.ENDC}")
+        return
+
+    if value is None:
+        print(json.dumps(get_setting(key)))
+        return
+
+    default = SETTINGS[key][0]
+    parsed = _parse_value(value)
+    # Whole numbers are valid floats, but bools would pass as ints
+    if isinstance(default, float) and isinstance(parsed, int) and not isinstance(parsed, bool):
+        parsed = float(parsed)
+    if default is not None and (not isinstance(parsed, type(default))
+                                or isinstance(parsed, bool) != isinstance(default, bool)):
+        print(f"{Colors.FAIL}✖ Invalid value for {key}: expected {type(default).__name__}.{Colors.ENDC}")
+        return
+
+    try:
+        set_setting(key, parsed)
+        print(f"{Colors.OKGREEN}✔ {key} = {json.dumps(get_setting(key))}{Colors.ENDC}")
+    except Exception as e:
+        print(f"{Colors.FAIL}✖ Could not save configuration: {e}{Colors.ENDC}")
+        return
+
+    if key == "pool_size":
+        from .prefix_pool import trigger_refill
+        trigger_refill()
+    elif key == "compiled_shortcuts":
+        from .shortcuts import recompile_all
+        count = recompile_all()
+        if count:
+            print(f"{Colors.GRAY}Rewrote {count} shortcut scripts.{Colors.ENDC}")
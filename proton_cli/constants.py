@@ -13,6 +13,7 @@ VERSION = "2.2.0"
 
 
 GE_PROTON_API_URL = "https://api.github.com/repos/GloriousEggroll/proton-ge-custom/releases/latest"
+GE_PROTON_RELEASES_URL = "https://api.github.com/repos/GloriousEggroll/proton-ge-custom/releases"
 REPO_UPDATE_API_URL = "https://api.github.com/repos/hhadi34/proton-cli/contents/proton_cli"
 
 
@@ -22,6 +23,9 @@ PREFIXES_DIR = BASE_DIR / "prefixes"
 VERSIONS_DIR = BASE_DIR / "versions"
 RUNTIME_DIR = BASE_DIR / "runtime"
 RUNTIMES_DIR = BASE_DIR / "runtimes"
+STORE_DIR = BASE_DIR / "store"
+TEMPLATES_DIR = BASE_DIR / "templates"
+POOL_DIR = BASE_DIR / "pool"
 
 
 RUNTIME_SEARCH_PATHS = [
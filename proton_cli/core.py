@@ -1,10 +1,17 @@
 import os
 import sys
+import shlex
+import subprocess
 from .constants import BASE_DIR, Colors, RUNTIMES_DIR
+from . import trace
 
-def get_proton_env(prefix_path, runtime_path=None, proton_path=None):
-    """Returns the environment variables required for Proton."""
-    env = os.environ.copy()
+@trace.traced
+def get_proton_env(prefix_path, runtime_path=None, proton_path=None, base_env=None, exe_path=None):
+    """
+    Returns the environment variables required for Proton, based on base_env or os.environ.
+    With exe_path, shader caches go to the shared cache of that executable.
+    """
+    env = dict(base_env) if base_env is not None else os.environ.copy()
     env["STEAM_COMPAT_DATA_PATH"] = str(prefix_path)
     
     if runtime_path and runtime_path.exists():
@@ -20,9 +27,34 @@ def get_proton_env(prefix_path, runtime_path=None, proton_path=None):
         tool_dir = proton_path.parent.parent
         env["STEAM_COMPAT_TOOL_PATHS"] = str(tool_dir)
 
+    if exe_path and proton_path:
+        from .shader_cache import apply_cache_env
+        apply_cache_env(env, exe_path, proton_path)
+
     return env
 
-def create_proton_command(proton_path, runtime_path, proton_args, wrappers=None):
+def apply_user_options(env, user_options):
+    """
+    Applies a user options string to env.
+
+    :param env: Environment dict, updated with KEY=VAL entries
+    :param user_options: String like "DXVK_HUD=1 gamemoderun"
+    :return: List of wrapper commands
+    """
+    parsed_options = shlex.split(user_options) if user_options else []
+    wrappers = []
+
+    for opt in parsed_options:
+        if '=' in opt and not opt.startswith('-'):
+            key, val = opt.split('=', 1)
+            env[key] = val
+        else:
+            wrappers.append(opt)
+
+    return wrappers
+
+@trace.traced
+def create_proton_command(proton_path, runtime_path, proton_args, wrappers=None, profile=None):
     """
     Constructs the command list to run Proton, handling Steam Runtime wrapping.
     
@@ -30,6 +62,7 @@ def create_proton_command(proton_path, runtime_path, proton_args, wrappers=None)
     :param runtime_path: Path to the Steam Runtime (optional)
     :param proton_args: List of arguments for Proton (e.g. ["run", "game.exe"])
     :param wrappers: List of wrapper commands (e.g. ["gamemoderun"])
+    :param profile: Name of a launch profile (CPU affinity, priorities, limits)
     :return: List of command parts ready for subprocess
     """
     proton_bin = str(proton_path / "proton")
@@ -49,9 +82,48 @@ def create_proton_command(proton_path, runtime_path, proton_args, wrappers=None)
             
     if wrappers:
         final_cmd = wrappers + final_cmd
+
+    if profile:
+        # Outermost, so the wrappers run inside the profile's limits too
+        from .profiles import launch_wrapper
+        final_cmd = launch_wrapper(profile) + final_cmd
         
     return final_cmd
 
+def get_wine_bin(proton_path, name="wine"):
+    """Returns the path of a binary (wine, wineserver) shipped with a Proton build, or None."""
+    for dist in ("files", "dist"):
+        candidate = proton_path / dist / "bin" / name
+        if candidate.exists():
+            return candidate
+    return None
+
+def run_wineserver(proton_path, prefix_path, env, *args):
+    """Runs the Proton build's wineserver for a prefix, e.g. with "-w" or "-k"."""
+    wineserver = get_wine_bin(proton_path, "wineserver")
+    if not wineserver:
+        return None
+    server_env = dict(env)
+    server_env["WINEPREFIX"] = str(prefix_path / "pfx")
+    return subprocess.run([str(wineserver)] + list(args), env=server_env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def run_proton(cmd, env, prefix_path, proton_path, cwd=None, **kwargs):
+    """
+    Runs a Proton command for a prefix and waits for it. Starts a persistent
+    wineserver first if enabled, see wineserver.ensure_server(). With
+    --telemetry, the process tree is sampled while it runs.
+    """
+    from .wineserver import ensure_server
+    with trace.span("ensure_server"):
+        ensure_server(proton_path, prefix_path, env)
+    if os.environ.get("PROTON_CLI_TELEMETRY"):
+        from .telemetry import run_sampled
+        return run_sampled(cmd, env=env, cwd=cwd, **kwargs)
+    if trace.enabled():
+        return trace.run_traced(cmd, env=env, cwd=cwd, **kwargs)
+    return subprocess.run(cmd, env=env, cwd=cwd, **kwargs)
+
 def debug_log(message):
     if os.environ.get("PROTON_CLI_DEBUG"):
         print(f"{Colors.WARNING}[DEBUG] {message}{Colors.ENDC}")
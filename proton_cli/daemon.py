@@ -0,0 +1,286 @@
+import os
+import sys
+import json
+import time
+import socket
+import threading
+import subprocess
+from pathlib import Path
+from .constants import Colors, BASE_DIR, CONFIG_FILE, PREFIXES_DIR, VERSION
+from . import trace
+
+SOCKET_PATH = BASE_DIR / "daemon.sock"
+PID_FILE = BASE_DIR / "daemon.pid"
+CONNECT_TIMEOUT = 0.5
+
+
+def request(payload, timeout=CONNECT_TIMEOUT):
+    """
+    Sends one request to the daemon.
+
+    :return: Decoded response, or None if the daemon is not running
+    """
+    if not os.path.exists(SOCKET_PATH):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(SOCKET_PATH))
+            sock.sendall(json.dumps(payload).encode() + b"\n")
+            sock.shutdown(socket.SHUT_WR)
+            data = b""
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        return json.loads(data)
+    except (OSError, ValueError):
+        return None
+
+
+def run_via_daemon(exe_path, args, prefix_name=None, user_options=None, profile=None):
+    """
+    Fast path of the run command: the daemon resolves the launch and this
+    process replaces itself with the Proton command.
+
+    :return: False if the command must run in-process instead
+    """
+    # Interactive runs prompt for prefix, options and shortcuts, outdated
+    # compiled shortcuts are rewritten by run_executable(), and telemetry
+    # needs this process to stay around as the parent
+    if sys.stdin.isatty() or os.environ.get("PROTON_CLI_NO_DAEMON") or os.environ.get("PROTON_CLI_SHORTCUT") \
+            or os.environ.get("PROTON_CLI_TELEMETRY"):
+        return False
+
+    with trace.span("daemon request"):
+        response = request({
+            "command": "run",
+            "exe": str(Path(exe_path).resolve()),
+            "args": list(args),
+            "prefix": prefix_name,
+            "options": user_options,
+            "profile": profile,
+            "env": dict(os.environ)
+        })
+    if not response or response.get("version") != VERSION or response.get("status") == "fallback":
+        return False
+
+    if response["status"] == "error":
+        print(f"{Colors.FAIL}✖ {response['message']}{Colors.ENDC}")
+        return True
+
+    print(f"\n{Colors.HEADER}➜ Launching: {Colors.OKBLUE}{Path(response['exe']).name}{Colors.ENDC}")
+    # exec() replaces this process, so the trace ends here
+    trace.finish("run")
+    sys.stdout.flush()
+    try:
+        os.chdir(response["cwd"])
+        os.execvpe(response["cmd"][0], response["cmd"], response["env"])
+    except OSError as e:
+        print(f"{Colors.FAIL}✖ Execution error: {e}{Colors.ENDC}")
+    return True
+
+
+class DaemonState:
+    """Config, prefix list and discovery results, reloaded when their files change."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self._config_mtime = None
+        self._prefixes_mtime = None
+        self.config = {}
+        self.prefixes = set()
+        self.protons = []
+        self.runtimes = []
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def refresh(self):
+        from .config import load_config
+        from .discovery import scan
+
+        with self.lock:
+            mtime = self._mtime(CONFIG_FILE)
+            if mtime != self._config_mtime:
+                self.config = load_config()
+                self._config_mtime = mtime
+
+            mtime = self._mtime(PREFIXES_DIR)
+            if mtime != self._prefixes_mtime:
+                try:
+                    with os.scandir(PREFIXES_DIR) as it:
+                        self.prefixes = {e.name for e in it if e.is_dir()}
+                except OSError:
+                    self.prefixes = set()
+                self._prefixes_mtime = mtime
+
+            # The index itself only lists directories whose mtime changed
+            self.protons, self.runtimes = scan()
+
+    def status(self):
+        return {
+            "pid": os.getpid(),
+            "uptime": time.time() - self.started,
+            "requests": self.requests,
+            "prefixes": len(self.prefixes),
+            "protons": len(self.protons),
+            "runtimes": len(self.runtimes)
+        }
+
+
+def resolve_run(state, req):
+    """Does the non-interactive part of run_executable() and returns the command to exec."""
+    from .core import get_proton_env, create_proton_command, apply_user_options
+    from .profiles import get_profile, profile_for
+    from .wineserver import ensure_server
+
+    proton_path = state.config.get("proton_path")
+    runtime_path = state.config.get("runtime_path")
+    if not proton_path or not proton_path.exists():
+        return {"status": "error", "message": "Proton not found. Please use 'check' command first."}
+
+    exe_file = Path(req["exe"])
+    if not exe_file.exists():
+        return {"status": "error", "message": f"File not found: {req['exe']}"}
+
+    prefix_name = req.get("prefix")
+    if not prefix_name:
+        # Creating 'default' or choosing a prefix is left to the regular path
+        return {"status": "fallback"}
+    if prefix_name not in state.prefixes:
+        return {"status": "error", "message": f"Prefix '{prefix_name}' not found."}
+
+    profile = profile_for(exe_file, req.get("profile"))
+    if profile and get_profile(profile) is None:
+        return {"status": "error", "message": f"Launch profile '{profile}' not found."}
+
+    prefix_path = PREFIXES_DIR / prefix_name
+    env = get_proton_env(prefix_path, runtime_path, proton_path, base_env=req["env"], exe_path=exe_file)
+    wrappers = apply_user_options(env, req.get("options"))
+    cmd = create_proton_command(proton_path, runtime_path, ["run", str(exe_file)] + req.get("args", []), wrappers, profile)
+    ensure_server(proton_path, prefix_path, env)
+    return {"status": "exec", "exe": str(exe_file), "cmd": cmd, "env": env, "cwd": str(exe_file.parent)}
+
+
+def _handle(state, stop, conn):
+    with conn:
+        data = b""
+        while True:
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+
+        try:
+            req = json.loads(data)
+            command = req.get("command")
+            state.refresh()
+            with state.lock:
+                state.requests += 1
+            if command == "run":
+                response = resolve_run(state, req)
+            elif command == "status":
+                response = dict(state.status(), status="ok")
+            elif command == "stop":
+                response = {"status": "ok"}
+                stop.set()
+            else:
+                response = {"status": "error", "message": f"Unknown command: {command}"}
+        except Exception as e:
+            response = {"status": "fallback", "message": str(e)}
+
+        response["version"] = VERSION
+        try:
+            conn.sendall(json.dumps(response).encode())
+        except OSError:
+            pass
+
+
+def serve():
+    """Runs the daemon in the foreground until it receives a stop request."""
+    BASE_DIR.mkdir(parents=True, exist_ok=True)
+    if request({"command": "status"}):
+        return
+
+    try:
+        os.unlink(SOCKET_PATH)
+    except FileNotFoundError:
+        pass
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o077)
+    try:
+        server.bind(str(SOCKET_PATH))
+    finally:
+        os.umask(old_umask)
+    server.listen(16)
+    server.settimeout(0.5)
+    PID_FILE.write_text(str(os.getpid()))
+
+    state = DaemonState()
+    state.refresh()
+    stop = threading.Event()
+    try:
+        while not stop.is_set():
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+            conn.settimeout(None)
+            threading.Thread(target=_handle, args=(state, stop, conn), daemon=True).start()
+    finally:
+        server.close()
+        for path in (SOCKET_PATH, PID_FILE):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+def start_daemon():
+    if request({"command": "status"}):
+        print(f"{Colors.WARNING}⚠ Daemon is already running.{Colors.ENDC}")
+        return
+
+    subprocess.Popen(
+        [sys.executable, "-m", "proton_cli", "daemon", "serve"],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+    for _ in range(50):
+        time.sleep(0.1)
+        if request({"command": "status"}):
+            print(f"{Colors.OKGREEN}✔ Daemon started.{Colors.ENDC} {Colors.GRAY}{SOCKET_PATH}{Colors.ENDC}")
+            return
+    print(f"{Colors.FAIL}✖ Daemon did not start.{Colors.ENDC}")
+
+
+def run_daemon(action):
+    if action == "serve":
+        serve()
+    elif action == "start":
+        start_daemon()
+    elif action == "stop":
+        if request({"command": "stop"}):
+            print(f"{Colors.OKGREEN}✔ Daemon stopped.{Colors.ENDC}")
+        else:
+            print(f"{Colors.GRAY}Daemon is not running.{Colors.ENDC}")
+    elif action == "status":
+        info = request({"command": "status"})
+        if not info:
+            print(f"{Colors.GRAY}Daemon is not running.{Colors.ENDC} Start it with: proton-cli daemon start")
+            return
+        print(f"{Colors.HEADER}Daemon:{Colors.ENDC} {Colors.OKGREEN}running{Colors.ENDC} {Colors.GRAY}(pid {info['pid']}, v{info['version']}){Colors.ENDC}")
+        print(f"  Uptime: {Colors.OKBLUE}{info['uptime']:.0f}s{Colors.ENDC}")
+        print(f"  Requests served: {Colors.OKBLUE}{info['requests']}{Colors.ENDC}")
+        print(f"  Cached: {info['prefixes']} prefixes, {info['protons']} Proton builds, {info['runtimes']} runtimes")
+        if info["version"] != VERSION:
+            print(f"{Colors.WARNING}⚠ Daemon runs another version, restart it with 'daemon stop' and 'daemon start'.{Colors.ENDC}")
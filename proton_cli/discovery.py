@@ -0,0 +1,125 @@
+import os
+import json
+import time
+from .constants import BASE_DIR, SEARCH_PATHS, RUNTIME_SEARCH_PATHS
+from .core import debug_log
+from .trace import traced
+
+INDEX_FILE = BASE_DIR / "discovery.json"
+INDEX_VERSION = 1
+# Directories are listed again after this long, to catch installs into existing folders
+MAX_AGE = 24 * 60 * 60
+
+
+def _load_index():
+    try:
+        with open(INDEX_FILE, 'r') as f:
+            index = json.load(f)
+        if index.get("version") == INDEX_VERSION:
+            return index
+    except Exception:
+        pass
+    return {"version": INDEX_VERSION, "dirs": {}}
+
+
+def _save_index(index):
+    try:
+        BASE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_file = INDEX_FILE.with_name(INDEX_FILE.name + ".tmp")
+        with open(tmp_file, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_file, INDEX_FILE)
+    except OSError as e:
+        debug_log(f"Could not save discovery index: {e}")
+
+
+def _scan_directory(path, want_protons, want_runtimes):
+    """Lists Proton and Steam Runtime installs directly inside path."""
+    protons = []
+    runtimes = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if not entry.is_dir():
+                    continue
+            except OSError:
+                continue
+
+            # os.access() fails for missing files, so it doubles as the existence check
+            if want_protons and os.access(os.path.join(entry.path, "proton"), os.X_OK):
+                protons.append(entry.name)
+            if want_runtimes and entry.name.startswith("SteamLinuxRuntime"):
+                if os.path.exists(os.path.join(entry.path, "_v2-entry-point")) or \
+                        os.path.exists(os.path.join(entry.path, "run")):
+                    runtimes.append(entry.name)
+    return sorted(protons), sorted(runtimes)
+
+
+@traced
+def scan(refresh=False):
+    """
+    Returns (protons, runtimes) found in SEARCH_PATHS and RUNTIME_SEARCH_PATHS.
+
+    Results are cached per search directory together with its mtime, and a
+    directory is only listed again when its mtime changed, the entry is older
+    than MAX_AGE or refresh is set.
+    """
+    index = _load_index()
+    cached_dirs = index["dirs"]
+    proton_paths = {str(p) for p in SEARCH_PATHS}
+    runtime_paths = {str(p) for p in RUNTIME_SEARCH_PATHS}
+    changed = False
+    results = {}
+    now = time.time()
+
+    for path in list(dict.fromkeys([str(p) for p in SEARCH_PATHS + RUNTIME_SEARCH_PATHS])):
+        try:
+            st = os.stat(path)
+        except OSError:
+            if cached_dirs.pop(path, None) is not None:
+                changed = True
+            continue
+
+        cached = cached_dirs.get(path)
+        if not refresh and cached and cached.get("mtime_ns") == st.st_mtime_ns \
+                and now - cached.get("scanned_at", 0) < MAX_AGE:
+            results[path] = cached
+            continue
+
+        try:
+            protons, runtimes = _scan_directory(path, path in proton_paths, path in runtime_paths)
+        except PermissionError:
+            continue
+        debug_log(f"Discovery: rescanned {path}")
+        results[path] = cached_dirs[path] = {
+            "mtime_ns": st.st_mtime_ns,
+            "scanned_at": now,
+            "protons": protons,
+            "runtimes": runtimes
+        }
+        changed = True
+
+    if changed:
+        _save_index(index)
+
+    found_protons = []
+    for path in SEARCH_PATHS:
+        for name in results.get(str(path), {}).get("protons", []):
+            found_protons.append(path / name)
+
+    found_runtimes = []
+    for path in RUNTIME_SEARCH_PATHS:
+        for name in results.get(str(path), {}).get("runtimes", []):
+            found_runtimes.append(path / name)
+
+    return found_protons, found_runtimes
+
+
+def find_protons(refresh=False):
+    """Returns the Proton installation directories in SEARCH_PATHS order."""
+    return scan(refresh)[0]
+
+
+def find_runtimes(refresh=False):
+    """Returns the Steam Runtime directories in RUNTIME_SEARCH_PATHS order."""
+    return scan(refresh)[1]
@@ -0,0 +1,459 @@
+import os
+import sys
+import json
+import time
+import threading
+import http.client
+import urllib.parse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from .constants import Colors
+from .core import debug_log
+
+USER_AGENT = "proton-cli"
+CHUNK_SIZE = 8 * 1024 * 1024
+READ_SIZE = 256 * 1024
+DEFAULT_CONNECTIONS = 4
+MAX_REDIRECTS = 10
+MAX_RETRIES = 3
+
+
+class DownloadError(Exception):
+    pass
+
+
+def format_size(num_bytes):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if abs(num_bytes) < 1024 or unit == "GB":
+            return f"{num_bytes:.1f} {unit}" if unit != "B" else f"{int(num_bytes)} B"
+        num_bytes /= 1024.0
+
+
+def format_eta(seconds):
+    if seconds is None or seconds < 0:
+        return "--:--"
+    seconds = int(seconds)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+class ProgressMeter:
+    """Thread-safe progress bar showing throughput and ETA."""
+
+    def __init__(self, action, total, initial=0, interval=0.1, quiet=False):
+        self.action = action
+        self.total = total
+        self.done = initial
+        self.interval = interval
+        self.quiet = quiet
+        self.lock = threading.Lock()
+        self.start_time = time.monotonic()
+        self.start_bytes = initial
+        self.last_draw = 0.0
+
+    def update(self, num_bytes):
+        with self.lock:
+            self.done += num_bytes
+            now = time.monotonic()
+            if now - self.last_draw >= self.interval:
+                self.last_draw = now
+                self._draw(now)
+
+    def rate(self, now=None):
+        elapsed = (now or time.monotonic()) - self.start_time
+        if elapsed <= 0:
+            return 0.0
+        return (self.done - self.start_bytes) / elapsed
+
+    def _draw(self, now):
+        if self.quiet:
+            return
+        rate = self.rate(now)
+        bar_length = 40
+        if self.total:
+            percent = min(100, int(self.done * 100 / self.total))
+            eta = (self.total - self.done) / rate if rate > 0 else None
+        else:
+            percent = 0
+            eta = None
+        filled_length = int(bar_length * percent // 100)
+        bar = '=' * filled_length + '-' * (bar_length - filled_length)
+        sys.stdout.write(
+            f'\r{Colors.OKBLUE}{self.action}:{Colors.ENDC} [{Colors.OKGREEN}{bar}{Colors.ENDC}] {percent}% '
+            f'{Colors.GRAY}{format_size(rate)}/s ETA {format_eta(eta)}{Colors.ENDC}   '
+        )
+        sys.stdout.flush()
+
+    def finish(self):
+        with self.lock:
+            self._draw(time.monotonic())
+        if not self.quiet:
+            print()
+
+
+class OrderedHasher:
+    """
+    Hashes a file that is written in chunks out of order. Whenever the
+    chunks in front of the hashed part are complete, they are read back
+    while they are still in the page cache.
+    """
+
+    def __init__(self, checksum, path, chunk_size):
+        self.checksum = checksum
+        self.path = path
+        self.chunk_size = chunk_size
+        self.next_chunk = 0
+        self.lock = threading.Lock()
+
+    def advance(self, done, size):
+        with self.lock:
+            start = self.next_chunk
+            while self.next_chunk in done:
+                self.next_chunk += 1
+            if self.next_chunk == start:
+                return
+            offset = start * self.chunk_size
+            end = min(self.next_chunk * self.chunk_size, size)
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                while offset < end:
+                    data = f.read(min(READ_SIZE, end - offset))
+                    if not data:
+                        raise DownloadError(f"Unexpected end of {self.path}")
+                    self.checksum.update(data)
+                    offset += len(data)
+
+
+class ConnectionPool:
+    """Keeps one keep-alive HTTP connection per (thread, host) and follows redirects."""
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.all_conns = []
+
+    def _get_connection(self, scheme, netloc):
+        conns = getattr(self.local, "conns", None)
+        if conns is None:
+            conns = self.local.conns = {}
+        key = (scheme, netloc)
+        conn = conns.get(key)
+        if conn is None:
+            if scheme == "https":
+                conn = http.client.HTTPSConnection(netloc, timeout=self.timeout)
+            elif scheme == "http":
+                conn = http.client.HTTPConnection(netloc, timeout=self.timeout)
+            else:
+                raise DownloadError(f"Unsupported URL scheme: {scheme}")
+            conns[key] = conn
+            with self.lock:
+                self.all_conns.append(conn)
+        return conn
+
+    def _drop_connection(self, scheme, netloc):
+        conns = getattr(self.local, "conns", {})
+        conn = conns.pop((scheme, netloc), None)
+        if conn:
+            conn.close()
+
+    def request(self, method, url, headers=None):
+        """
+        Sends a request, following redirects. The caller must read the
+        response to the end (or call release) before reusing the pool.
+
+        :return: Tuple of (final_url, response)
+        """
+        for _ in range(MAX_REDIRECTS):
+            parts = urllib.parse.urlsplit(url)
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+
+            req_headers = {"User-Agent": USER_AGENT}
+            if headers:
+                req_headers.update(headers)
+
+            for attempt in range(2):
+                conn = self._get_connection(parts.scheme, parts.netloc)
+                try:
+                    conn.request(method, path, headers=req_headers)
+                    response = conn.getresponse()
+                    break
+                except (http.client.HTTPException, ConnectionError, OSError):
+                    # Stale keep-alive connection, reconnect once
+                    self._drop_connection(parts.scheme, parts.netloc)
+                    if attempt:
+                        raise
+
+            if response.status in (301, 302, 303, 307, 308):
+                location = response.getheader("Location")
+                self.release(response)
+                if not location:
+                    raise DownloadError("Redirect without Location header")
+                url = urllib.parse.urljoin(url, location)
+                continue
+
+            response.pool_key = (parts.scheme, parts.netloc)
+            if response.will_close:
+                # Forget the connection so the next request opens a new one
+                self.local.conns.pop(response.pool_key, None)
+            return url, response
+
+        raise DownloadError("Too many redirects")
+
+    def release(self, response):
+        response.read()
+
+    def discard(self, response):
+        """Closes a response that won't be read to the end, along with its connection."""
+        response.close()
+        key = getattr(response, "pool_key", None)
+        if key:
+            self._drop_connection(*key)
+
+    def close(self):
+        with self.lock:
+            for conn in self.all_conns:
+                conn.close()
+            self.all_conns = []
+        self.local = threading.local()
+
+
+def probe(pool, url):
+    """
+    Resolves redirects and discovers size, validator and range support.
+
+    :return: Dict with final_url, size, ranges and validator
+    """
+    final_url, response = pool.request("GET", url, headers={"Range": "bytes=0-0"})
+    try:
+        if response.status == 206:
+            content_range = response.getheader("Content-Range", "")
+            total = content_range.rpartition("/")[2]
+            size = int(total) if total.isdigit() else None
+            ranges = size is not None
+        elif response.status == 200:
+            length = response.getheader("Content-Length")
+            size = int(length) if length and length.isdigit() else None
+            ranges = False
+        else:
+            raise DownloadError(f"HTTP {response.status} {response.reason}")
+
+        validator = response.getheader("ETag") or response.getheader("Last-Modified")
+    finally:
+        if response.status == 206:
+            pool.release(response)
+        else:
+            pool.discard(response)
+
+    return {"final_url": final_url, "size": size, "ranges": ranges, "validator": validator}
+
+
+def _load_state(state_path, url, size, validator, chunk_size):
+    try:
+        with open(state_path, 'r') as f:
+            state = json.load(f)
+        # Chunk indexes only mean the same byte ranges with the same chunk size
+        if (state.get("url") == url and state.get("size") == size and state.get("validator") == validator
+                and state.get("chunk_size") == chunk_size):
+            return set(state.get("done", []))
+    except Exception:
+        pass
+    return set()
+
+
+def _save_state(state_path, url, size, validator, chunk_size, done):
+    tmp_path = state_path.with_name(state_path.name + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            "url": url,
+            "size": size,
+            "validator": validator,
+            "chunk_size": chunk_size,
+            "done": sorted(done)
+        }, f)
+    os.replace(tmp_path, state_path)
+
+
+def _fetch_chunk(pool, url, part_path, start, end, meter, cancelled=None):
+    """
+    Fetches bytes [start, end] into the part file. Retries on transient errors.
+
+    :return: False if the cancelled event was set before the chunk was complete
+    """
+    last_error = None
+    for attempt in range(MAX_RETRIES):
+        if cancelled is not None and cancelled.is_set():
+            return False
+        offset = start
+        response = None
+        try:
+            _, response = pool.request("GET", url, headers={"Range": f"bytes={offset}-{end}"})
+            if response.status != 206:
+                pool.discard(response)
+                raise DownloadError(f"Server ignored range request (HTTP {response.status})")
+
+            fd = os.open(part_path, os.O_WRONLY)
+            try:
+                while offset <= end:
+                    if cancelled is not None and cancelled.is_set():
+                        pool.discard(response)
+                        return False
+                    data = response.read(min(READ_SIZE, end - offset + 1))
+                    if not data:
+                        break
+                    os.pwrite(fd, data, offset)
+                    offset += len(data)
+                    meter.update(len(data))
+            finally:
+                os.close(fd)
+
+            if offset <= end:
+                raise DownloadError(f"Connection closed early at byte {offset}")
+            return True
+        except (DownloadError, http.client.HTTPException, OSError) as e:
+            last_error = e
+            if response is not None:
+                pool.discard(response)
+            # Bytes of a failed chunk are fetched again, undo their progress
+            meter.update(-(offset - start))
+            debug_log(f"Chunk {start}-{end} failed (attempt {attempt + 1}): {e}")
+            time.sleep(0.5 * (attempt + 1))
+    raise DownloadError(f"Chunk {start}-{end} failed: {last_error}")
+
+
+def _download_single(pool, url, dest, part_path, action, quiet, checksum=None):
+    """Fallback for servers without range support: one sequential stream."""
+    _, response = pool.request("GET", url)
+    if response.status != 200:
+        pool.discard(response)
+        raise DownloadError(f"HTTP {response.status} {response.reason}")
+
+    length = response.getheader("Content-Length")
+    meter = ProgressMeter(action, int(length) if length and length.isdigit() else None, quiet=quiet)
+    with open(part_path, 'wb') as f:
+        while True:
+            data = response.read(READ_SIZE)
+            if not data:
+                break
+            f.write(data)
+            if checksum:
+                checksum.update(data)
+            meter.update(len(data))
+    meter.finish()
+    if checksum:
+        _check(checksum, dest, part_path)
+    os.replace(part_path, dest)
+    return dest
+
+
+def _check(checksum, dest, part_path):
+    """Verifies a finished download and discards it on a mismatch."""
+    try:
+        checksum.check(dest.name)
+    except Exception:
+        part_path.unlink()
+        state_path = part_path.with_name(part_path.name + ".json")
+        if state_path.exists():
+            state_path.unlink()
+        raise
+
+
+def download_file(url, dest, connections=DEFAULT_CONNECTIONS, chunk_size=CHUNK_SIZE, action="Downloading", quiet=False, checksum=None):
+    """
+    Downloads url to dest using concurrent HTTP Range requests.
+
+    Progress is kept in '<dest>.part' plus a '<dest>.part.json' chunk map,
+    so an interrupted download resumes from the completed chunks.
+    With a checksum (see verify.Checksum) the data is hashed as it arrives
+    and dest only appears if the digest matches.
+
+    :param url: Source URL
+    :param dest: Destination path
+    :param connections: Number of parallel connections
+    :param chunk_size: Size of each Range request in bytes
+    :param checksum: Optional expected digest
+    :return: Path to the downloaded file
+    """
+    dest = Path(dest)
+    part_path = dest.with_name(dest.name + ".part")
+    state_path = dest.with_name(dest.name + ".part.json")
+    pool = ConnectionPool()
+
+    try:
+        info = probe(pool, url)
+        size = info["size"]
+        debug_log(f"Download {url}: size={size} ranges={info['ranges']} validator={info['validator']}")
+
+        if not info["ranges"] or not size:
+            return _download_single(pool, info["final_url"], dest, part_path, action, quiet, checksum)
+
+        done = set()
+        if part_path.exists() and part_path.stat().st_size == size:
+            done = _load_state(state_path, url, size, info["validator"], chunk_size)
+
+        if not part_path.exists() or part_path.stat().st_size != size:
+            with open(part_path, 'wb') as f:
+                f.truncate(size)
+
+        chunks = []
+        for index, start in enumerate(range(0, size, chunk_size)):
+            if index not in done:
+                chunks.append((index, start, min(start + chunk_size, size) - 1))
+
+        resumed = size - sum(end - start + 1 for _, start, end in chunks)
+        if resumed and not quiet:
+            print(f"{Colors.GRAY}Resuming download ({format_size(resumed)} already fetched)...{Colors.ENDC}")
+
+        meter = ProgressMeter(action, size, initial=resumed, quiet=quiet)
+        lock = threading.Lock()
+        final_url = info["final_url"]
+        hasher = OrderedHasher(checksum, part_path, chunk_size) if checksum else None
+
+        cancelled = threading.Event()
+
+        def worker(chunk):
+            index, start, end = chunk
+            if not _fetch_chunk(pool, final_url, part_path, start, end, meter, cancelled):
+                return
+            with lock:
+                done.add(index)
+                _save_state(state_path, url, size, info["validator"], chunk_size, done)
+                completed = set(done)
+            if hasher:
+                hasher.advance(completed, size)
+
+        executor = ThreadPoolExecutor(max_workers=max(1, connections))
+        futures = [executor.submit(worker, chunk) for chunk in chunks]
+        try:
+            finished, _ = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in finished:
+                # Re-raises the first worker error
+                future.result()
+        finally:
+            # On an error or Ctrl+C, queued chunks are dropped and running ones
+            # stop after their current read, the chunk map keeps what is done
+            cancelled.set()
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+        meter.finish()
+        if hasher:
+            # Chunks resumed from an earlier run are hashed here
+            hasher.advance(done, size)
+            _check(checksum, dest, part_path)
+        os.replace(part_path, dest)
+        if state_path.exists():
+            state_path.unlink()
+
+        elapsed = time.monotonic() - meter.start_time
+        if not quiet and elapsed > 0:
+            print(f"{Colors.GRAY}Fetched {format_size(size - resumed)} in {format_eta(elapsed)} ({format_size(meter.rate())}/s){Colors.ENDC}")
+        return dest
+    finally:
+        pool.close()
@@ -0,0 +1,368 @@
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from .constants import Colors
+from .downloader import ProgressMeter, USER_AGENT
+from .core import debug_log
+from .config import get_setting
+from .fsutil import exchange
+from .verify import HashingReader
+
+# Multithreaded decompressors, tried in order. The stdlib is used when none is installed.
+DECOMPRESSORS = {
+    "xz": [["xz", "-T0", "-dc"]],
+    "gz": [["pigz", "-dc"]],
+    "zst": [["zstd", "-T0", "-dc"]],
+    "bz2": [["lbzip2", "-dc"], ["pbzip2", "-dc"]],
+}
+
+FEED_SIZE = 1024 * 1024
+# Files larger than this are streamed to disk by the reader thread instead of the pool
+LARGE_FILE = 4 * 1024 * 1024
+BATCH_FILES = 64
+BATCH_BYTES = 8 * 1024 * 1024
+# Upper bound for the extract_workers setting
+MAX_WORKERS = 32
+
+
+class CountingReader:
+    """File-like wrapper reporting consumed bytes to a ProgressMeter."""
+
+    def __init__(self, fileobj, meter):
+        self.fileobj = fileobj
+        self.meter = meter
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        if data:
+            self.meter.update(len(data))
+        return data
+
+
+def is_safe_member(member):
+    return not (member.name.startswith("/") or ".." in member.name)
+
+
+def compression_for(name):
+    """Returns the tarfile compression suffix for an archive name."""
+    if name.endswith((".tar.gz", ".tgz")):
+        return "gz"
+    if name.endswith((".tar.xz", ".txz")):
+        return "xz"
+    if name.endswith((".tar.zst", ".tzst")):
+        return "zst"
+    if name.endswith((".tar.bz2", ".tbz2")):
+        return "bz2"
+    return ""
+
+
+def find_decompressor(compression):
+    """Returns the command of an installed multithreaded decompressor, or None."""
+    for cmd in DECOMPRESSORS.get(compression, []):
+        if shutil.which(cmd[0]):
+            return cmd
+    return None
+
+
+def swap_into_place(src, dst):
+    """
+    Renames src to dst. An existing dst is exchanged with src in one step
+    where the kernel supports it, otherwise moved aside first. The old
+    content is removed afterwards.
+    """
+    old = None
+    if dst.exists() and not dst.is_symlink():
+        try:
+            exchange(src, dst)
+            if os.path.isdir(src):
+                shutil.rmtree(src, ignore_errors=True)
+            else:
+                os.unlink(src)
+            return
+        except OSError as e:
+            debug_log(f"Could not exchange {dst}: {e}")
+    if dst.exists() or dst.is_symlink():
+        old = dst.with_name(f".{dst.name}.old-{os.getpid()}")
+        os.rename(dst, old)
+    try:
+        os.rename(src, dst)
+    except Exception:
+        if old:
+            os.rename(old, dst)
+        raise
+    if old:
+        if old.is_dir() and not old.is_symlink():
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            old.unlink()
+
+
+def _write_files(batch, store=None):
+    for path, data, mode, mtime in batch:
+        if store and store.link_data(path, data, mode):
+            continue
+        with open(path, 'wb') as f:
+            f.write(data)
+        os.chmod(path, mode)
+        os.utime(path, (mtime, mtime))
+
+
+class TarWriter:
+    """
+    Writes members of a sequential tar stream to disk. Small files are
+    grouped into batches for a bounded worker pool, everything else is
+    done in archive order.
+    """
+
+    def __init__(self, root, workers=1, store=None):
+        self.root = root
+        self.store = store
+        self.executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        self.slots = threading.BoundedSemaphore(max(1, workers) * 2)
+        self.futures = []
+        self.batch = []
+        self.batch_bytes = 0
+        self.batch_paths = set()
+        self.created_dirs = set()
+        self.directories = []
+        self.count = 0
+
+    def _flush_batch(self):
+        if not self.batch:
+            return
+        batch = self.batch
+        self.batch = []
+        self.batch_bytes = 0
+        self.batch_paths = set()
+
+        if not self.executor:
+            _write_files(batch, self.store)
+            return
+
+        self.slots.acquire()
+        future = self.executor.submit(_write_files, batch, self.store)
+        future.add_done_callback(lambda _: self.slots.release())
+        self.futures.append(future)
+
+        if len(self.futures) > 64:
+            still_running = []
+            for f in self.futures:
+                if f.done():
+                    f.result()
+                else:
+                    still_running.append(f)
+            self.futures = still_running
+
+    def _wait(self):
+        """Writes out everything queued so far and re-raises worker errors."""
+        self._flush_batch()
+        for future in self.futures:
+            future.result()
+        self.futures = []
+
+    def _makedirs(self, path):
+        if path and path not in self.created_dirs:
+            os.makedirs(path, 0o755, exist_ok=True)
+            self.created_dirs.add(path)
+
+    def add(self, tar, member):
+        if not is_safe_member(member):
+            debug_log(f"Skipping unsafe archive member: {member.name}")
+            return
+
+        target = os.path.join(self.root, member.name)
+        if target in self.batch_paths:
+            # A later member overwrites an earlier one, keep the order
+            self._flush_batch()
+        self.count += 1
+
+        if member.isdir():
+            self._makedirs(target)
+            self.directories.append(member)
+            return
+
+        self._makedirs(os.path.dirname(target))
+
+        if member.isreg() and member.size <= LARGE_FILE:
+            self.batch.append((target, tar.extractfile(member).read(), member.mode, member.mtime))
+            self.batch_paths.add(target)
+            self.batch_bytes += member.size
+            if len(self.batch) >= BATCH_FILES or self.batch_bytes >= BATCH_BYTES:
+                self._flush_batch()
+            return
+
+        # Anything else is written in order, after the queued files it may depend on
+        self._wait()
+        if member.isreg():
+            with open(target, 'wb') as f:
+                shutil.copyfileobj(tar.extractfile(member), f, FEED_SIZE)
+            os.chmod(target, member.mode)
+            os.utime(target, (member.mtime, member.mtime))
+        elif member.issym():
+            if os.path.lexists(target):
+                os.unlink(target)
+            os.symlink(member.linkname, target)
+        elif member.islnk():
+            if member.linkname.startswith("/") or ".." in member.linkname:
+                return
+            if os.path.lexists(target):
+                os.unlink(target)
+            os.link(os.path.join(self.root, member.linkname), target)
+        else:
+            tar.extract(member, path=self.root)
+
+    def close(self):
+        try:
+            self._wait()
+        finally:
+            if self.executor:
+                self.executor.shutdown(wait=True)
+
+        # Directory attributes are applied last, so read-only directories can be filled first
+        for member in reversed(self.directories):
+            path = os.path.join(self.root, member.name)
+            try:
+                os.chmod(path, member.mode)
+                os.utime(path, (member.mtime, member.mtime))
+            except OSError:
+                pass
+
+
+def _feed(source, sink, errors):
+    try:
+        while True:
+            data = source.read(FEED_SIZE)
+            if not data:
+                break
+            sink.write(data)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        try:
+            sink.close()
+        except OSError:
+            pass
+
+
+def unpack_stream(fileobj, root, compression, workers=None, store=None):
+    """
+    Unpacks a tar stream into root. Decompression runs in an external
+    multithreaded tool when one is installed, otherwise in tarfile.
+    With a store, files whose content is already stored are linked instead of written.
+    Small files are written by a pool of `workers` threads, by default the
+    extract_workers setting.
+
+    :return: Number of members written
+    """
+    workers = min(MAX_WORKERS, max(1, int(workers or get_setting("extract_workers") or 1)))
+    cmd = find_decompressor(compression)
+    proc = None
+    feeder = None
+    feed_errors = []
+
+    if cmd:
+        debug_log(f"Decompressing with: {' '.join(cmd)}")
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        feeder = threading.Thread(target=_feed, args=(fileobj, proc.stdin, feed_errors), daemon=True)
+        feeder.start()
+        tar = tarfile.open(fileobj=proc.stdout, mode="r|")
+    else:
+        if compression == "zst":
+            raise RuntimeError("zstd is required to extract .tar.zst archives")
+        tar = tarfile.open(fileobj=fileobj, mode=f"r|{compression}")
+
+    writer = TarWriter(root, workers, store)
+    try:
+        with tar:
+            for member in tar:
+                writer.add(tar, member)
+        if proc:
+            # Drain trailing padding so the decompressor exits cleanly
+            while proc.stdout.read(FEED_SIZE):
+                pass
+    finally:
+        writer.close()
+        if proc:
+            proc.stdout.close()
+            feeder.join()
+            returncode = proc.wait()
+
+    if proc:
+        if feed_errors:
+            raise feed_errors[0]
+        if returncode != 0:
+            raise RuntimeError(f"{cmd[0]} exited with status {returncode}")
+    return writer.count
+
+
+def extract_stream(fileobj, dest_dir, compression, total_size=None, action="Extracting", store=None, checksum=None, name=None):
+    """
+    Unpacks a tar stream into a staging directory inside dest_dir and moves
+    its top-level entries into place once the whole archive was read.
+
+    :param fileobj: Readable binary stream (file or HTTP response)
+    :param dest_dir: Directory receiving the archive contents
+    :param compression: "gz", "xz", "zst", "bz2" or "" for plain tar
+    :param total_size: Size of the stream in bytes, for progress reporting
+    :param store: Optional ObjectStore to link known file contents from
+    :param checksum: Optional verify.Checksum; nothing is moved into place unless the stream matches it
+    :param name: Name of the archive for messages
+    :return: List of installed top-level Paths
+    """
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=dest_dir)
+    meter = ProgressMeter(action, total_size)
+
+    try:
+        reader = CountingReader(fileobj, meter)
+        if checksum:
+            reader = HashingReader(reader, checksum)
+        count = unpack_stream(reader, staging, compression, store=store)
+        if checksum:
+            reader.drain()
+        meter.finish()
+        if checksum:
+            checksum.check(name or "archive")
+        debug_log(f"Extracted {count} members")
+
+        installed = []
+        for entry in sorted(os.listdir(staging)):
+            target = dest_dir / entry
+            swap_into_place(os.path.join(staging, entry), target)
+            installed.append(target)
+        return installed
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def extract_archive(archive_path, dest_dir, action="Extracting", store=None):
+    """Extracts an archive file on disk through the streaming path."""
+    with open(archive_path, 'rb') as f:
+        return extract_stream(f, dest_dir, compression_for(archive_path.name),
+                              total_size=archive_path.stat().st_size, action=action, store=store,
+                              name=archive_path.name)
+
+
+def stream_url(url, dest_dir, compression=None, action="Downloading & Extracting", store=None, checksum=None):
+    """
+    Downloads url and unpacks it on the fly, without writing the archive to disk.
+    With a checksum the stream is hashed while it is unpacked, and the
+    result is only moved into place if the digest matches.
+
+    :return: List of installed top-level Paths
+    """
+    if compression is None:
+        compression = compression_for(url.rsplit("/", 1)[-1])
+
+    req = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(req) as response:
+        length = response.headers.get("Content-Length")
+        total_size = int(length) if length and length.isdigit() else None
+        print(f"{Colors.GRAY}Streaming archive directly into {dest_dir}...{Colors.ENDC}")
+        return extract_stream(response, dest_dir, compression, total_size=total_size, action=action, store=store,
+                              checksum=checksum, name=url.rsplit("/", 1)[-1])
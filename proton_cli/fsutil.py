@@ -0,0 +1,202 @@
+import os
+import ctypes
+import shutil
+import fcntl
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# ioctl number of FICLONE from linux/fs.h
+FICLONE = 0x40049409
+# renameat2() flag and AT_FDCWD from linux/fcntl.h
+RENAME_EXCHANGE = 2
+AT_FDCWD = -100
+HASH_BLOCK = 1024 * 1024
+
+
+def file_digest(path):
+    """Returns the sha256 hex digest of a file."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(HASH_BLOCK)
+            if not data:
+                break
+            h.update(data)
+    return h.hexdigest()
+
+
+def reflink(src, dst):
+    """Creates dst as a copy-on-write clone of src. Raises OSError when unsupported."""
+    with open(src, 'rb') as fsrc:
+        fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            fcntl.ioctl(fd, FICLONE, fsrc.fileno())
+        except OSError:
+            os.close(fd)
+            os.unlink(dst)
+            raise
+        os.close(fd)
+
+
+def supports_reflink(directory):
+    """Checks whether the filesystem holding directory can clone files."""
+    try:
+        fd, src = tempfile.mkstemp(prefix=".reflink-", dir=directory)
+    except OSError:
+        return False
+    dst = src + ".clone"
+    try:
+        os.write(fd, b"proton-cli")
+        os.close(fd)
+        reflink(src, dst)
+        os.unlink(dst)
+        return True
+    except OSError:
+        return False
+    finally:
+        os.unlink(src)
+
+
+def exchange(path_a, path_b):
+    """
+    Atomically swaps two paths with renameat2(RENAME_EXCHANGE).
+    Raises OSError when the kernel or filesystem doesn't support it.
+    """
+    libc = ctypes.CDLL(None, use_errno=True)
+    if not hasattr(libc, "renameat2"):
+        raise OSError("renameat2 is not available")
+    if libc.renameat2(AT_FDCWD, os.fsencode(path_a), AT_FDCWD, os.fsencode(path_b), RENAME_EXCHANGE) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+
+def copy_attrs(src_stat, dst):
+    os.chmod(dst, src_stat.st_mode & 0o7777)
+    os.utime(dst, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+
+
+def replace_with_link(obj, path, use_reflink=False):
+    """Atomically replaces path with a hardlink (or clone) of obj."""
+    tmp = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.link-{os.getpid()}")
+    if use_reflink:
+        st = os.stat(path)
+        reflink(obj, tmp)
+        copy_attrs(st, tmp)
+    else:
+        os.link(obj, tmp)
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        os.unlink(tmp)
+        raise
+
+
+def walk_files(root):
+    """Yields os.DirEntry objects for all regular files below root, not following symlinks."""
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+        except (PermissionError, FileNotFoundError):
+            continue
+
+
+def _copy_file(src, dst, src_stat, use_reflink):
+    if use_reflink:
+        try:
+            reflink(src, dst)
+            copy_attrs(src_stat, dst)
+            return "reflink"
+        except OSError:
+            pass
+
+    if hasattr(os, "copy_file_range"):
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            remaining = src_stat.st_size
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            except OSError:
+                remaining = src_stat.st_size
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+            if remaining > 0:
+                shutil.copyfileobj(fsrc, fdst, HASH_BLOCK)
+    else:
+        shutil.copyfile(src, dst)
+    copy_attrs(src_stat, dst)
+    return "copy"
+
+
+def copy_file(src, dst):
+    """Copies src over dst, as a clone where the filesystem supports it."""
+    tmp_dst = f"{dst}.{os.getpid()}.tmp"
+    try:
+        method = _copy_file(str(src), tmp_dst, os.stat(src), use_reflink=True)
+        os.replace(tmp_dst, dst)
+    except BaseException:
+        try:
+            os.unlink(tmp_dst)
+        except FileNotFoundError:
+            pass
+        raise
+    return method
+
+
+def clone_tree(src, dst, hardlink_readonly=True, workers=8):
+    """
+    Copies the tree at src to dst as cheaply as the filesystem allows:
+    reflinks where supported, otherwise copy_file_range. Files without any
+    write permission are hardlinked instead of copied.
+
+    :return: Dict counting files per method
+    """
+    use_reflink = supports_reflink(os.path.dirname(os.path.abspath(dst)) or ".")
+    counts = {"reflink": 0, "copy": 0, "hardlink": 0, "symlink": 0}
+    directories = []
+    jobs = []
+
+    os.mkdir(dst)
+    directories.append((src, dst))
+    stack = [(src, dst)]
+    while stack:
+        current_src, current_dst = stack.pop()
+        with os.scandir(current_src) as it:
+            for entry in it:
+                target = os.path.join(current_dst, entry.name)
+                if entry.is_symlink():
+                    os.symlink(os.readlink(entry.path), target)
+                    counts["symlink"] += 1
+                elif entry.is_dir(follow_symlinks=False):
+                    os.mkdir(target)
+                    directories.append((entry.path, target))
+                    stack.append((entry.path, target))
+                elif entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    if hardlink_readonly and not st.st_mode & 0o222:
+                        try:
+                            os.link(entry.path, target)
+                            counts["hardlink"] += 1
+                            continue
+                        except OSError:
+                            pass
+                    jobs.append((entry.path, target, st))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for method in executor.map(lambda job: _copy_file(job[0], job[1], job[2], use_reflink), jobs):
+            counts[method] += 1
+
+    for src_dir, dst_dir in reversed(directories):
+        copy_attrs(os.stat(src_dir), dst_dir)
+    return counts
@@ -10,17 +10,31 @@ def print_help():
     commands = [
         ("check", "Scan and configure Proton versions"),
         ("pull-proton", "Download latest GE-Proton"),
+        ("pull-proton --list|--tag", "List releases or download a specific one"),
         ("pull-runtime", "Download Steam Linux Runtime (Sniper)"),
         ("proton-delete", "Delete Proton versions"),
+        ("store add|gc|status", "Deduplicate Proton versions"),
         ("prefix-make [name]", "Create a new Wine prefix"),
-        ("prefix-delete", "Delete an existing prefix"),
+        ("prefix-delete [pfx...]", "Delete prefixes (removed in the background)"),
+        ("prefix-dedupe [pfx...]", "Share identical files between prefixes"),
+        ("pool status|refill|clear", "Manage pre-initialized spare prefixes"),
+        ("server status|stop", "Manage persistent wineservers"),
         ("open-prefix", "Open prefix drive_c"),
-        ("run <exe>", "Run an executable"),
+        ("run <exe>", "Run an executable (-P <profile> to pick a profile)"),
+        ("shortcuts list|repair", "List or rebuild the shortcut registry"),
+        ("run-batch <manifest>", "Run many executables concurrently"),
+        ("bench <exe>", "Compare Proton builds, runtimes or options (--proton, -o)"),
         ("winecfg", "Open Wine configuration"),
-        ("regedit <file>", "Apply .reg file"),
-        ("regsvr32 <args>", "Register/Unregister DLLs"),
+        ("regedit <files...>", "Apply .reg files (-p <pfx>|--all for many)"),
+        ("reg get|set <pfx> <key>", "Read or change registry values"),
+        ("regsvr32 <args>", "Register/Unregister DLLs (-p <pfx>|--all)"),
         ("taskmgr", "Open Task Manager"),
         ("uninstaller", "Open Uninstaller"),
+        ("config [key] [value]", "Show or change settings"),
+        ("daemon start|stop|status", "Keep proton-cli resident for fast launches"),
+        ("profile list|set|assign", "Launch profiles: CPUs, priorities, limits"),
+        ("cache show|migrate|prune", "Manage the shared shader cache"),
+        ("trash status|purge", "Show or remove deleted files still on disk"),
         ("update", "Update proton-cli"),
         ("help", "Show this help message")
     ]
@@ -0,0 +1,107 @@
+import os
+import json
+import time
+import hashlib
+import urllib.error
+import urllib.request
+from .constants import Colors, BASE_DIR
+from .core import debug_log
+from .downloader import USER_AGENT
+
+CACHE_DIR = BASE_DIR / "http-cache"
+
+
+class OfflineError(Exception):
+    pass
+
+
+def offline():
+    return bool(os.environ.get("PROTON_CLI_OFFLINE"))
+
+
+def _entry_path(url):
+    return CACHE_DIR / f"{hashlib.sha1(url.encode()).hexdigest()}.json"
+
+
+def _load_entry(url):
+    try:
+        with open(_entry_path(url), 'r') as f:
+            entry = json.load(f)
+        if entry.get("url") == url:
+            return entry
+    except Exception:
+        pass
+    return None
+
+
+def _save_entry(entry):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _entry_path(entry["url"])
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, path)
+
+
+def fetch(url):
+    """
+    Returns the body of url as text. Cached responses are revalidated with
+    If-None-Match/If-Modified-Since, which GitHub answers with a 304 that
+    does not count against its rate limit. When the request fails, a cached
+    response is used instead.
+
+    :raises OfflineError: In offline mode without a cached response
+    """
+    entry = _load_entry(url)
+    if offline():
+        if entry is None:
+            raise OfflineError(f"Offline mode and no cached response for {url}")
+        return entry["body"]
+
+    headers = {"User-Agent": USER_AGENT}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        req = urllib.request.Request(url, headers=headers)
+        with urllib.request.urlopen(req, timeout=30) as response:
+            body = response.read().decode('utf-8')
+            new_entry = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched": time.time(),
+                "body": body
+            }
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and entry:
+            debug_log(f"Not modified: {url}")
+            entry["fetched"] = time.time()
+            _try_save(entry)
+            return entry["body"]
+        if entry:
+            # e.g. 403 once the rate limit is used up
+            print(f"{Colors.WARNING}⚠ {url} returned HTTP {e.code}, using cached response.{Colors.ENDC}")
+            return entry["body"]
+        raise
+    except (urllib.error.URLError, OSError) as e:
+        if entry:
+            print(f"{Colors.WARNING}⚠ Could not reach {url} ({e}), using cached response.{Colors.ENDC}")
+            return entry["body"]
+        raise
+
+    _try_save(new_entry)
+    return body
+
+
+def _try_save(entry):
+    try:
+        _save_entry(entry)
+    except OSError as e:
+        debug_log(f"Could not cache {entry['url']}: {e}")
+
+
+def fetch_json(url):
+    return json.loads(fetch(url))
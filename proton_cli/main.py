@@ -3,6 +3,109 @@ import argparse
 import os
 from .constants import Colors
 
+def dispatch(args):
+    # Command Dispatcher
+    if args.command == "check":
+        from .check import check_proton
+        check_proton(refresh=args.refresh)
+    elif args.command == "pull-proton":
+        from .pull_proton import pull_proton
+        if args.list:
+            from .pull_proton import list_releases
+            list_releases()
+        else:
+            pull_proton(stream=not args.no_stream, tag=args.tag)
+    elif args.command == "pull-runtime":
+        from .pull_runtime import pull_runtime
+        pull_runtime(stream=not args.no_stream)
+    elif args.command == "proton-delete":
+        from .proton_delete import delete_proton
+        delete_proton()
+    elif args.command == "store":
+        from .store import run_store
+        run_store(args.action, args.paths)
+    elif args.command == "prefix-make":
+        from .prefix_make import create_prefix
+        name = args.name
+        if not name:
+            name = input(f"{Colors.OKGREEN}Enter name for new prefix: {Colors.ENDC}").strip()
+        if name: create_prefix(name)
+    elif args.command == "pool":
+        from .prefix_pool import run_pool
+        run_pool(args.action)
+    elif args.command == "server":
+        from .wineserver import run_server
+        run_server(args.action, args.prefixes)
+    elif args.command == "winecfg":
+        from .winecfg import run_winecfg
+        run_winecfg()
+    elif args.command == "regedit":
+        from .regedit import run_regedit
+        failed = run_regedit(args.reg_files, args.prefix, args.all, args.concurrency)
+        sys.exit(1 if failed else 0)
+    elif args.command == "reg":
+        from .registry_hive import run_reg
+        run_reg(args.action, args.prefix, args.key, args.name, args.values, args.type)
+    elif args.command == "regsvr32":
+        from .regsvr32 import run_regsvr32
+        failed = run_regsvr32(args.args, args.prefix, args.all, args.concurrency)
+        sys.exit(1 if failed else 0)
+    elif args.command == "taskmgr":
+        from .taskmgr import run_taskmgr
+        run_taskmgr()
+    elif args.command == "uninstaller":
+        from .uninstaller import run_uninstaller
+        run_uninstaller()
+    elif args.command == "open-prefix":
+        from .prefix_open import open_prefix_drive
+        open_prefix_drive()
+    elif args.command == "prefix-dedupe":
+        from .prefix_dedupe import run_dedupe
+        run_dedupe(args.prefixes, args.dry_run, args.concurrency)
+    elif args.command == "prefix-delete":
+        from .prefix_delete import delete_prefix
+        delete_prefix(args.prefixes)
+    elif args.command == "run":
+        from .daemon import run_via_daemon
+        if not run_via_daemon(args.exe, args.args, prefix_name=args.prefix, user_options=args.options, profile=args.launch_profile):
+            from .run import run_executable
+            run_executable(args.exe, args.args, prefix_name=args.prefix, user_options=args.options, profile=args.launch_profile)
+    elif args.command == "run-batch":
+        from .run_batch import run_batch
+        failed = run_batch(args.manifest, args.concurrency, args.per_prefix, args.timeout, args.report)
+        sys.exit(1 if failed else 0)
+    elif args.command == "shortcuts":
+        from .shortcuts import run_shortcuts
+        run_shortcuts(args.action)
+    elif args.command == "config":
+        from .config import run_config
+        run_config(args.key, args.value)
+    elif args.command == "bench":
+        from .bench import run_bench
+        failed = run_bench(args.exe, args.args, args.prefix, max(1, args.runs), args.proton, args.runtime,
+                           args.options, max(0, args.warmup), args.timeout, args.mangohud, args.json)
+        sys.exit(1 if failed else 0)
+    elif args.command == "daemon":
+        from .daemon import run_daemon
+        run_daemon(args.action)
+    elif args.command == "profile":
+        from .profiles import run_profiles
+        settings = {"cpus": args.cpus, "nice": args.nice, "ionice": args.ionice,
+                    "cpu_max": args.cpu_max, "memory_max": args.memory_max}
+        run_profiles(args.action, args.names, settings)
+    elif args.command == "cache":
+        from .shader_cache import run_cache
+        run_cache(args.action, args.max_size)
+    elif args.command == "trash":
+        from .trash import run_trash
+        run_trash(args.action)
+    elif args.command == "update":
+        from .update import update_self
+        update_self()
+    elif args.command == "help":
+        from .help import print_help
+        print_help()
+
 def main():
     class CustomParser(argparse.ArgumentParser):
         def error(self, message):
@@ -12,37 +115,123 @@ def main():
     parser = CustomParser(add_help=False)
     parser.add_argument('-h', '--help', action='store_true')
     parser.add_argument('-d', '--debug', action='store_true')
+    parser.add_argument('--profile', action='store_true')
+    parser.add_argument('--offline', action='store_true')
+    parser.add_argument('--telemetry', action='store_true')
     
     subparsers = parser.add_subparsers(dest="command")
 
     # Command Definitions
-    subparsers.add_parser("check")
-    subparsers.add_parser("pull-proton")
-    subparsers.add_parser("pull-runtime")
+    check = subparsers.add_parser("check")
+    check.add_argument("--refresh", action="store_true")
+    pull_proton = subparsers.add_parser("pull-proton")
+    pull_proton.add_argument("--no-stream", action="store_true")
+    pull_proton.add_argument("--list", action="store_true")
+    pull_proton.add_argument("--tag")
+    pull_runtime = subparsers.add_parser("pull-runtime")
+    pull_runtime.add_argument("--no-stream", action="store_true")
     subparsers.add_parser("proton-delete")
     
+    store = subparsers.add_parser("store")
+    store.add_argument("action", choices=["add", "gc", "status"])
+    store.add_argument("paths", nargs="*")
+    
     prefix_make = subparsers.add_parser("prefix-make")
     prefix_make.add_argument("name", nargs='?')
     
+    pool = subparsers.add_parser("pool")
+    pool.add_argument("action", choices=["status", "refill", "clear"])
+    
+    server = subparsers.add_parser("server")
+    server.add_argument("action", choices=["status", "stop"])
+    server.add_argument("prefixes", nargs="*")
+    
     subparsers.add_parser("winecfg")
     
     regedit = subparsers.add_parser("regedit")
-    regedit.add_argument("reg_file")
+    regedit.add_argument("reg_files", nargs='+')
+    regedit.add_argument("-p", "--prefix", action="append")
+    regedit.add_argument("--all", action="store_true")
+    regedit.add_argument("-j", "--concurrency", type=int)
+    
+    reg = subparsers.add_parser("reg")
+    reg.add_argument("action", choices=["get", "set"])
+    reg.add_argument("prefix")
+    reg.add_argument("key")
+    reg.add_argument("name", nargs='?')
+    reg.add_argument("values", nargs='*')
+    reg.add_argument("-t", "--type", default="REG_SZ")
     
     regsvr = subparsers.add_parser("regsvr32")
+    regsvr.add_argument("-p", "--prefix", action="append")
+    regsvr.add_argument("--all", action="store_true")
+    regsvr.add_argument("-j", "--concurrency", type=int)
     regsvr.add_argument("args", nargs=argparse.REMAINDER)
     
     subparsers.add_parser("taskmgr")
     subparsers.add_parser("uninstaller")
     subparsers.add_parser("open-prefix")
-    subparsers.add_parser("prefix-delete")
+    prefix_delete = subparsers.add_parser("prefix-delete")
+    prefix_delete.add_argument("prefixes", nargs="*")
+    
+    dedupe = subparsers.add_parser("prefix-dedupe")
+    dedupe.add_argument("prefixes", nargs="*")
+    dedupe.add_argument("-n", "--dry-run", action="store_true")
+    dedupe.add_argument("-j", "--concurrency", type=int)
     
     run = subparsers.add_parser("run")
     run.add_argument("-p", "--prefix")
     run.add_argument("-o", "--options")
+    run.add_argument("-P", "--launch-profile")
     run.add_argument("exe")
     run.add_argument("args", nargs=argparse.REMAINDER)
     
+    shortcuts = subparsers.add_parser("shortcuts")
+    shortcuts.add_argument("action", choices=["list", "repair"])
+    
+    config = subparsers.add_parser("config")
+    config.add_argument("key", nargs='?')
+    config.add_argument("value", nargs='?')
+    
+    run_batch = subparsers.add_parser("run-batch")
+    run_batch.add_argument("manifest")
+    run_batch.add_argument("-j", "--concurrency", type=int)
+    run_batch.add_argument("--per-prefix", type=int)
+    run_batch.add_argument("--timeout", type=float)
+    run_batch.add_argument("--report")
+    
+    bench = subparsers.add_parser("bench")
+    bench.add_argument("-p", "--prefix")
+    bench.add_argument("-n", "--runs", type=int, default=5)
+    bench.add_argument("--proton", action="append")
+    bench.add_argument("--runtime", action="append")
+    bench.add_argument("-o", "--options", action="append")
+    bench.add_argument("--warmup", type=int, default=1)
+    bench.add_argument("--timeout", type=float)
+    bench.add_argument("--mangohud", action="store_true")
+    bench.add_argument("--json")
+    bench.add_argument("exe")
+    bench.add_argument("args", nargs=argparse.REMAINDER)
+    
+    daemon = subparsers.add_parser("daemon")
+    daemon.add_argument("action", choices=["start", "stop", "status", "serve"])
+    
+    profile = subparsers.add_parser("profile")
+    profile.add_argument("action", choices=["list", "set", "delete", "assign", "unassign"])
+    profile.add_argument("names", nargs="*")
+    profile.add_argument("--cpus")
+    profile.add_argument("--nice", type=int)
+    profile.add_argument("--ionice")
+    profile.add_argument("--cpu-max")
+    profile.add_argument("--memory-max")
+    
+    cache = subparsers.add_parser("cache")
+    cache.add_argument("action", choices=["show", "migrate", "prune"])
+    cache.add_argument("--max-size", type=int, help="MB")
+    
+    trash = subparsers.add_parser("trash")
+    trash.add_argument("action", choices=["status", "purge"])
+    
     subparsers.add_parser("update")
     subparsers.add_parser("help")
 
@@ -56,55 +245,28 @@ def main():
         os.environ["PROTON_CLI_DEBUG"] = "1"
         print(f"{Colors.WARNING}⚠ Debug mode enabled.{Colors.ENDC}")
 
-    # Command Dispatcher
-    if args.command == "check":
-        from .check import check_proton
-        check_proton()
-    elif args.command == "pull-proton":
-        from .pull_proton import pull_proton
-        pull_proton()
-    elif args.command == "pull-runtime":
-        from .pull_runtime import pull_runtime
-        pull_runtime()
-    elif args.command == "proton-delete":
-        from .proton_delete import delete_proton
-        delete_proton()
-    elif args.command == "prefix-make":
-        from .prefix_make import create_prefix
-        name = args.name
-        if not name:
-            name = input(f"{Colors.OKGREEN}Enter name for new prefix: {Colors.ENDC}").strip()
-        if name: create_prefix(name)
-    elif args.command == "winecfg":
-        from .winecfg import run_winecfg
-        run_winecfg()
-    elif args.command == "regedit":
-        from .regedit import run_regedit
-        run_regedit(args.reg_file)
-    elif args.command == "regsvr32":
-        from .regsvr32 import run_regsvr32
-        run_regsvr32(args.args)
-    elif args.command == "taskmgr":
-        from .taskmgr import run_taskmgr
-        run_taskmgr()
-    elif args.command == "uninstaller":
-        from .uninstaller import run_uninstaller
-        run_uninstaller()
-    elif args.command == "open-prefix":
-        from .prefix_open import open_prefix_drive
-        open_prefix_drive()
-    elif args.command == "prefix-delete":
-        from .prefix_delete import delete_prefix
-        delete_prefix()
-    elif args.command == "run":
-        from .run import run_executable
-        run_executable(args.exe, args.args, prefix_name=args.prefix, user_options=args.options)
-    elif args.command == "update":
-        from .update import update_self
-        update_self()
-    elif args.command == "help":
-        from .help import print_help
-        print_help()
+    if args.offline:
+        os.environ["PROTON_CLI_OFFLINE"] = "1"
+
+    if args.telemetry:
+        os.environ["PROTON_CLI_TELEMETRY"] = "1"
+
+    if args.command not in ("run", "trash", "daemon"):
+        # Resume a purge that did not finish, e.g. after a crash
+        from .trash import pending, trigger_purge
+        if pending():
+            trigger_purge()
+
+    if args.profile:
+        from . import trace
+        trace.enable()
+        try:
+            with trace.span(args.command, cat="command"):
+                dispatch(args)
+        finally:
+            trace.finish(args.command)
+    else:
+        dispatch(args)
 
 if __name__ == "__main__":
     main()
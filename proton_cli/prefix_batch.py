@@ -0,0 +1,108 @@
+import os
+import time
+import fnmatch
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .constants import Colors, PREFIXES_DIR
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def list_prefixes():
+    if not PREFIXES_DIR.exists():
+        return []
+    return sorted((p for p in PREFIXES_DIR.iterdir() if p.is_dir()), key=lambda x: x.name)
+
+
+def match_prefixes(selectors, select_all=False):
+    """
+    Returns the prefixes matching any of the selectors (names or glob patterns).
+
+    :return: (matched prefixes, selectors that matched nothing)
+    """
+    prefixes = list_prefixes()
+    if select_all:
+        return prefixes, []
+
+    matched = {}
+    unmatched = []
+    for selector in selectors:
+        hits = [p for p in prefixes if fnmatch.fnmatchcase(p.name, selector)]
+        if not hits:
+            unmatched.append(selector)
+        for p in hits:
+            matched[p.name] = p
+    return sorted(matched.values(), key=lambda x: x.name), unmatched
+
+
+def parse_selection(text, count):
+    """
+    Parses a selection like "1,3,5-7" of 1-based list numbers.
+
+    :return: Sorted list of 0-based indexes
+    :raises ValueError: On malformed input or numbers out of range
+    """
+    indexes = set()
+    for part in text.replace(" ", "").split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        start, end = int(first), int(last or first)
+        if start > end:
+            start, end = end, start
+        if start < 1 or end > count:
+            raise ValueError(f"{part} is out of range")
+        indexes.update(range(start - 1, end))
+    if not indexes:
+        raise ValueError("nothing selected")
+    return sorted(indexes)
+
+
+def run_per_prefix(prefixes, action, func, workers=None):
+    """
+    Runs func(prefix) for every prefix on a bounded pool of threads.
+    func returns a short message on success and raises on failure.
+
+    :return: Number of failed prefixes
+    """
+    workers = max(1, min(workers or DEFAULT_WORKERS, len(prefixes)))
+    print(f"{Colors.HEADER}➜ {action} on {len(prefixes)} prefixes{Colors.ENDC} {Colors.GRAY}({workers} in parallel){Colors.ENDC}")
+
+    lock = threading.Lock()
+    results = {}
+
+    def task(prefix):
+        start = time.monotonic()
+        try:
+            message = func(prefix)
+            ok = True
+        except Exception as e:
+            message = str(e)
+            ok = False
+        elapsed = time.monotonic() - start
+        with lock:
+            color = Colors.OKGREEN if ok else Colors.FAIL
+            print(f" {color}■{Colors.ENDC} {prefix.name} {Colors.GRAY}{elapsed:.1f}s{Colors.ENDC}")
+        return prefix, ok, message, elapsed
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(task, p) for p in prefixes]):
+            prefix, ok, message, elapsed = future.result()
+            results[prefix.name] = (ok, message, elapsed)
+
+    print(f"\n{Colors.HEADER}{'Prefix':<24} {'Status':<8} {'Time':>8}  Result{Colors.ENDC}")
+    print(f"{Colors.GRAY}{'-' * 70}{Colors.ENDC}")
+    for prefix in prefixes:
+        ok, message, elapsed = results[prefix.name]
+        color = Colors.OKGREEN if ok else Colors.FAIL
+        status = "ok" if ok else "failed"
+        print(f"{prefix.name[:24]:<24} {color}{status:<8}{Colors.ENDC} {elapsed:>7.1f}s  {Colors.GRAY}{message}{Colors.ENDC}")
+
+    failed = sum(1 for ok, _, _ in results.values() if not ok)
+    print(f"\n{Colors.GRAY}Total wall time: {time.monotonic() - start:.1f}s{Colors.ENDC}")
+    if failed:
+        print(f"{Colors.FAIL}✖ {failed} of {len(prefixes)} prefixes failed.{Colors.ENDC}")
+    else:
+        print(f"{Colors.OKGREEN}✔ All {len(prefixes)} prefixes done.{Colors.ENDC}")
+    return failed
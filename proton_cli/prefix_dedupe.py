@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor
+from .constants import Colors, BASE_DIR
+from .core import debug_log
+from .downloader import format_size
+from .fsutil import file_digest, supports_reflink, replace_with_link, walk_files
+from .prefix_batch import match_prefixes
+from .wineserver import find_server
+
+INDEX_FILE = BASE_DIR / "dedupe-index.json"
+HASH_WORKERS = min(8, os.cpu_count() or 1)
+# Linking tiny files frees next to nothing
+MIN_SIZE = 16 * 1024
+
+# Wine and installers may rewrite files in place, which would change every
+# hardlinked copy at once. Without reflinks only these trees are shared:
+# files in them are replaced as a whole, never modified.
+HARDLINK_SAFE = [
+    "windows/Fonts/*",
+    "windows/Microsoft.NET/*",
+    "windows/assembly/*",
+    "windows/winsxs/*",
+    "windows/Installer/*",
+]
+
+
+def _is_hardlink_safe(rel_path):
+    return any(fnmatch.fnmatch(rel_path, pattern) for pattern in HARDLINK_SAFE)
+
+
+def _load_index():
+    try:
+        with open(INDEX_FILE, 'r') as f:
+            index = json.load(f)
+        if isinstance(index, dict):
+            return index
+    except Exception:
+        pass
+    return {}
+
+
+def _save_index(index):
+    BASE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_file = INDEX_FILE.with_name(INDEX_FILE.name + ".tmp")
+    with open(tmp_file, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp_file, INDEX_FILE)
+
+
+class FileInfo:
+    __slots__ = ("path", "rel", "stat", "key", "digest", "clone_of")
+
+    def __init__(self, path, rel, st):
+        self.path = path
+        self.rel = rel
+        self.stat = st
+        self.key = f"{st.st_dev}:{st.st_ino}"
+        self.digest = None
+        self.clone_of = None
+
+
+def collect_files(prefixes):
+    """Yields FileInfo objects for all files worth deduplicating in the prefixes."""
+    for prefix in prefixes:
+        drive_c = prefix / "pfx" / "drive_c"
+        if not drive_c.is_dir():
+            continue
+        root = str(drive_c)
+        for entry in walk_files(root):
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if st.st_size < MIN_SIZE:
+                continue
+            yield FileInfo(entry.path, os.path.relpath(entry.path, root), st)
+
+
+def dedupe(prefixes, dry_run=False, workers=HASH_WORKERS, prune=True):
+    """
+    Replaces identical files across prefixes with reflinks, or with
+    hardlinks for files under HARDLINK_SAFE. The index keeps the hash of
+    every candidate by inode, so unchanged files are not hashed again.
+    Without prune, index entries of other prefixes are kept.
+
+    :return: Dict with scanned, hashed, cached, linked and saved counts
+    """
+    index = _load_index()
+    result = {"scanned": 0, "hashed": 0, "cached": 0, "linked": 0, "saved": 0, "skipped": 0}
+
+    # Only files sharing device and size with another file can be duplicates
+    by_size = {}
+    for info in collect_files(prefixes):
+        result["scanned"] += 1
+        by_size.setdefault((info.stat.st_dev, info.stat.st_size), []).append(info)
+    candidates = [info for group in by_size.values() if len(group) > 1 for info in group]
+
+    to_hash = []
+    for info in candidates:
+        cached = index.get(info.key)
+        if cached and cached[0] == info.stat.st_size and cached[1] == info.stat.st_mtime_ns:
+            info.digest = cached[2]
+            info.clone_of = cached[3] if len(cached) > 3 else None
+            result["cached"] += 1
+        else:
+            to_hash.append(info)
+
+    def hash_file(info):
+        try:
+            info.digest = file_digest(info.path)
+        except OSError as e:
+            debug_log(f"Dedupe: could not hash {info.path}: {e}")
+        return info
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for info in executor.map(hash_file, to_hash):
+            if info.digest:
+                result["hashed"] += 1
+
+    groups = {}
+    for info in candidates:
+        if info.digest:
+            groups.setdefault((info.stat.st_dev, info.digest, info.stat.st_mode & 0o7777), []).append(info)
+
+    reflink_devices = {}
+    new_index = {}
+    for (dev, digest, _), group in groups.items():
+        if dev not in reflink_devices:
+            reflink_devices[dev] = supports_reflink(os.path.dirname(group[0].path))
+        use_reflink = reflink_devices[dev]
+
+        # Keep the copy with most links, so existing hardlinks stay in place
+        group.sort(key=lambda info: -info.stat.st_nlink)
+        source = group[0]
+        new_index[source.key] = [source.stat.st_size, source.stat.st_mtime_ns, digest]
+
+        for info in group[1:]:
+            new_index[info.key] = [info.stat.st_size, info.stat.st_mtime_ns, digest]
+            if info.key == source.key:
+                continue
+            if use_reflink:
+                # Clones of the same source were already shared on an earlier run
+                if info.clone_of == source.key:
+                    new_index[info.key].append(source.key)
+                    continue
+            elif not _is_hardlink_safe(info.rel):
+                result["skipped"] += 1
+                continue
+
+            if not dry_run:
+                try:
+                    replace_with_link(source.path, info.path, use_reflink)
+                except OSError as e:
+                    debug_log(f"Dedupe: could not link {info.path}: {e}")
+                    continue
+                new_index.pop(info.key, None)
+                if use_reflink:
+                    st = os.stat(info.path)
+                    new_index[f"{st.st_dev}:{st.st_ino}"] = [st.st_size, st.st_mtime_ns, digest, source.key]
+            result["linked"] += 1
+            # A hardlinked file only frees its blocks once no other link remains
+            if use_reflink or info.stat.st_nlink == 1:
+                result["saved"] += info.stat.st_size
+
+    if not dry_run:
+        if not prune:
+            new_index = {**index, **new_index}
+        try:
+            _save_index(new_index)
+        except OSError as e:
+            debug_log(f"Dedupe: could not save index: {e}")
+    return result
+
+
+def run_dedupe(selectors=None, dry_run=False, workers=None):
+    prefixes, unmatched = match_prefixes(selectors or [], select_all=not selectors)
+    for selector in unmatched:
+        print(f"{Colors.WARNING}⚠ No prefix matches '{selector}'.{Colors.ENDC}")
+
+    idle = []
+    for prefix in prefixes:
+        if find_server(prefix):
+            print(f"{Colors.WARNING}⚠ Skipping {prefix.name}: wineserver is running.{Colors.ENDC}")
+        else:
+            idle.append(prefix)
+    if not idle:
+        print(f"{Colors.WARNING}⚠ No prefixes to deduplicate.{Colors.ENDC}")
+        return
+
+    print(f"{Colors.HEADER}➜ Deduplicating {len(idle)} prefixes{Colors.ENDC}" +
+          (f" {Colors.GRAY}(dry run){Colors.ENDC}" if dry_run else ""))
+    start = time.monotonic()
+    result = dedupe(idle, dry_run, workers or HASH_WORKERS, prune=not selectors)
+    elapsed = time.monotonic() - start
+
+    print(f"{Colors.GRAY}{result['scanned']} files scanned, {result['hashed']} hashed, "
+          f"{result['cached']} from index in {elapsed:.1f}s{Colors.ENDC}")
+    if result["skipped"]:
+        print(f"{Colors.GRAY}{result['skipped']} duplicates left alone (no reflink support, may be rewritten in place){Colors.ENDC}")
+    verb = "would be" if dry_run else "were"
+    print(f"{Colors.OKGREEN}✔ {result['linked']} files {verb} linked, {format_size(result['saved'])} reclaimed.{Colors.ENDC}")
@@ -1,40 +1,58 @@
-import shutil
 from .constants import Colors, PREFIXES_DIR
+from .wineserver import stop_server
+from .prefix_batch import list_prefixes, match_prefixes, parse_selection
+from .trash import move_to_trash, trigger_purge
 
-def delete_prefix():
+def _select_prefixes(prefixes):
+    print(f"\n{Colors.HEADER}Select Prefixes to Delete:{Colors.ENDC}")
+    for i, p in enumerate(prefixes):
+        print(f" {Colors.OKBLUE}[{i+1}]{Colors.ENDC} {p.name}")
+
+    while True:
+        sel = input(f"\n{Colors.OKGREEN}Select Prefixes (e.g. 1,3,5-7) [Enter to Cancel]: {Colors.ENDC}")
+        if not sel:
+            return []
+        try:
+            return [prefixes[i] for i in parse_selection(sel, len(prefixes))]
+        except ValueError as e:
+            print(f"{Colors.FAIL}✖ Invalid selection: {e}{Colors.ENDC}")
+
+def delete_prefix(selectors=None):
     if not PREFIXES_DIR.exists():
         print(f"{Colors.WARNING}⚠ No prefixes found.{Colors.ENDC}")
         return
 
-    prefixes = [p for p in PREFIXES_DIR.iterdir() if p.is_dir()]
-    if not prefixes:
-        print(f"{Colors.WARNING}⚠ No prefixes found.{Colors.ENDC}")
+    if selectors:
+        selected, unmatched = match_prefixes(selectors)
+        for selector in unmatched:
+            print(f"{Colors.WARNING}⚠ No prefix matches '{selector}'.{Colors.ENDC}")
+    else:
+        prefixes = list_prefixes()
+        if not prefixes:
+            print(f"{Colors.WARNING}⚠ No prefixes found.{Colors.ENDC}")
+            return
+        selected = _select_prefixes(prefixes)
+
+    if not selected:
+        print("Operation cancelled.")
         return
 
-    prefixes.sort(key=lambda x: x.name)
-    print(f"\n{Colors.HEADER}Select Prefix to Delete:{Colors.ENDC}")
-    for i, p in enumerate(prefixes):
-        print(f" {Colors.OKBLUE}[{i+1}]{Colors.ENDC} {p.name}")
+    names = ", ".join(p.name for p in selected)
+    confirm = input(f"{Colors.FAIL}⚠ {len(selected)} prefix(es) will be deleted: {names}. Are you sure? (Y/n): {Colors.ENDC}")
+    if confirm.lower() not in ["y", "yes"]:
+        print("Deletion cancelled.")
+        return
 
-    while True:
+    deleted = 0
+    for prefix in selected:
         try:
-            sel = input(f"\n{Colors.OKGREEN}Select Prefix (Number) [Enter to Cancel]: {Colors.ENDC}")
-            if not sel:
-                print("Operation cancelled.")
-                return
-            idx = int(sel) - 1
-            if 0 <= idx < len(prefixes):
-                selected = prefixes[idx]
-                confirm = input(f"{Colors.FAIL}⚠ '{selected.name}' prefix will be deleted. Are you sure? (Y/n): {Colors.ENDC}")
-                if confirm.lower() in ["y", "yes"]:
-                    try:
-                        shutil.rmtree(selected)
-                        print(f"{Colors.OKGREEN}✔ Prefix deleted.{Colors.ENDC}")
-                    except Exception as e:
-                        print(f"{Colors.FAIL}✖ Deletion failed: {e}{Colors.ENDC}")
-                else:
-                    print("Deletion cancelled.")
-                break
-            print(f"{Colors.FAIL}✖ Invalid selection.{Colors.ENDC}")
-        except ValueError:
-            print(f"{Colors.FAIL}✖ Please enter a number.{Colors.ENDC}")
\ No newline at end of file
+            stop_server(prefix)
+            move_to_trash(prefix)
+            deleted += 1
+            print(f"{Colors.OKGREEN}✔ Prefix deleted: {prefix.name}{Colors.ENDC}")
+        except Exception as e:
+            print(f"{Colors.FAIL}✖ Deletion of {prefix.name} failed: {e}{Colors.ENDC}")
+
+    if deleted:
+        # Files are removed in the background, see 'trash status'
+        trigger_purge()
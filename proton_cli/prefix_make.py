@@ -1,26 +1,27 @@
-import subprocess
+import shutil
 from pathlib import Path
 from .constants import Colors, PREFIXES_DIR
 from .config import load_config
-from .core import get_proton_env
+from .prefix_template import clone_template, initialize_prefix
+from .prefix_pool import claim_spare, trigger_refill
 
 def create_prefix(name):
     conf = load_config()
     proton_path = conf.get("proton_path")
     runtime_path = conf.get("runtime_path")
-    
+
     if not proton_path or not proton_path.exists():
         print(f"{Colors.FAIL}✖ Selected Proton version not found. Please use 'check' or 'pull-proton' command first.{Colors.ENDC}")
         return
 
     prefix_path = PREFIXES_DIR / name
-    
+
     if prefix_path.exists():
         print(f"{Colors.WARNING}⚠ A prefix named '{name}' already exists.{Colors.ENDC}")
         return
 
     try:
-        prefix_path.mkdir(parents=True, exist_ok=True)
+        PREFIXES_DIR.mkdir(parents=True, exist_ok=True)
     except Exception as e:
         print(f"{Colors.FAIL}✖ Could not create prefix directory: {e}{Colors.ENDC}")
         return
@@ -28,13 +29,33 @@ def create_prefix(name):
     print(f"{Colors.HEADER}➜ Creating Prefix: {Colors.OKGREEN}{name}{Colors.ENDC}")
     print(f"  Using Proton: {Colors.OKBLUE}{proton_path.name}{Colors.ENDC}")
     print(f"  Location: {Colors.GRAY}{prefix_path}{Colors.ENDC}")
-    
-    print(f"{Colors.OKBLUE}➜ Initializing Wine Prefix (this may take a while)...{Colors.ENDC}")
 
-    env = get_proton_env(prefix_path, runtime_path, proton_path)
+    # Take an already initialized spare from the pool
+    claimed = claim_spare(name)
+    trigger_refill()
+    if claimed:
+        print(f"{Colors.OKGREEN}✔ Prefix created from a pre-initialized spare.{Colors.ENDC}")
+        return
+
+    # Clone the initialized template of this Proton build
+    try:
+        elapsed = clone_template(proton_path, runtime_path, prefix_path)
+        print(f"{Colors.OKGREEN}✔ Prefix created from template in {elapsed:.2f}s.{Colors.ENDC}")
+        return
+    except Exception as e:
+        print(f"{Colors.WARNING}⚠ Could not clone prefix template: {e}{Colors.ENDC}")
+        shutil.rmtree(prefix_path, ignore_errors=True)
+
+    try:
+        prefix_path.mkdir(parents=True, exist_ok=True)
+    except Exception as e:
+        print(f"{Colors.FAIL}✖ Could not create prefix directory: {e}{Colors.ENDC}")
+        return
+
+    print(f"{Colors.OKBLUE}➜ Initializing Wine Prefix (this may take a while)...{Colors.ENDC}")
 
     try:
-        subprocess.run([str(proton_path / "proton"), "run", "wineboot"], env=env, check=True)
+        initialize_prefix(prefix_path, proton_path, runtime_path)
         print(f"{Colors.OKGREEN}✔ Prefix initialized successfully.{Colors.ENDC}")
     except Exception as e:
-        print(f"{Colors.FAIL}✖ Failed to initialize prefix: {e}{Colors.ENDC}")
\ No newline at end of file
+        print(f"{Colors.FAIL}✖ Failed to initialize prefix: {e}{Colors.ENDC}")
@@ -0,0 +1,127 @@
+import os
+import sys
+import uuid
+import fcntl
+import shutil
+import subprocess
+from .constants import Colors, POOL_DIR, PREFIXES_DIR
+from .config import load_config, get_setting
+from .core import debug_log
+from .prefix_template import template_key, clone_template
+
+
+def _pool_dir(proton_path):
+    return POOL_DIR / template_key(proton_path)
+
+
+def list_spares(proton_path):
+    pool = _pool_dir(proton_path)
+    if not pool.exists():
+        return []
+    return sorted(p for p in pool.iterdir() if p.is_dir() and p.name.startswith("spare-"))
+
+
+def claim_spare(name):
+    """
+    Moves a spare prefix of the active Proton version to PREFIXES_DIR/name.
+
+    :return: Path of the claimed prefix, or None if the pool is empty
+    """
+    proton_path = load_config().get("proton_path")
+    if not proton_path or not proton_path.exists():
+        return None
+
+    target = PREFIXES_DIR / name
+    PREFIXES_DIR.mkdir(parents=True, exist_ok=True)
+    for spare in list_spares(proton_path):
+        try:
+            # rename() is atomic, so concurrent claims never get the same spare
+            os.rename(spare, target)
+            return target
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            debug_log(f"Could not claim {spare.name}: {e}")
+            return None
+    return None
+
+
+def trigger_refill():
+    """Refills the pool in a detached background process."""
+    if get_setting("pool_size") <= 0 and not POOL_DIR.exists():
+        return
+    try:
+        subprocess.Popen(
+            [sys.executable, "-m", "proton_cli", "pool", "refill"],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+    except Exception as e:
+        debug_log(f"Could not start pool refill: {e}")
+
+
+def refill_pool(verbose=False):
+    """Creates spares until the pool holds pool_size prefixes for the active Proton version."""
+    conf = load_config()
+    proton_path = conf.get("proton_path")
+    runtime_path = conf.get("runtime_path")
+    if not proton_path or not proton_path.exists():
+        return
+
+    POOL_DIR.mkdir(parents=True, exist_ok=True)
+    lock_file = open(POOL_DIR / ".refill.lock", 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        # Another refill is already running
+        lock_file.close()
+        return
+
+    try:
+        pool = _pool_dir(proton_path)
+        pool.mkdir(exist_ok=True)
+
+        # Spares of other (or outdated) Proton builds can't be claimed anymore
+        for stale in POOL_DIR.iterdir():
+            if stale.is_dir() and stale != pool:
+                shutil.rmtree(stale, ignore_errors=True)
+        for leftover in pool.glob(".creating-*"):
+            shutil.rmtree(leftover, ignore_errors=True)
+
+        pool_size = get_setting("pool_size")
+        spares = list_spares(proton_path)
+        for extra in spares[pool_size:]:
+            shutil.rmtree(extra, ignore_errors=True)
+
+        for _ in range(pool_size - len(spares)):
+            spare_id = uuid.uuid4().hex[:12]
+            creating = pool / f".creating-{spare_id}"
+            try:
+                clone_template(proton_path, runtime_path, creating)
+                os.rename(creating, pool / f"spare-{spare_id}")
+                if verbose:
+                    print(f"{Colors.OKGREEN}✔ Spare prefix ready: spare-{spare_id}{Colors.ENDC}")
+            except Exception as e:
+                shutil.rmtree(creating, ignore_errors=True)
+                if verbose:
+                    print(f"{Colors.FAIL}✖ Could not create spare prefix: {e}{Colors.ENDC}")
+                break
+    finally:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+
+def run_pool(action):
+    if action == "refill":
+        refill_pool(verbose=sys.stdout.isatty())
+    elif action == "clear":
+        shutil.rmtree(POOL_DIR, ignore_errors=True)
+        print(f"{Colors.OKGREEN}✔ Prefix pool cleared.{Colors.ENDC}")
+    elif action == "status":
+        proton_path = load_config().get("proton_path")
+        pool_size = get_setting("pool_size")
+        spares = list_spares(proton_path) if proton_path and proton_path.exists() else []
+        print(f"{Colors.HEADER}Prefix Pool:{Colors.ENDC} {Colors.GRAY}{POOL_DIR}{Colors.ENDC}")
+        print(f"  Spares ready: {Colors.OKBLUE}{len(spares)}/{pool_size}{Colors.ENDC}")
+        if pool_size <= 0:
+            print(f"{Colors.GRAY}Enable with: proton-cli config pool_size <N>{Colors.ENDC}")
@@ -0,0 +1,104 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import subprocess
+from .constants import Colors, TEMPLATES_DIR
+from .core import get_proton_env, run_wineserver, debug_log
+from .fsutil import clone_tree
+
+
+def proton_stamp(proton_path):
+    """Identifies a Proton build. Changes whenever the build is replaced or updated."""
+    try:
+        return (proton_path / "version").read_text().strip()
+    except OSError:
+        st = (proton_path / "proton").stat()
+        return f"{st.st_mtime_ns}-{st.st_size}"
+
+
+def template_key(proton_path):
+    resolved = str(proton_path.resolve())
+    digest = hashlib.sha1(f"{resolved}\n{proton_stamp(proton_path)}".encode()).hexdigest()[:16]
+    return f"{proton_path.name}-{digest}"
+
+
+def template_path(proton_path):
+    return TEMPLATES_DIR / template_key(proton_path)
+
+
+def initialize_prefix(prefix_path, proton_path, runtime_path):
+    """Runs wineboot in prefix_path."""
+    env = get_proton_env(prefix_path, runtime_path, proton_path)
+    subprocess.run([str(proton_path / "proton"), "run", "wineboot"], env=env, check=True)
+    # Wait until wineserver has exited and written the registry to disk
+    run_wineserver(proton_path, prefix_path, env, "-w")
+
+
+def prune_templates(proton_path, keep):
+    """Removes templates built from older states of the same Proton install."""
+    resolved = str(proton_path.resolve())
+    for meta_file in TEMPLATES_DIR.glob("*.json"):
+        if meta_file.stem == keep.name:
+            continue
+        try:
+            with open(meta_file, 'r') as f:
+                meta = json.load(f)
+        except Exception:
+            continue
+        if meta.get("proton_path") == resolved:
+            debug_log(f"Removing outdated template: {meta_file.stem}")
+            shutil.rmtree(TEMPLATES_DIR / meta_file.stem, ignore_errors=True)
+            meta_file.unlink()
+
+
+def build_template(proton_path, runtime_path):
+    """Creates the initialized template prefix for a Proton build."""
+    target = template_path(proton_path)
+    TEMPLATES_DIR.mkdir(parents=True, exist_ok=True)
+    building = TEMPLATES_DIR / f".building-{target.name}-{os.getpid()}"
+    building.mkdir()
+
+    try:
+        initialize_prefix(building, proton_path, runtime_path)
+        os.rename(building, target)
+    except Exception:
+        shutil.rmtree(building, ignore_errors=True)
+        if target.exists():
+            # Another process finished the same template first
+            return target
+        raise
+
+    with open(TEMPLATES_DIR / f"{target.name}.json", 'w') as f:
+        json.dump({
+            "proton_path": str(proton_path.resolve()),
+            "stamp": proton_stamp(proton_path),
+            "created": int(time.time())
+        }, f, indent=4)
+
+    prune_templates(proton_path, target)
+    return target
+
+
+def get_template(proton_path, runtime_path):
+    """Returns the template for a Proton build, building it first if needed."""
+    target = template_path(proton_path)
+    if target.exists():
+        return target
+
+    print(f"{Colors.OKBLUE}➜ Building prefix template for {proton_path.name} (one time, this may take a while)...{Colors.ENDC}")
+    return build_template(proton_path, runtime_path)
+
+
+def clone_template(proton_path, runtime_path, prefix_path):
+    """
+    Creates prefix_path as a copy of the template prefix.
+
+    :return: Seconds spent cloning
+    """
+    template = get_template(proton_path, runtime_path)
+    start = time.monotonic()
+    counts = clone_tree(str(template), str(prefix_path))
+    debug_log(f"Template clone: {counts}")
+    return time.monotonic() - start
@@ -0,0 +1,349 @@
+import os
+import re
+import sys
+import json
+import ctypes
+import platform
+from pathlib import Path
+from .constants import Colors, BASE_DIR
+
+PROFILES_FILE = BASE_DIR / "profiles.json"
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+CGROUP_GROUP = "proton-cli"
+CPU_PERIOD = 100000
+
+# ioprio_set() from linux/ioprio.h
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_CLASSES = {"realtime": 1, "best-effort": 2, "idle": 3}
+SYS_IOPRIO_SET = {"x86_64": 251, "i386": 289, "i686": 289, "aarch64": 30, "armv7l": 314, "riscv64": 30, "ppc64le": 273}
+
+# Profile keys, in the order they are shown: name -> description
+PROFILE_KEYS = {
+    "cpus": "CPU affinity, e.g. 0-3,8",
+    "nice": "Nice value (-20 to 19)",
+    "ionice": "I/O class: idle, best-effort[:0-7] or realtime[:0-7]",
+    "cpu_max": "CPU time limit in percent of one CPU, e.g. 200%",
+    "memory_max": "Memory limit, e.g. 8G",
+}
+
+
+def parse_cpus(text):
+    """Parses a CPU list like '0-3,8' into sorted CPU numbers."""
+    cpus = set()
+    for part in str(text).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            start, end = int(start), int(end)
+            if start > end:
+                raise ValueError(f"Invalid CPU range: {part}")
+            cpus.update(range(start, end + 1))
+        else:
+            cpus.add(int(part))
+    if not cpus or min(cpus) < 0:
+        raise ValueError(f"Invalid CPU list: {text}")
+    return sorted(cpus)
+
+
+def parse_ionice(text):
+    """:return: Tuple of (ioprio class, level)"""
+    name, _, level = str(text).partition(":")
+    if name not in IOPRIO_CLASSES:
+        raise ValueError(f"Unknown I/O class: {name}")
+    level = int(level) if level else (0 if name == "idle" else 4)
+    if not 0 <= level <= 7:
+        raise ValueError(f"I/O priority level must be 0-7: {level}")
+    return IOPRIO_CLASSES[name], level
+
+
+def parse_cpu_max(text):
+    """Returns the cpu.max line for a limit like '150%'."""
+    text = str(text).strip()
+    if text == "max":
+        return "max"
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)%", text)
+    if not match or float(match.group(1)) <= 0:
+        raise ValueError(f"Invalid CPU limit: {text} (use e.g. 200%)")
+    return f"{max(1000, round(float(match.group(1)) * CPU_PERIOD / 100))} {CPU_PERIOD}"
+
+
+def parse_size(text):
+    """Returns the memory.max value for a size like '8G' or '512M'."""
+    text = str(text).strip()
+    if text == "max":
+        return "max"
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?", text, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid size: {text}")
+    unit = match.group(2).upper()
+    factor = 1024 ** ("KMGT".find(unit) + 1) if unit else 1
+    return str(int(float(match.group(1)) * factor))
+
+
+def validate(profile):
+    """Raises ValueError for unknown keys or values that can't be applied."""
+    for key, value in profile.items():
+        if key not in PROFILE_KEYS:
+            raise ValueError(f"Unknown profile setting: {key}")
+        if key == "cpus":
+            parse_cpus(value)
+        elif key == "nice":
+            if not -20 <= int(value) <= 19:
+                raise ValueError(f"Nice value must be -20 to 19: {value}")
+        elif key == "ionice":
+            parse_ionice(value)
+        elif key == "cpu_max":
+            parse_cpu_max(value)
+        elif key == "memory_max":
+            parse_size(value)
+
+
+def _load():
+    try:
+        with open(PROFILES_FILE, 'r') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data.setdefault("profiles", {})
+            data.setdefault("exes", {})
+            return data
+    except Exception:
+        pass
+    return {"profiles": {}, "exes": {}}
+
+
+def _save(data):
+    BASE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_file = PROFILES_FILE.with_name(PROFILES_FILE.name + ".tmp")
+    with open(tmp_file, 'w') as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_file, PROFILES_FILE)
+
+
+def get_profile(name):
+    return _load()["profiles"].get(name)
+
+
+def profile_for(exe_path, name=None):
+    """Returns the profile name to launch exe_path with: name, else the one assigned to the exe."""
+    if name:
+        return name
+    return _load()["exes"].get(str(Path(exe_path).resolve()))
+
+
+def launch_wrapper(name):
+    """Returns the wrapper command that applies a profile and execs the rest of the command line."""
+    if not name:
+        return []
+    return [sys.executable, "-m", "proton_cli.profiles", name, "--"]
+
+
+def set_ionice(io_class, level):
+    nr = SYS_IOPRIO_SET.get(platform.machine())
+    if nr is None:
+        raise OSError(f"ioprio_set is not known on {platform.machine()}")
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.syscall(nr, IOPRIO_WHO_PROCESS, 0, (io_class << IOPRIO_CLASS_SHIFT) | level) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+
+def _cgroup_base():
+    """
+    Returns the topmost cgroup v2 directory above this process that we may
+    manage, e.g. the user@<uid>.service subtree systemd delegates to users.
+    """
+    if not (CGROUP_ROOT / "cgroup.controllers").exists():
+        return None
+    try:
+        with open("/proc/self/cgroup", 'r') as f:
+            own = next((line[3:].strip() for line in f if line.startswith("0::")), None)
+    except OSError:
+        return None
+    if own is None:
+        return None
+
+    base = None
+    candidate = CGROUP_ROOT / own.lstrip("/")
+    while os.access(candidate, os.W_OK) and os.access(candidate / "cgroup.procs", os.W_OK):
+        base = candidate
+        if candidate == CGROUP_ROOT:
+            break
+        candidate = candidate.parent
+    return base
+
+
+def _enable_controllers(cgroup, controllers):
+    control = cgroup / "cgroup.subtree_control"
+    missing = set(controllers) - set(control.read_text().split())
+    if missing:
+        control.write_text(" ".join(f"+{c}" for c in sorted(missing)))
+
+
+def enter_cgroup(name, limits):
+    """
+    Moves this process into a new cgroup with the given limits, e.g.
+    {"memory.max": "8589934592"}. Everything it starts stays inside.
+
+    :return: Path of the cgroup
+    :raises OSError: Without a cgroup v2 subtree we are allowed to manage
+    """
+    base = _cgroup_base()
+    if base is None:
+        raise OSError("no delegated cgroup v2 subtree")
+    controllers = {key.split(".")[0] for key in limits}
+    group = base / CGROUP_GROUP
+    group.mkdir(exist_ok=True)
+    _enable_controllers(base, controllers)
+    _enable_controllers(group, controllers)
+
+    # Cgroups of finished launches; rmdir fails on those still in use
+    for old in group.iterdir():
+        if old.is_dir():
+            try:
+                old.rmdir()
+            except OSError:
+                pass
+
+    safe_name = "".join(c if c.isalnum() or c in ('-', '_') else '_' for c in name)
+    cgroup = group / f"{safe_name}-{os.getpid()}"
+    cgroup.mkdir()
+    for key, value in limits.items():
+        (cgroup / key).write_text(value)
+    (cgroup / "cgroup.procs").write_text(str(os.getpid()))
+    return cgroup
+
+
+def apply_profile(name, profile, env):
+    """
+    Applies a profile to this process, so the command it execs next and
+    everything that starts inherits it. Settings that can't be applied are
+    reported and skipped rather than blocking the launch.
+    """
+    def warn(what, error):
+        print(f"{Colors.WARNING}⚠ Launch profile '{name}': {what} not applied ({error}){Colors.ENDC}", file=sys.stderr)
+
+    if "cpus" in profile:
+        try:
+            cpus = [c for c in parse_cpus(profile["cpus"]) if c in os.sched_getaffinity(0)]
+            if not cpus:
+                raise ValueError(f"none of CPUs {profile['cpus']} are available")
+            os.sched_setaffinity(0, cpus)
+            # Wine reports only these CPUs to the game
+            env.setdefault("WINE_CPU_TOPOLOGY", f"{len(cpus)}:{','.join(map(str, cpus))}")
+        except (OSError, ValueError) as e:
+            warn("CPU affinity", e)
+
+    if "nice" in profile:
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, int(profile["nice"]))
+        except (OSError, ValueError) as e:
+            warn("nice value", e)
+
+    if "ionice" in profile:
+        try:
+            set_ionice(*parse_ionice(profile["ionice"]))
+        except (OSError, ValueError) as e:
+            warn("I/O priority", e)
+
+    limits = {}
+    try:
+        if "cpu_max" in profile:
+            limits["cpu.max"] = parse_cpu_max(profile["cpu_max"])
+        if "memory_max" in profile:
+            limits["memory.max"] = parse_size(profile["memory_max"])
+        if limits:
+            enter_cgroup(name, limits)
+    except (OSError, ValueError) as e:
+        warn("CPU/memory limit", e)
+
+
+def _exec_with_profile(argv):
+    """Entry point of launch_wrapper(): <profile> -- <command...>"""
+    if len(argv) < 3 or argv[1] != "--":
+        print(f"{Colors.FAIL}✖ Usage: python -m proton_cli.profiles <profile> -- <command>{Colors.ENDC}", file=sys.stderr)
+        sys.exit(2)
+    name, cmd = argv[0], argv[2:]
+    profile = get_profile(name)
+    if profile is None:
+        print(f"{Colors.WARNING}⚠ Launch profile '{name}' not found, launching without it.{Colors.ENDC}", file=sys.stderr)
+    else:
+        apply_profile(name, profile, os.environ)
+    try:
+        os.execvp(cmd[0], cmd)
+    except OSError as e:
+        print(f"{Colors.FAIL}✖ Execution error: {e}{Colors.ENDC}", file=sys.stderr)
+        sys.exit(127)
+
+
+def _describe(profile):
+    return "  ".join(f"{key}={profile[key]}" for key in PROFILE_KEYS if key in profile) or "(no settings)"
+
+
+def run_profiles(action, names, settings=None):
+    data = _load()
+
+    if action == "list":
+        if not data["profiles"]:
+            print(f"{Colors.WARNING}⚠ No launch profiles yet.{Colors.ENDC} {Colors.GRAY}Create one with 'profile set <name> --cpus 0-3'.{Colors.ENDC}")
+            return
+        for name, profile in sorted(data["profiles"].items()):
+            print(f"{Colors.OKGREEN}{name}{Colors.ENDC}  {_describe(profile)}")
+            for exe, assigned in sorted(data["exes"].items()):
+                if assigned == name:
+                    print(f"  {Colors.GRAY}{exe}{Colors.ENDC}")
+        unknown = sorted(exe for exe, name in data["exes"].items() if name not in data["profiles"])
+        for exe in unknown:
+            print(f"{Colors.WARNING}⚠ {exe} uses the missing profile '{data['exes'][exe]}'.{Colors.ENDC}")
+
+    elif action == "set":
+        if len(names) != 1:
+            print(f"{Colors.FAIL}✖ Usage: profile set <name> [--cpus ...] [--nice ...] [--ionice ...] [--cpu-max ...] [--memory-max ...]{Colors.ENDC}")
+            return
+        profile = {key: value for key, value in (settings or {}).items() if value is not None}
+        try:
+            validate(profile)
+        except ValueError as e:
+            print(f"{Colors.FAIL}✖ {e}{Colors.ENDC}")
+            return
+        data["profiles"][names[0]] = profile
+        _save(data)
+        print(f"{Colors.OKGREEN}✔ Profile '{names[0]}' saved:{Colors.ENDC} {_describe(profile)}")
+
+    elif action == "delete":
+        for name in names:
+            if data["profiles"].pop(name, None) is None:
+                print(f"{Colors.FAIL}✖ Profile '{name}' not found.{Colors.ENDC}")
+                continue
+            data["exes"] = {exe: n for exe, n in data["exes"].items() if n != name}
+            print(f"{Colors.OKGREEN}✔ Profile '{name}' deleted.{Colors.ENDC}")
+        _save(data)
+
+    elif action == "assign":
+        if len(names) < 2:
+            print(f"{Colors.FAIL}✖ Usage: profile assign <name> <exe...>{Colors.ENDC}")
+            return
+        name = names[0]
+        if name not in data["profiles"]:
+            print(f"{Colors.FAIL}✖ Profile '{name}' not found.{Colors.ENDC}")
+            return
+        for exe in names[1:]:
+            exe_file = Path(exe).resolve()
+            data["exes"][str(exe_file)] = name
+            print(f"{Colors.OKGREEN}✔ {exe_file.name} launches with profile '{name}'.{Colors.ENDC}")
+        _save(data)
+
+    elif action == "unassign":
+        for exe in names:
+            exe_file = Path(exe).resolve()
+            if data["exes"].pop(str(exe_file), None) is None:
+                print(f"{Colors.WARNING}⚠ {exe_file.name} has no profile.{Colors.ENDC}")
+            else:
+                print(f"{Colors.OKGREEN}✔ {exe_file.name} launches without a profile.{Colors.ENDC}")
+        _save(data)
+
+
+if __name__ == "__main__":
+    _exec_with_profile(sys.argv[1:])
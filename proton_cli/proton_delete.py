@@ -1,8 +1,9 @@
-import shutil
-import os
 from pathlib import Path
-from .constants import Colors, SEARCH_PATHS
+from .constants import Colors
 from .config import load_config, save_config
+from .discovery import find_protons
+from .prefix_batch import parse_selection
+from .trash import move_to_trash, trigger_purge
 
 def delete_proton():
     print(f"{Colors.HEADER}➜ Scanning for Proton Versions to Delete...{Colors.ENDC}")
@@ -10,21 +11,11 @@ def delete_proton():
     found_protons = []
     seen_paths = set()
 
-    for path in SEARCH_PATHS:
-        if not path.exists():
-            continue
-            
-        try:
-            for item in path.iterdir():
-                if item.is_dir():
-                    proton_exec = item / "proton"
-                    
-                    # Check if it's a valid proton directory and not already added
-                    if proton_exec.exists() and item.resolve() not in seen_paths:
-                        found_protons.append(item)
-                        seen_paths.add(item.resolve())
-        except PermissionError:
-            continue
+    for item in find_protons():
+        # Skip versions reachable through more than one search path
+        if item.resolve() not in seen_paths:
+            found_protons.append(item)
+            seen_paths.add(item.resolve())
 
     if not found_protons:
         print(f"{Colors.WARNING}⚠ No Proton versions found in search directories.{Colors.ENDC}")
@@ -33,42 +24,46 @@ def delete_proton():
     # Sort by name
     found_protons.sort(key=lambda x: x.name)
 
-    print(f"\n{Colors.HEADER}Select Proton Version to Delete:{Colors.ENDC}")
+    print(f"\n{Colors.HEADER}Select Proton Versions to Delete:{Colors.ENDC}")
     for i, p in enumerate(found_protons):
         print(f" {Colors.OKBLUE}[{i+1}]{Colors.ENDC} {p.name} {Colors.GRAY}({p.parent}){Colors.ENDC}")
 
     while True:
+        sel = input(f"\n{Colors.OKGREEN}Select Versions (e.g. 1,3,5-7) [Enter to Cancel]: {Colors.ENDC}")
+        if not sel:
+            print("Operation cancelled.")
+            return
+        try:
+            selected = [found_protons[i] for i in parse_selection(sel, len(found_protons))]
+            break
+        except ValueError as e:
+            print(f"{Colors.FAIL}✖ Invalid selection: {e}{Colors.ENDC}")
+
+    listing = "\n".join(f"  {p.name} {Colors.GRAY}({p.parent}){Colors.FAIL}" for p in selected)
+    confirm = input(f"{Colors.FAIL}⚠ These versions will be PERMANENTLY deleted:\n{listing}\nAre you sure? (Y/n): {Colors.ENDC}")
+    if confirm.lower() not in ["y", "yes"]:
+        print("Deletion cancelled.")
+        return
+
+    conf = load_config()
+    current_path = conf.get("proton_path")
+    deleted = 0
+    for version in selected:
         try:
-            sel = input(f"\n{Colors.OKGREEN}Select Version (Number) [Enter to Cancel]: {Colors.ENDC}")
-            if not sel:
-                print("Operation cancelled.")
-                return
-            
-            idx = int(sel) - 1
-            if 0 <= idx < len(found_protons):
-                selected = found_protons[idx]
-                
-                confirm = input(f"{Colors.FAIL}⚠ '{selected.name}' at '{selected.parent}' will be PERMANENTLY deleted.\nAre you sure? (Y/n): {Colors.ENDC}")
-                if confirm.lower() in ["y", "yes"]:
-                    try:
-                        print(f"{Colors.GRAY}Deleting...{Colors.ENDC}")
-                        shutil.rmtree(selected)
-                        print(f"{Colors.OKGREEN}✔ Version deleted.{Colors.ENDC}")
-                        
-                        # Check configuration
-                        conf = load_config()
-                        current_path = conf.get("proton_path")
-                        if current_path and Path(current_path).resolve() == selected.resolve():
-                            print(f"{Colors.WARNING}⚠ Deleted version was set as default. Clearing configuration...{Colors.ENDC}")
-                            save_config(None, conf.get("runtime_path"))
-                            
-                    except PermissionError:
-                        print(f"{Colors.FAIL}✖ Permission denied. Try running with sudo.{Colors.ENDC}")
-                    except Exception as e:
-                        print(f"{Colors.FAIL}✖ Deletion failed: {e}{Colors.ENDC}")
-                else:
-                    print("Deletion cancelled.")
-                break
-            print(f"{Colors.FAIL}✖ Invalid selection.{Colors.ENDC}")
-        except ValueError:
-            print(f"{Colors.FAIL}✖ Please enter a number.{Colors.ENDC}")
\ No newline at end of file
+            is_default = current_path and Path(current_path).resolve() == version.resolve()
+            move_to_trash(version)
+            deleted += 1
+            print(f"{Colors.OKGREEN}✔ Version deleted: {version.name}{Colors.ENDC}")
+
+            # Check configuration
+            if is_default:
+                print(f"{Colors.WARNING}⚠ Deleted version was set as default. Clearing configuration...{Colors.ENDC}")
+                save_config(None, conf.get("runtime_path"))
+
+        except PermissionError:
+            print(f"{Colors.FAIL}✖ Permission denied for {version.name}. Try running with sudo.{Colors.ENDC}")
+        except Exception as e:
+            print(f"{Colors.FAIL}✖ Deletion of {version.name} failed: {e}{Colors.ENDC}")
+
+    if deleted:
+        trigger_purge()
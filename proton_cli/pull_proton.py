@@ -1,76 +1,96 @@
 import os
-import sys
-import json
-import urllib.request
-import tarfile
-from .constants import Colors, VERSIONS_DIR, GE_PROTON_API_URL
+from .constants import Colors, VERSIONS_DIR, GE_PROTON_API_URL, GE_PROTON_RELEASES_URL
+from .http_cache import fetch_json, offline
+from .downloader import download_file
+from .extract import stream_url, extract_archive
+from .store import ObjectStore, ingest_version
+from .verify import release_checksum, record_verified, find_verified, warn_unverified
 
-def print_progress_bar(action, percent):
-    if percent > 100: percent = 100
-    bar_length = 40
-    filled_length = int(bar_length * percent // 100)
-    bar = '=' * filled_length + '-' * (bar_length - filled_length)
-    sys.stdout.write(f'\r{Colors.OKBLUE}{action}:{Colors.ENDC} [{Colors.OKGREEN}{bar}{Colors.ENDC}] {percent}%')
-    sys.stdout.flush()
+def _installed(tag_name):
+    if VERSIONS_DIR.exists():
+        for item in VERSIONS_DIR.iterdir():
+            if item.is_dir() and item.name == tag_name:
+                return item
+    return None
+
+def list_releases():
+    try:
+        releases = fetch_json(f"{GE_PROTON_RELEASES_URL}?per_page=30")
+    except Exception as e:
+        print(f"{Colors.FAIL}✖ Could not fetch releases: {e}{Colors.ENDC}")
+        return
 
-def download_progress_hook(count, block_size, total_size):
-    if total_size > 0:
-        percent = int(count * block_size * 100 / total_size)
-        print_progress_bar("Downloading", percent)
+    print(f"{Colors.HEADER}{'Tag':<20} {'Published':<12} Status{Colors.ENDC}")
+    for release in releases:
+        tag_name = release["tag_name"]
+        status = f"{Colors.OKGREEN}installed{Colors.ENDC}" if _installed(tag_name) else ""
+        print(f"{tag_name:<20} {Colors.GRAY}{release.get('published_at', '')[:10]:<12}{Colors.ENDC} {status}")
 
-def pull_proton():
+def pull_proton(stream=True, tag=None):
     print(f"{Colors.HEADER}➜ Starting GE-Proton Download...{Colors.ENDC}")
     
     try:
-        download_progress_hook.last_percent = -1
-        req = urllib.request.Request(GE_PROTON_API_URL, headers={'User-Agent': 'proton-cli'})
-        with urllib.request.urlopen(req) as response:
-            data = json.loads(response.read().decode())
+        if tag:
+            data = fetch_json(f"{GE_PROTON_RELEASES_URL}/tags/{tag}")
+        else:
+            data = fetch_json(GE_PROTON_API_URL)
             
         tag_name = data["tag_name"]
-        print(f"Latest version: {Colors.OKGREEN}{tag_name}{Colors.ENDC}")
+        print(f"{'Selected' if tag else 'Latest'} version: {Colors.OKGREEN}{tag_name}{Colors.ENDC}")
         
-        if VERSIONS_DIR.exists():
-            for item in VERSIONS_DIR.iterdir():
-                if item.is_dir() and tag_name in item.name:
-                    print(f"{Colors.OKBLUE}✔ Latest GE-Proton version ({tag_name}) is already installed.{Colors.ENDC}")
-                    return item
+        existing = _installed(tag_name)
+        if existing:
+            print(f"{Colors.OKBLUE}✔ GE-Proton version {tag_name} is already installed.{Colors.ENDC}")
+            return existing
+        if offline():
+            print(f"{Colors.FAIL}✖ {tag_name} is not installed and can't be downloaded in offline mode.{Colors.ENDC}")
+            return None
         
         download_url = None
+        asset_name = None
         for asset in data["assets"]:
             if asset["name"].endswith(".tar.gz"):
                 download_url = asset["browser_download_url"]
+                asset_name = asset["name"]
                 break
         
         if not download_url:
             print(f"{Colors.FAIL}✖ Download link not found.{Colors.ENDC}")
             return None
 
+        checksum = release_checksum(data, asset_name)
+        if not checksum:
+            warn_unverified(asset_name)
+
         VERSIONS_DIR.mkdir(parents=True, exist_ok=True)
-        tar_path = VERSIONS_DIR / f"{tag_name}.tar.gz"
+        store = ObjectStore()
 
-        print(f"Downloading from GitHub...")
-        urllib.request.urlretrieve(download_url, tar_path, reporthook=download_progress_hook)
-        print()
-        
-        print(f"{Colors.OKBLUE}Extracting archive...{Colors.ENDC}")
-        with tarfile.open(tar_path, "r:gz") as tar:
-            members = tar.getmembers()
-            total_files = len(members)
-            for i, member in enumerate(members):
-                if member.name.startswith("/") or ".." in member.name:
-                    continue
-                
-                tar.extract(member, path=VERSIONS_DIR)
-                percent = int((i + 1) * 100 / total_files)
-                print_progress_bar("Extracting", percent)
-        print()
-            
-        os.remove(tar_path)
+        if stream:
+            print(f"Downloading from GitHub...")
+            stream_url(download_url, VERSIONS_DIR, store=store, checksum=checksum)
+        else:
+            tar_path = VERSIONS_DIR / f"{tag_name}.tar.gz"
+
+            # Left behind by an earlier attempt that failed after the download
+            if checksum and find_verified(checksum) == str(tar_path):
+                print(f"{Colors.GRAY}Using verified archive from an earlier download.{Colors.ENDC}")
+            else:
+                print(f"Downloading from GitHub...")
+                download_file(download_url, tar_path, checksum=checksum)
+                if checksum:
+                    record_verified(checksum, download_url, tar_path)
+
+            print(f"{Colors.OKBLUE}Extracting archive...{Colors.ENDC}")
+            extract_archive(tar_path, VERSIONS_DIR, store=store)
+            os.remove(tar_path)
         
         for item in VERSIONS_DIR.iterdir():
-            if item.is_dir() and tag_name in item.name:
-                print(f"{Colors.OKGREEN}✔ Installation complete:{Colors.ENDC} {item.name}")
+            if item.is_dir() and item.name == tag_name:
+                print(f"{Colors.OKGREEN}✔ Installation complete:{Colors.ENDC} {item.name}" +
+                      (f" {Colors.GRAY}({checksum.algorithm} verified){Colors.ENDC}" if checksum else ""))
+                if checksum:
+                    record_verified(checksum, download_url, item)
+                ingest_version(item)
                 return item
                 
     except Exception as e:
@@ -1,36 +1,34 @@
 import os
-import sys
-import shutil
 import urllib.request
-import tarfile
 from .constants import Colors, RUNTIMES_DIR
+from .downloader import download_file, format_size
+from .extract import stream_url, extract_archive
+from .runtime_manifest import load_manifest, build_manifest, RuntimeLinker
+from .verify import manifest_checksum, record_verified, find_verified, warn_unverified
 
 RUNTIME_URL = "https://repo.steampowered.com/steamrt-images-sniper/snapshots/latest-public-stable/SteamLinuxRuntime_sniper.tar.xz"
+# Published next to every runtime snapshot
+RUNTIME_SUMS_URL = RUNTIME_URL.rsplit("/", 1)[0] + "/SHA256SUMS"
 META_FILE = RUNTIMES_DIR / "sniper_version.txt"
 RUNTIME_PATH = RUNTIMES_DIR / "SteamLinuxRuntime_sniper"
 
-def print_progress_bar(action, percent):
-    if percent > 100: percent = 100
-    bar_length = 40
-    filled_length = int(bar_length * percent // 100)
-    bar = '=' * filled_length + '-' * (bar_length - filled_length)
-    sys.stdout.write(f'\r{Colors.OKBLUE}{action}:{Colors.ENDC} [{Colors.OKGREEN}{bar}{Colors.ENDC}] {percent}%')
-    sys.stdout.flush()
-
-def download_progress_hook(count, block_size, total_size):
-    if total_size > 0:
-        percent = int(count * block_size * 100 / total_size)
-        print_progress_bar("Downloading", percent)
-
-def pull_runtime():
+def pull_runtime(stream=True):
     print(f"{Colors.HEADER}➜ Checking Steam Linux Runtime (Sniper)...{Colors.ENDC}")
     
     try:
         req = urllib.request.Request(RUNTIME_URL, method='HEAD', headers={'User-Agent': 'proton-cli'})
         with urllib.request.urlopen(req) as response:
             remote_last_modified = response.headers.get('Last-Modified')
+
+        checksum = manifest_checksum(RUNTIME_SUMS_URL, RUNTIME_URL.rsplit("/", 1)[-1])
+        if not checksum:
+            warn_unverified(RUNTIME_URL.rsplit("/", 1)[-1])
             
         if RUNTIME_PATH.exists():
+            if checksum and find_verified(checksum) == str(RUNTIME_PATH):
+                print(f"{Colors.OKGREEN}✔ You already have the latest runtime.{Colors.ENDC} {Colors.GRAY}(sha256 verified){Colors.ENDC}")
+                return
+
             local_last_modified = None
             if META_FILE.exists():
                 with open(META_FILE, 'r') as f:
@@ -45,33 +43,47 @@ def pull_runtime():
             if choice.lower() not in ["y", "yes", ""]:
                 return
             
-            print(f"{Colors.GRAY}Removing old runtime...{Colors.ENDC}")
-            shutil.rmtree(RUNTIME_PATH)
-
         RUNTIMES_DIR.mkdir(parents=True, exist_ok=True)
-        tar_path = RUNTIMES_DIR / "runtime.tar.xz"
-        
-        print(f"Downloading from Steam Repo...")
-        urllib.request.urlretrieve(RUNTIME_URL, tar_path, reporthook=download_progress_hook)
-        print()
-        
-        print(f"{Colors.OKBLUE}Extracting archive...{Colors.ENDC}")
-        with tarfile.open(tar_path, "r:xz") as tar:
-            members = tar.getmembers()
-            total_files = len(members)
-            for i, member in enumerate(members):
-                if member.name.startswith("/") or ".." in member.name:
-                    continue
-                tar.extract(member, path=RUNTIMES_DIR)
-                percent = int((i + 1) * 100 / total_files)
-                print_progress_bar("Extracting", percent)
-        print()
-            
-        os.remove(tar_path)
+
+        # The xz archive is compressed as a whole, so it can't be fetched per
+        # file. Unchanged files are linked from the installed runtime instead.
+        manifest = {}
+        if RUNTIME_PATH.exists():
+            manifest = load_manifest(RUNTIME_PATH)
+            if not manifest:
+                print(f"{Colors.GRAY}Indexing installed runtime...{Colors.ENDC}")
+                manifest = build_manifest(RUNTIME_PATH)
+        linker = RuntimeLinker(RUNTIME_PATH, manifest)
+
+        # The old runtime is only replaced once the new one is fully unpacked
+        if stream:
+            print(f"Downloading from Steam Repo...")
+            stream_url(RUNTIME_URL, RUNTIMES_DIR, checksum=checksum, store=linker)
+        else:
+            tar_path = RUNTIMES_DIR / "runtime.tar.xz"
+
+            if checksum and find_verified(checksum) == str(tar_path):
+                print(f"{Colors.GRAY}Using verified archive from an earlier download.{Colors.ENDC}")
+            else:
+                print(f"Downloading from Steam Repo...")
+                download_file(RUNTIME_URL, tar_path, checksum=checksum)
+                if checksum:
+                    record_verified(checksum, RUNTIME_URL, tar_path)
+
+            print(f"{Colors.OKBLUE}Extracting archive...{Colors.ENDC}")
+            extract_archive(tar_path, RUNTIMES_DIR, store=linker)
+            os.remove(tar_path)
+
+        # Large files are not seen by the linker and get hashed here
+        build_manifest(RUNTIME_PATH, known=linker.known)
+        if linker.linked:
+            print(f"{Colors.GRAY}{linker.linked} unchanged files ({format_size(linker.linked_bytes)}) reused from the installed runtime.{Colors.ENDC}")
         
         if remote_last_modified:
             with open(META_FILE, 'w') as f:
                 f.write(remote_last_modified)
+        if checksum:
+            record_verified(checksum, RUNTIME_URL, RUNTIME_PATH)
                 
         print(f"{Colors.OKGREEN}✔ Runtime installed successfully.{Colors.ENDC}")
         print(f"{Colors.GRAY}Run 'proton-cli check' to apply changes.{Colors.ENDC}")
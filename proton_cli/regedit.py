@@ -1,30 +1,91 @@
+import time
+import tempfile
 import subprocess
 from pathlib import Path
-from .constants import Colors, PREFIXES_DIR
+from .constants import Colors, PREFIXES_DIR, BASE_DIR
 from .config import load_config
-from .core import get_proton_env, create_proton_command
+from .core import get_proton_env, create_proton_command, run_proton
+from .registry_hive import RegistryError, can_edit_offline, apply_reg_files, reg_file_header, merge_reg_files
+from .prefix_batch import match_prefixes, run_per_prefix
 
-def run_regedit(reg_file_path):
+def _import_with_wine(prefix, reg_files, proton_path, runtime_path, **run_kwargs):
+    """Imports the files with as few regedit runs as possible, one per run of same-format files."""
+    groups = []
+    for reg_file in reg_files:
+        header = reg_file_header(reg_file)
+        if groups and groups[-1][0] == header:
+            groups[-1][1].append(reg_file)
+        else:
+            groups.append((header, [reg_file]))
+
+    env = get_proton_env(prefix, runtime_path, proton_path)
+    BASE_DIR.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix=".regedit-", dir=BASE_DIR) as tmp:
+        for i, (_, files) in enumerate(groups):
+            reg_file = files[0] if len(files) == 1 else merge_reg_files(files, Path(tmp) / f"merged-{i}.reg")
+            cmd = create_proton_command(proton_path, runtime_path, ["run", "regedit", str(reg_file)])
+            result = run_proton(cmd, env, prefix, proton_path, **run_kwargs)
+            if result.returncode != 0:
+                raise RuntimeError(f"regedit exited with status {result.returncode}")
+    return len(groups)
+
+def import_reg_files(prefix, reg_files, proton_path, runtime_path, quiet=False):
+    """
+    Imports .reg files into a prefix, offline when no wineserver is running.
+
+    :return: Short description of what was done
+    """
+    # Without a running wineserver the registry files can be edited directly
+    if can_edit_offline(prefix):
+        try:
+            start = time.monotonic()
+            count = apply_reg_files(prefix, reg_files)
+            return f"{count} registry changes applied in {(time.monotonic() - start) * 1000:.0f}ms"
+        except (RegistryError, OSError, ValueError) as e:
+            if not quiet:
+                print(f"{Colors.GRAY}Offline import not possible ({e}), using Wine...{Colors.ENDC}")
+
+    if quiet:
+        runs = _import_with_wine(prefix, reg_files, proton_path, runtime_path,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    else:
+        runs = _import_with_wine(prefix, reg_files, proton_path, runtime_path)
+    return f"{len(reg_files)} files imported with {runs} regedit run{'s' if runs > 1 else ''}"
+
+def run_regedit(reg_file_paths, selectors=None, select_all=False, workers=None):
     conf = load_config()
     proton_path = conf.get("proton_path")
     runtime_path = conf.get("runtime_path")
     if not proton_path or not proton_path.exists():
         print(f"{Colors.FAIL}✖ Proton not found. Please use 'check' command first.{Colors.ENDC}")
-        return
+        return 1
 
-    reg_file = Path(reg_file_path).resolve()
-    if not reg_file.exists():
-        print(f"{Colors.FAIL}✖ .reg file not found: {reg_file_path}{Colors.ENDC}")
-        return
+    reg_files = []
+    for reg_file_path in reg_file_paths:
+        reg_file = Path(reg_file_path).resolve()
+        if not reg_file.exists():
+            print(f"{Colors.FAIL}✖ .reg file not found: {reg_file_path}{Colors.ENDC}")
+            return 1
+        reg_files.append(reg_file)
 
     if not PREFIXES_DIR.exists():
         print(f"{Colors.WARNING}⚠ No prefixes found.{Colors.ENDC}")
-        return
+        return 1
+
+    if selectors or select_all:
+        prefixes, unmatched = match_prefixes(selectors or [], select_all)
+        for selector in unmatched:
+            print(f"{Colors.WARNING}⚠ No prefix matches '{selector}'.{Colors.ENDC}")
+        if not prefixes:
+            print(f"{Colors.WARNING}⚠ No prefixes found.{Colors.ENDC}")
+            return 1
+        return run_per_prefix(prefixes, f"Importing {len(reg_files)} registry files", lambda prefix:
+                              import_reg_files(prefix, reg_files, proton_path, runtime_path, quiet=True), workers)
 
     prefixes = [p for p in PREFIXES_DIR.iterdir() if p.is_dir()]
     if not prefixes:
         print(f"{Colors.WARNING}⚠ No prefixes found.{Colors.ENDC}")
-        return
+        return 1
 
     prefixes.sort(key=lambda x: x.name)
     print(f"\n{Colors.HEADER}Select Prefix to Apply Registry File:{Colors.ENDC}")
@@ -44,6 +105,10 @@ def run_regedit(reg_file_path):
             print(f"{Colors.FAIL}✖ Please enter a number.{Colors.ENDC}")
 
     print(f"{Colors.HEADER}➜ Applying Registry File{Colors.ENDC}")
-    cmd = create_proton_command(proton_path, runtime_path, ["run", "regedit", str(reg_file)])
-    env = get_proton_env(selected_prefix, runtime_path, proton_path)
-    subprocess.run(cmd, env=env)
\ No newline at end of file
+    try:
+        message = import_reg_files(selected_prefix, reg_files, proton_path, runtime_path)
+        print(f"{Colors.OKGREEN}✔ {message[0].upper()}{message[1:]}.{Colors.ENDC}")
+        return 0
+    except Exception as e:
+        print(f"{Colors.FAIL}✖ {e}{Colors.ENDC}")
+        return 1
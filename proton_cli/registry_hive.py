@@ -0,0 +1,637 @@
+import os
+import re
+import time
+import fcntl
+import codecs
+import struct
+from string import hexdigits
+from .constants import Colors, PREFIXES_DIR
+from .core import debug_log
+
+REG_NONE = 0
+REG_SZ = 1
+REG_EXPAND_SZ = 2
+REG_BINARY = 3
+REG_DWORD = 4
+REG_MULTI_SZ = 7
+REG_QWORD = 11
+
+TYPE_NAMES = {
+    REG_NONE: "REG_NONE",
+    REG_SZ: "REG_SZ",
+    REG_EXPAND_SZ: "REG_EXPAND_SZ",
+    REG_BINARY: "REG_BINARY",
+    REG_DWORD: "REG_DWORD",
+    REG_MULTI_SZ: "REG_MULTI_SZ",
+    REG_QWORD: "REG_QWORD",
+}
+STRING_TYPES = (REG_SZ, REG_EXPAND_SZ, REG_MULTI_SZ)
+
+# Registry roots as used in .reg files -> (hive file, path of the root inside the hive)
+ROOTS = {
+    "HKEY_LOCAL_MACHINE": ("system.reg", ""),
+    "HKLM": ("system.reg", ""),
+    "HKEY_CLASSES_ROOT": ("system.reg", "Software\\Classes"),
+    "HKCR": ("system.reg", "Software\\Classes"),
+    "HKEY_CURRENT_USER": ("user.reg", ""),
+    "HKCU": ("user.reg", ""),
+    "HKEY_USERS\\.DEFAULT": ("userdef.reg", ""),
+    "HKU\\.DEFAULT": ("userdef.reg", ""),
+}
+
+# Seconds between 1601-01-01 and 1970-01-01, for the #time= FILETIME stamps
+EPOCH_DIFF = 11644473600
+
+_HEADER_RE = re.compile(r'^\[((?:[^\\\]\n]|\\.)*)\]([^\n]*)$', re.M)
+_ESCAPES = {'a': '\a', 'b': '\b', 'e': '\x1b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t', 'v': '\v'}
+_C_ESCAPES = {ord(v): k for k, v in _ESCAPES.items()}
+
+
+class RegistryError(Exception):
+    pass
+
+
+def unescape(s):
+    """Decodes a string written by Wine's dump_strW()."""
+    if '\\' not in s:
+        return s
+    if '\\' not in s.replace('\\\\', ''):
+        # Only escaped backslashes, as in most key paths
+        return s.replace('\\\\', '\\')
+
+    out = []
+    i = 0
+    n = len(s)
+    while i < n:
+        c = s[i]
+        if c != '\\' or i + 1 >= n:
+            out.append(c)
+            i += 1
+            continue
+        c = s[i + 1]
+        i += 2
+        if c in _ESCAPES:
+            out.append(_ESCAPES[c])
+        elif c == 'x':
+            j = i
+            while j < n and j < i + 4 and s[j] in hexdigits:
+                j += 1
+            if j == i:
+                out.append('x')
+            else:
+                out.append(chr(int(s[i:j], 16)))
+                i = j
+        elif c in '01234567':
+            j = i - 1
+            while j < n and j < i + 2 and s[j] in '01234567':
+                j += 1
+            out.append(chr(int(s[i - 1:j], 8)))
+            i = j
+        else:
+            out.append(c)
+    # \x escapes are UTF-16 code units, so join surrogate pairs
+    return ''.join(out).encode('utf-16-le', 'surrogatepass').decode('utf-16-le', 'replace')
+
+
+def escape(s, delim='"'):
+    """Encodes a string the way Wine's dump_strW() does."""
+    units = s.encode('utf-16-le', 'surrogatepass')
+    units = [units[i] | (units[i + 1] << 8) for i in range(0, len(units), 2)]
+    out = []
+    for i, o in enumerate(units):
+        nxt = units[i + 1] if i + 1 < len(units) else None
+        if o > 127:
+            if nxt is not None and nxt < 128 and chr(nxt) in hexdigits:
+                out.append('\\x%04x' % o)
+            else:
+                out.append('\\x%x' % o)
+        elif o < 32:
+            if o in _C_ESCAPES:
+                out.append('\\' + _C_ESCAPES[o])
+            elif nxt is not None and 0x30 <= nxt <= 0x37:
+                out.append('\\%03o' % o)
+            else:
+                out.append('\\%o' % o)
+        else:
+            ch = chr(o)
+            if ch == '\\' or ch == delim:
+                out.append('\\')
+            out.append(ch)
+    return ''.join(out)
+
+
+def _split_quoted(text, start=0):
+    """Returns (raw contents, index after the closing quote) of the string starting at text[start]."""
+    i = start + 1
+    n = len(text)
+    while i < n:
+        if text[i] == '\\':
+            i += 2
+            continue
+        if text[i] == '"':
+            return text[start + 1:i], i + 1
+        i += 1
+    raise RegistryError(f"Unterminated string: {text[start:start + 40]}")
+
+
+def _parse_hex(text):
+    text = text.replace('\\', '').replace(' ', '').replace('\t', '').replace('\n', '').rstrip(',')
+    if not text:
+        return b""
+    try:
+        return bytes(int(b, 16) for b in text.split(','))
+    except ValueError:
+        raise RegistryError(f"Invalid hex data: {text[:40]}")
+
+
+def encode_string(s):
+    return (s + '\0').encode('utf-16-le', 'surrogatepass')
+
+
+def decode_string(data):
+    return data.decode('utf-16-le', 'replace')[:-1] if data.endswith(b"\0\0") else data.decode('utf-16-le', 'replace')
+
+
+def parse_data(text):
+    """Parses the data part of a hive value line into (type, bytes)."""
+    if text.startswith('"'):
+        raw, _ = _split_quoted(text)
+        return REG_SZ, encode_string(unescape(raw))
+    if text.startswith('str('):
+        close = text.index('):')
+        raw, _ = _split_quoted(text, close + 2)
+        return int(text[4:close], 16), encode_string(unescape(raw))
+    if text.startswith('dword:'):
+        return REG_DWORD, struct.pack('<I', int(text[6:14], 16))
+    if text.startswith('hex:'):
+        return REG_BINARY, _parse_hex(text[4:])
+    if text.startswith('hex('):
+        close = text.index('):')
+        return int(text[4:close], 16), _parse_hex(text[close + 2:])
+    raise RegistryError(f"Unknown value format: {text[:40]}")
+
+
+def format_data(value_type, data):
+    """Formats (type, bytes) the way Wine writes it into a hive."""
+    if value_type in STRING_TYPES and len(data) % 2 == 0 and data.endswith(b"\0\0"):
+        s = escape(data[:-2].decode('utf-16-le', 'surrogatepass'))
+        return f'"{s}"' if value_type == REG_SZ else f'str({value_type:x}):"{s}"'
+    if value_type == REG_DWORD and len(data) == 4:
+        return 'dword:%08x' % struct.unpack('<I', data)[0]
+    prefix = "hex:" if value_type == REG_BINARY else f"hex({value_type:x}):"
+    return prefix + ",".join('%02x' % b for b in data)
+
+
+def display_data(value_type, data):
+    if value_type in (REG_SZ, REG_EXPAND_SZ):
+        return decode_string(data)
+    if value_type == REG_MULTI_SZ:
+        return "\n".join(s for s in decode_string(data).split('\0') if s)
+    if value_type == REG_DWORD and len(data) == 4:
+        return str(struct.unpack('<I', data)[0])
+    if value_type == REG_QWORD and len(data) == 8:
+        return str(struct.unpack('<Q', data)[0])
+    return ",".join('%02x' % b for b in data)
+
+
+class Key:
+    """A parsed key block: header, #meta lines and values in file order."""
+
+    def __init__(self, name, stamp=None, meta=None, values=None):
+        self.name = name
+        self.raw = None
+        self.stamp = stamp
+        self.meta = meta or []
+        # lower-case name -> (name, raw data text)
+        self.values = values if values is not None else {}
+
+    @classmethod
+    def parse(cls, block):
+        lines = block.split('\n')
+        header = _HEADER_RE.match(lines[0])
+        key = cls(unescape(header.group(1)), header.group(2).strip() or None)
+        key.raw = block
+        line = ""
+        for part in lines[1:]:
+            line = line + part.strip() if line else part
+            # Long hex values continue on the next line after a trailing backslash
+            if line.endswith('\\') and not line.endswith('"'):
+                line = line[:-1]
+                continue
+            if line.startswith('#'):
+                key.meta.append(line)
+            elif line.startswith('@='):
+                key.values[""] = ("", line[2:])
+            elif line.startswith('"'):
+                raw, end = _split_quoted(line)
+                name = unescape(raw)
+                key.values[name.lower()] = (name, line[end + 1:])
+            line = ""
+        return key
+
+    def touch(self):
+        self.raw = None
+        now = time.time()
+        self.stamp = str(int(now))
+        filetime = int((now + EPOCH_DIFF) * 10_000_000)
+        self.meta = [m for m in self.meta if not m.startswith('#time=')]
+        self.meta.insert(0, f"#time={filetime:x}")
+
+    def get(self, name):
+        entry = self.values.get(name.lower())
+        return parse_data(entry[1]) if entry else None
+
+    def set(self, name, value_type, data):
+        existing = self.values.get(name.lower())
+        self.values[name.lower()] = (existing[0] if existing else name, format_data(value_type, data))
+        self.touch()
+
+    def delete(self, name):
+        if self.values.pop(name.lower(), None) is not None:
+            self.touch()
+
+    def dump(self):
+        if self.raw is not None:
+            return self.raw
+        header = f"[{escape(self.name, ']')}]"
+        if self.stamp:
+            header += f" {self.stamp}"
+        lines = [header] + self.meta
+        for name, data in self.values.values():
+            lines.append(f"@={data}" if name == "" else f'"{escape(name)}"={data}')
+        return "\n".join(lines) + "\n\n"
+
+
+class Hive:
+    """
+    One Wine registry file. Keys are indexed by name on load, but a key block
+    is only parsed when it is read or changed; the others are written back as
+    they were.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.modified = False
+        with open(path, 'r', encoding='utf-8', errors='surrogateescape', newline='\n') as f:
+            text = f.read()
+
+        # Only key headers start a line with "[", values start with '"', '@' or '#'
+        chunks = ("\n" + text).split("\n[")
+        self.preamble = chunks[0][1:] + ("\n" if len(chunks) > 1 else "")
+        # Each entry is either the raw block text or a parsed Key
+        self.blocks = []
+        # lower-case key name -> block number, and -> name as written
+        self.index = {}
+        self.names = {}
+        last = len(chunks) - 1
+        for i, chunk in enumerate(chunks[1:], 1):
+            header_end = chunk.find("\n")
+            header = chunk if header_end < 0 else chunk[:header_end]
+            name = unescape(header[:header.rfind("]")])
+            self.names[name.lower()] = name
+            self.index[name.lower()] = len(self.blocks)
+            self.blocks.append("[" + chunk + ("\n" if i < last else ""))
+
+    def key(self, name, create=False):
+        idx = self.index.get(name.lower())
+        if idx is None:
+            if not create:
+                return None
+            key = Key(name)
+            key.touch()
+            self.index[name.lower()] = len(self.blocks)
+            self.names[name.lower()] = name
+            self.blocks.append(key)
+            self.modified = True
+            return key
+        block = self.blocks[idx]
+        if isinstance(block, str):
+            block = self.blocks[idx] = Key.parse(block)
+        return block
+
+    def subkeys(self, name):
+        """Returns the names of the direct subkeys, including ones only implied by deeper keys."""
+        prefix = name.lower() + "\\" if name else ""
+        found = {}
+        for k, original in self.names.items():
+            if k.startswith(prefix) and k != prefix:
+                child = original[len(prefix):].split("\\", 1)[0]
+                found.setdefault(child.lower(), child)
+        return sorted(found.values(), key=str.lower)
+
+    def set_value(self, key_name, name, value_type, data):
+        self.key(key_name, create=True).set(name, value_type, data)
+        self.modified = True
+
+    def delete_value(self, key_name, name):
+        key = self.key(key_name)
+        if key and name.lower() in key.values:
+            key.delete(name)
+            self.modified = True
+
+    def delete_key(self, key_name):
+        prefix = key_name.lower() + "\\"
+        doomed = [k for k in self.index if k == key_name.lower() or k.startswith(prefix)]
+        for k in doomed:
+            self.blocks[self.index.pop(k)] = None
+            del self.names[k]
+        if doomed:
+            self.modified = True
+
+    def save(self):
+        """Writes the hive atomically, keeping the original file mode."""
+        parts = [self.preamble]
+        for block in self.blocks:
+            if block is None:
+                continue
+            parts.append(block if isinstance(block, str) else block.dump())
+
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8', errors='surrogateescape', newline='\n') as f:
+            f.write("".join(parts))
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(self.path).st_mode & 0o7777)
+        except OSError:
+            pass
+        os.replace(tmp_path, self.path)
+        self.modified = False
+
+
+def split_root(full_key):
+    """Maps a key like HKEY_CURRENT_USER\\Software\\Wine to (hive file, key path inside it)."""
+    full_key = full_key.strip().strip("\\")
+    upper = full_key.upper()
+    for root in sorted(ROOTS, key=len, reverse=True):
+        if upper == root or upper.startswith(root + "\\"):
+            hive_file, base = ROOTS[root]
+            rest = full_key[len(root):].strip("\\")
+            return hive_file, "\\".join(p for p in (base, rest) if p)
+    raise RegistryError(f"Unsupported registry root: {full_key.split(chr(92))[0]}")
+
+
+def _read_text(path):
+    data = open(path, 'rb').read()
+    if data.startswith(codecs.BOM_UTF16_LE):
+        return data[2:].decode('utf-16-le')
+    if data.startswith(codecs.BOM_UTF8):
+        return data[3:].decode('utf-8')
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
+
+
+def read_reg_file(path):
+    """
+    Parses a .reg file (REGEDIT4 or version 5.00, UTF-16 or UTF-8).
+
+    :return: List of operations: ("delete_key", key), ("delete_value", key, name)
+             and ("set", key, name, type, bytes)
+    """
+    lines = _read_text(path).splitlines()
+    while lines and not lines[0].strip():
+        lines.pop(0)
+    header = lines[0].strip() if lines else ""
+    if header not in ("REGEDIT4", "Windows Registry Editor Version 5.00"):
+        raise RegistryError("Not a registry file")
+    ansi = header == "REGEDIT4"
+
+    ops = []
+    key = None
+    pending = ""
+    for line in lines[1:]:
+        line = pending + line.strip() if pending else line.strip()
+        pending = ""
+        if line.endswith('\\') and not line.endswith('"'):
+            pending = line[:-1]
+            continue
+        if not line or line.startswith(';'):
+            continue
+
+        if line.startswith('['):
+            name = line[1:line.rindex(']')]
+            if name.startswith('-'):
+                ops.append(("delete_key", name[1:]))
+                key = None
+            else:
+                key = name
+                ops.append(("create_key", key))
+            continue
+        if key is None:
+            continue
+
+        if line.startswith('@='):
+            name, rest = "", line[2:]
+        elif line.startswith('"'):
+            raw, end = _split_quoted(line)
+            name = re.sub(r'\\(.)', r'\1', raw)
+            rest = line[end:].lstrip()
+            if not rest.startswith('='):
+                raise RegistryError(f"Invalid line: {line[:40]}")
+            rest = rest[1:].lstrip()
+        else:
+            raise RegistryError(f"Invalid line: {line[:40]}")
+
+        if rest == '-':
+            ops.append(("delete_value", key, name))
+            continue
+        if rest.startswith('"'):
+            raw, _ = _split_quoted(rest)
+            value = re.sub(r'\\(.)', lambda m: {'n': '\n', 'r': '\r', '0': '\0'}.get(m.group(1), m.group(1)), raw)
+            ops.append(("set", key, name, REG_SZ, encode_string(value)))
+            continue
+
+        value_type, value = parse_data(rest.split(';', 1)[0].strip() if not rest.startswith('str(') else rest)
+        if ansi and value_type in (REG_EXPAND_SZ, REG_MULTI_SZ) and rest.startswith('hex('):
+            # REGEDIT4 stores these as ANSI bytes
+            value = value.decode('latin-1').encode('utf-16-le')
+            if not value.endswith(b"\0\0"):
+                value += b"\0\0"
+        ops.append(("set", key, name, value_type, value))
+    return ops
+
+
+class PrefixRegistry:
+    """
+    The registry files of a prefix. Used as a context manager, it holds a lock
+    against concurrent proton-cli edits and saves changed hives on success.
+    """
+
+    def __init__(self, prefix_path):
+        self.root = prefix_path / "pfx"
+        if not self.root.exists():
+            self.root = prefix_path
+        self.hives = {}
+        self._lock_file = None
+
+    def __enter__(self):
+        self._lock_file = open(self.root / ".proton-cli-reg.lock", 'w')
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.save()
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+
+    def hive(self, hive_file):
+        if hive_file not in self.hives:
+            path = self.root / hive_file
+            if not path.exists():
+                raise RegistryError(f"{hive_file} not found, the prefix is not initialized")
+            self.hives[hive_file] = Hive(path)
+        return self.hives[hive_file]
+
+    def resolve(self, full_key):
+        hive_file, key = split_root(full_key)
+        return self.hive(hive_file), key
+
+    def get(self, full_key, name):
+        hive, key = self.resolve(full_key)
+        k = hive.key(key)
+        return k.get(name) if k else None
+
+    def set(self, full_key, name, value_type, data):
+        hive, key = self.resolve(full_key)
+        hive.set_value(key, name, value_type, data)
+
+    def apply(self, ops):
+        # Map every key first, so an unsupported root fails before anything changed
+        for op in ops:
+            split_root(op[1])
+        for op in ops:
+            hive, key = self.resolve(op[1])
+            if op[0] == "delete_key":
+                hive.delete_key(key)
+            elif op[0] == "create_key":
+                if not hive.key(key):
+                    hive.key(key, create=True)
+            elif op[0] == "delete_value":
+                hive.delete_value(key, op[2])
+            else:
+                hive.set_value(key, op[2], op[3], op[4])
+
+    def save(self):
+        for hive in self.hives.values():
+            if hive.modified:
+                hive.save()
+
+
+def can_edit_offline(prefix_path):
+    """The registry files may only be edited while no wineserver holds them in memory."""
+    from .wineserver import find_server
+    root = prefix_path / "pfx"
+    return (root / "system.reg").exists() and (root / "user.reg").exists() and not find_server(prefix_path)
+
+
+def apply_reg_files(prefix_path, reg_files):
+    """
+    Imports .reg files into a prefix without starting Wine. All files are
+    parsed before the registry is touched, and the hives are written once.
+
+    :return: Number of operations applied
+    """
+    ops = []
+    for reg_file in reg_files:
+        ops.extend(read_reg_file(reg_file))
+    with PrefixRegistry(prefix_path) as reg:
+        reg.apply(ops)
+    debug_log(f"Applied {len(ops)} registry operations to {prefix_path.name} offline")
+    return len(ops)
+
+
+def reg_file_header(path):
+    for line in _read_text(path).splitlines():
+        if line.strip():
+            return line.strip()
+    return ""
+
+
+def merge_reg_files(reg_files, dest):
+    """Concatenates .reg files of the same format into one file for a single regedit run."""
+    header = reg_file_header(reg_files[0])
+    parts = [header, ""]
+    for reg_file in reg_files:
+        lines = _read_text(reg_file).splitlines()
+        while lines and not lines[0].strip():
+            lines.pop(0)
+        parts.extend(lines[1:])
+        parts.append("")
+    text = "\r\n".join(parts) + "\r\n"
+    if header == "REGEDIT4":
+        dest.write_bytes(text.encode('latin-1', 'replace'))
+    else:
+        dest.write_bytes(codecs.BOM_UTF16_LE + text.encode('utf-16-le'))
+    return dest
+
+
+def _parse_input(value_type, values):
+    if value_type == REG_MULTI_SZ:
+        return encode_string("\0".join(values) + "\0")
+    if len(values) != 1:
+        raise RegistryError(f"{TYPE_NAMES[value_type]} takes exactly one value")
+    value = values[0]
+    if value_type in (REG_SZ, REG_EXPAND_SZ):
+        return encode_string(value)
+    if value_type == REG_DWORD:
+        return struct.pack('<I', int(value, 0) & 0xFFFFFFFF)
+    if value_type == REG_QWORD:
+        return struct.pack('<Q', int(value, 0) & 0xFFFFFFFFFFFFFFFF)
+    return bytes.fromhex(value.replace(',', '').replace(' ', ''))
+
+
+def run_reg(action, prefix_name, key, name=None, values=None, type_name="REG_SZ"):
+    prefix_path = PREFIXES_DIR / prefix_name
+    if not prefix_path.exists():
+        print(f"{Colors.FAIL}✖ Prefix '{prefix_name}' not found.{Colors.ENDC}")
+        return
+    if name == "@":
+        name = ""
+
+    try:
+        if action == "get":
+            from .wineserver import find_server
+            if find_server(prefix_path):
+                print(f"{Colors.WARNING}⚠ A wineserver is running, recent changes may not be on disk yet.{Colors.ENDC}")
+            reg = PrefixRegistry(prefix_path)
+            hive, key_path = reg.resolve(key)
+            # Wine doesn't write keys that only hold subkeys
+            k = hive.key(key_path)
+            subkeys = hive.subkeys(key_path)
+            if not k and not subkeys:
+                print(f"{Colors.FAIL}✖ Key not found: {key}{Colors.ENDC}")
+                return
+            if name is not None:
+                value = k.get(name) if k else None
+                if value is None:
+                    print(f"{Colors.FAIL}✖ Value not found: {name or '@'}{Colors.ENDC}")
+                    return
+                print(display_data(*value))
+                return
+            print(f"{Colors.HEADER}[{key}]{Colors.ENDC}")
+            for sub in subkeys:
+                print(f"  {Colors.OKBLUE}{sub}\\{Colors.ENDC}")
+            for value_name, _ in (k.values.values() if k else []):
+                value_type, data = k.get(value_name)
+                type_label = TYPE_NAMES.get(value_type, f"hex({value_type:x})")
+                print(f"  {Colors.OKGREEN}{value_name or '@':<30}{Colors.ENDC} {Colors.GRAY}{type_label:<14}{Colors.ENDC} {display_data(value_type, data)}")
+
+        elif action == "set":
+            value_type = {v: k for k, v in TYPE_NAMES.items()}.get(type_name.upper())
+            if value_type is None:
+                print(f"{Colors.FAIL}✖ Unknown type: {type_name}{Colors.ENDC}")
+                return
+            if not can_edit_offline(prefix_path):
+                print(f"{Colors.FAIL}✖ A wineserver is running for '{prefix_name}'. Stop it with 'proton-cli server stop {prefix_name}' first.{Colors.ENDC}")
+                return
+            data = _parse_input(value_type, values or [])
+            with PrefixRegistry(prefix_path) as reg:
+                reg.set(key, name, value_type, data)
+            print(f"{Colors.OKGREEN}✔ {key}\\{name or '@'} = {display_data(value_type, data)}{Colors.ENDC}")
+    except (RegistryError, ValueError, OSError) as e:
+        print(f"{Colors.FAIL}✖ {e}{Colors.ENDC}")
@@ -1,26 +1,80 @@
 import subprocess
-import shutil
 from pathlib import Path
 from .constants import Colors, PREFIXES_DIR
 from .config import load_config
-from .core import get_proton_env, create_proton_command
+from .core import get_proton_env, create_proton_command, run_proton
+from .fsutil import copy_file
+from .prefix_batch import match_prefixes, run_per_prefix
 
-def run_regsvr32(args):
+def _local_dlls(args):
+    """Splits regsvr32 arguments into local DLL files and everything else."""
+    return [(arg, Path(arg)) for arg in args
+            if Path(arg).is_file() and Path(arg).suffix.lower() == ".dll"]
+
+def register_dlls(prefix, args, proton_path, runtime_path, quiet=False):
+    """
+    Copies local DLLs into the prefix and runs one regsvr32 for all arguments.
+
+    :return: Short description of what was done
+    """
+    local = dict(_local_dlls(args))
+    system32 = prefix / "pfx" / "drive_c" / "windows" / "system32"
+    if not system32.exists():
+        system32 = prefix / "drive_c" / "windows" / "system32"
+
+    final_args = []
+    for arg in args:
+        path = local.get(arg)
+        if path is None:
+            final_args.append(arg)
+            continue
+        if not quiet:
+            print(f"{Colors.OKBLUE}ℹ Detected local DLL file: {path.name}{Colors.ENDC}")
+            print(f"{Colors.GRAY}➜ Copying to System32...{Colors.ENDC}")
+        try:
+            copy_file(path, system32 / path.name)
+        except OSError as e:
+            raise RuntimeError(f"Failed to copy DLL: {e}")
+        final_args.append(path.name)
+
+    # regsvr32 handles any number of DLLs in one run
+    cmd = create_proton_command(proton_path, runtime_path, ["run", "regsvr32"] + final_args)
+    env = get_proton_env(prefix, runtime_path, proton_path)
+    if quiet:
+        result = run_proton(cmd, env, prefix, proton_path, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    else:
+        result = run_proton(cmd, env, prefix, proton_path)
+    if result.returncode != 0:
+        raise RuntimeError(f"regsvr32 exited with status {result.returncode}")
+    dlls = [a for a in final_args if not a.startswith(("/", "-"))]
+    return f"{len(dlls)} DLLs processed, {len(local)} copied"
+
+def run_regsvr32(args, selectors=None, select_all=False, workers=None):
     conf = load_config()
     proton_path = conf.get("proton_path")
     runtime_path = conf.get("runtime_path")
     if not proton_path or not proton_path.exists():
         print(f"{Colors.FAIL}✖ Proton not found. Please use 'check' command first.{Colors.ENDC}")
-        return
+        return 1
 
     if not PREFIXES_DIR.exists():
         print(f"{Colors.WARNING}⚠ No prefixes found.{Colors.ENDC}")
-        return
+        return 1
+
+    if selectors or select_all:
+        prefixes, unmatched = match_prefixes(selectors or [], select_all)
+        for selector in unmatched:
+            print(f"{Colors.WARNING}⚠ No prefix matches '{selector}'.{Colors.ENDC}")
+        if not prefixes:
+            print(f"{Colors.WARNING}⚠ No prefixes found.{Colors.ENDC}")
+            return 1
+        return run_per_prefix(prefixes, "Running regsvr32", lambda prefix:
+                              register_dlls(prefix, args, proton_path, runtime_path, quiet=True), workers)
 
     prefixes = [p for p in PREFIXES_DIR.iterdir() if p.is_dir()]
     if not prefixes:
         print(f"{Colors.WARNING}⚠ No prefixes found.{Colors.ENDC}")
-        return
+        return 1
 
     prefixes.sort(key=lambda x: x.name)
     print(f"\n{Colors.HEADER}Select Prefix to Run regsvr32:{Colors.ENDC}")
@@ -41,27 +95,9 @@ def run_regsvr32(args):
 
     print(f"{Colors.HEADER}➜ Running regsvr32{Colors.ENDC}")
 
-    final_args = []
-    for arg in args:
-        path = Path(arg)
-        if path.exists() and path.is_file() and path.suffix.lower() == ".dll":
-            print(f"{Colors.OKBLUE}ℹ Detected local DLL file: {path.name}{Colors.ENDC}")
-            
-            system32 = selected_prefix / "pfx" / "drive_c" / "windows" / "system32"
-            if not system32.exists():
-                system32 = selected_prefix / "drive_c" / "windows" / "system32"
-            
-            dest_path = system32 / path.name
-            try:
-                print(f"{Colors.GRAY}➜ Copying to System32...{Colors.ENDC}")
-                shutil.copy2(path, dest_path)
-                final_args.append(path.name)
-            except Exception as e:
-                print(f"{Colors.FAIL}✖ Failed to copy DLL: {e}{Colors.ENDC}")
-                return
-        else:
-            final_args.append(arg)
-    
-    cmd = create_proton_command(proton_path, runtime_path, ["run", "regsvr32"] + final_args)
-    env = get_proton_env(selected_prefix, runtime_path, proton_path)
-    subprocess.run(cmd, env=env)
\ No newline at end of file
+    try:
+        register_dlls(selected_prefix, args, proton_path, runtime_path)
+        return 0
+    except RuntimeError as e:
+        print(f"{Colors.FAIL}✖ {e}{Colors.ENDC}")
+        return 1
@@ -1,42 +1,34 @@
 import sys
 import os
 import subprocess
-import shlex
-import re
 from pathlib import Path
-from .constants import Colors, PREFIXES_DIR, BASE_DIR
+from .constants import Colors, PREFIXES_DIR
 from .config import load_config
 from .prefix_make import create_prefix
-from .core import get_proton_env, create_proton_command, debug_log
+from .core import get_proton_env, create_proton_command, apply_user_options, run_proton, debug_log
+from .trace import span
+from .profiles import get_profile, profile_for
+from .shortcuts import SHORTCUTS_DIR, APPLICATIONS_DIR, write_script, recompile, lookup, register
 
 def _create_desktop_shortcut(exe_path, prefix_name, user_options, args):
     """Handles the creation or update of a .desktop shortcut."""
-    applications_dir = Path.home() / ".local/share/applications"
+    applications_dir = APPLICATIONS_DIR
     shortcut_name = exe_path.stem
     
     safe_filename = "".join(c if c.isalnum() or c in ('-', '_') else '_' for c in shortcut_name).strip().lower()
     desktop_file_name = f"proton-cli-{safe_filename}.desktop"
     desktop_file_path = applications_dir / desktop_file_name
+    wrapper_script_path = None
     
     # Check for existing shortcut
     existing_path = None
 
-    if applications_dir.exists():
-        for item in applications_dir.iterdir():
-            if item.is_file() and item.name.startswith("proton-cli-") and item.name.endswith(".desktop"):
-                try:
-                    with open(item, 'r', errors='ignore') as f:
-                        content = f.read()
-                    match = re.search(r'^Exec=["\']?([^"\']+)["\']?', content, re.MULTILINE)
-                    if match:
-                        wrapper_path = Path(match.group(1))
-                        if wrapper_path.exists() and wrapper_path.is_file():
-                            with open(wrapper_path, 'r', errors='ignore') as wf:
-                                if str(exe_path) in wf.read():
-                                    existing_path = item
-                                    break
-                except Exception:
-                    continue
+    with span("shortcut lookup"):
+        entry = lookup(exe_path)
+    if entry:
+        existing_path = Path(entry["desktop_file"])
+        shortcut_name = entry["name"]
+        wrapper_script_path = Path(entry["script"])
 
     if not existing_path and desktop_file_path.exists():
         existing_path = desktop_file_path
@@ -60,30 +52,13 @@ def _create_desktop_shortcut(exe_path, prefix_name, user_options, args):
             desktop_file_path = applications_dir / f"proton-cli-{safe_filename}.desktop"
 
    
-    shortcuts_dir = BASE_DIR / "shortcuts"
-    shortcuts_dir.mkdir(parents=True, exist_ok=True)
-    safe_script_name = "".join(c if c.isalnum() or c in ('-', '_') else '_' for c in shortcut_name).strip().lower()
-    wrapper_script_path = shortcuts_dir / f"launch_{safe_script_name}.sh"
+    SHORTCUTS_DIR.mkdir(parents=True, exist_ok=True)
+    if not wrapper_script_path:
+        safe_script_name = "".join(c if c.isalnum() or c in ('-', '_') else '_' for c in shortcut_name).strip().lower()
+        wrapper_script_path = SHORTCUTS_DIR / f"launch_{safe_script_name}.sh"
 
-    cmd_parts = [sys.executable, "-m", "proton_cli", "run"]
-    if prefix_name:
-        cmd_parts.extend(["-p", prefix_name])
-    if user_options:
-        cmd_parts.extend(["-o", user_options])
-    
-    cmd_parts.append(str(exe_path))
-    
-    if args:
-        cmd_parts.extend(args)
-
-    # Write the shell script
-    script_content = "#!/bin/bash\n"
-    script_content += " ".join(shlex.quote(str(part)) for part in cmd_parts)
-    
     try:
-        with open(wrapper_script_path, "w") as f:
-            f.write(script_content)
-        os.chmod(wrapper_script_path, 0o755)
+        write_script(wrapper_script_path, exe_path, prefix_name, user_options, args)
     except Exception as e:
         print(f"{Colors.FAIL}✖ Failed to create wrapper script: {e}{Colors.ENDC}")
         return
@@ -105,16 +80,18 @@ Categories=Utility;Game;
         with open(desktop_file_path, "w") as f:
             f.write(content)
         os.chmod(desktop_file_path, 0o755)
+        register(exe_path, shortcut_name, desktop_file_path, wrapper_script_path, prefix_name, user_options, args)
         
         # Update database if tool exists
-        subprocess.run(["update-desktop-database", str(applications_dir)], 
-                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with span("update-desktop-database", cat="process"):
+            subprocess.run(["update-desktop-database", str(applications_dir)], 
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         
         print(f"{Colors.OKGREEN}✔ Shortcut saved to: {desktop_file_path}{Colors.ENDC}")
     except Exception as e:
         print(f"{Colors.FAIL}✖ Failed to create shortcut: {e}{Colors.ENDC}")
 
-def run_executable(exe_path, args, prefix_name=None, user_options=None):
+def run_executable(exe_path, args, prefix_name=None, user_options=None, profile=None):
     conf = load_config()
     proton_path = conf.get("proton_path")
     runtime_path = conf.get("runtime_path")
@@ -123,16 +100,23 @@ def run_executable(exe_path, args, prefix_name=None, user_options=None):
         print(f"{Colors.FAIL}✖ Proton not found. Please use 'check' command first.{Colors.ENDC}")
         return
 
-    exe_file = Path(exe_path).resolve()
+    with span("resolve exe"):
+        exe_file = Path(exe_path).resolve()
     if not exe_file.exists():
         print(f"{Colors.FAIL}✖ File not found: {exe_path}{Colors.ENDC}")
         return
 
+    profile = profile_for(exe_file, profile)
+    if profile and get_profile(profile) is None:
+        print(f"{Colors.FAIL}✖ Launch profile '{profile}' not found.{Colors.ENDC}")
+        return
+
     # Prefix Selection
-    if not PREFIXES_DIR.exists():
-        PREFIXES_DIR.mkdir(parents=True, exist_ok=True)
+    with span("list prefixes"):
+        if not PREFIXES_DIR.exists():
+            PREFIXES_DIR.mkdir(parents=True, exist_ok=True)
 
-    prefixes = [p for p in PREFIXES_DIR.iterdir() if p.is_dir()]
+        prefixes = [p for p in PREFIXES_DIR.iterdir() if p.is_dir()]
     selected_prefix = None
 
     if prefix_name:
@@ -171,27 +155,28 @@ def run_executable(exe_path, args, prefix_name=None, user_options=None):
 
     # Shortcut
     if sys.stdin.isatty():
-        _create_desktop_shortcut(exe_file, selected_prefix.name, user_options, args)
+        with span("desktop shortcut"):
+            _create_desktop_shortcut(exe_file, selected_prefix.name, user_options, args)
 
     # Execution
     print(f"\n{Colors.HEADER}➜ Launching: {Colors.OKBLUE}{exe_file.name}{Colors.ENDC}")
+    if profile:
+        print(f"{Colors.GRAY}  Launch profile: {profile}{Colors.ENDC}")
     
-    env = get_proton_env(selected_prefix, runtime_path, proton_path)
+    env = get_proton_env(selected_prefix, runtime_path, proton_path, exe_path=exe_file)
     
-    parsed_options = shlex.split(user_options) if user_options else []
-    real_wrappers = []
-    
-    for opt in parsed_options:
-        if '=' in opt and not opt.startswith('-'):
-            key, val = opt.split('=', 1)
-            env[key] = val
-        else:
-            real_wrappers.append(opt)
+    real_wrappers = apply_user_options(env, user_options)
+
+    cmd = create_proton_command(proton_path, runtime_path, ["run", str(exe_file)] + args, real_wrappers, profile)
 
-    cmd = create_proton_command(proton_path, runtime_path, ["run", str(exe_file)] + args, real_wrappers)
+    # Started by an outdated compiled shortcut
+    shortcut_script = os.environ.pop("PROTON_CLI_SHORTCUT", None)
+    if shortcut_script:
+        env.pop("PROTON_CLI_SHORTCUT", None)
+        recompile(shortcut_script)
 
     try:
-        subprocess.run(cmd, env=env, cwd=exe_file.parent)
+        run_proton(cmd, env, selected_prefix, proton_path, cwd=exe_file.parent)
     except KeyboardInterrupt:
         print(f"\n{Colors.WARNING}⚠ Application stopped.{Colors.ENDC}")
     except Exception as e:
@@ -0,0 +1,262 @@
+import os
+import json
+import time
+import signal
+import threading
+import subprocess
+from pathlib import Path
+from .constants import Colors, PREFIXES_DIR, BASE_DIR
+from .config import load_config
+from .wineserver import ensure_server
+from .core import get_proton_env, create_proton_command, apply_user_options, run_wineserver, debug_log
+from .profiles import get_profile, profile_for
+from . import telemetry
+
+LOGS_DIR = BASE_DIR / "logs"
+KILL_GRACE = 10
+
+# Processes of running jobs per prefix, which share the prefix's wineserver
+_running = {}
+_running_lock = threading.Lock()
+
+
+def load_manifest(manifest_path):
+    """
+    Reads a batch manifest. Either a list of jobs or an object like:
+
+    {"concurrency": 4, "per_prefix": 1, "timeout": 600,
+     "jobs": [{"exe": "setup.exe", "args": ["/S"], "prefix": "default",
+               "options": "DXVK_HUD=1", "timeout": 300, "name": "setup",
+               "profile": "background"}]}
+    """
+    with open(manifest_path, 'r') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = {"jobs": data}
+
+    base_dir = Path(manifest_path).resolve().parent
+    jobs = []
+    for i, job in enumerate(data.get("jobs", [])):
+        if isinstance(job, str):
+            job = {"exe": job}
+        exe = Path(job["exe"]).expanduser()
+        if not exe.is_absolute():
+            exe = base_dir / exe
+        jobs.append({
+            "index": i + 1,
+            "name": job.get("name") or exe.stem,
+            "exe": exe.resolve(),
+            "args": [str(a) for a in job.get("args", [])],
+            "prefix": job.get("prefix") or data.get("prefix") or "default",
+            "options": job.get("options", data.get("options")),
+            "profile": job.get("profile", data.get("profile")),
+            "timeout": job.get("timeout", data.get("timeout")),
+        })
+    return data, jobs
+
+
+def _stop_job(proc, proton_path, prefix_path, env):
+    """Terminates a job's process group, and the prefix's wineserver unless other jobs still use it."""
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=KILL_GRACE)
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+    except ProcessLookupError:
+        pass
+    with _running_lock:
+        others = [other for other in _running.get(prefix_path, ()) if other is not proc and other.poll() is None]
+    if others:
+        debug_log(f"Keeping wineserver of {prefix_path}, {len(others)} other job(s) still running")
+        return
+    run_wineserver(proton_path, prefix_path, env, "-k")
+
+
+def run_job(job, proton_path, runtime_path, log_dir):
+    """Runs one manifest job to completion and fills in its result fields."""
+    prefix_path = PREFIXES_DIR / job["prefix"]
+    job["status"] = "error"
+    job["exit_code"] = None
+    job["wall_time"] = 0.0
+
+    if not job["exe"].exists():
+        job["error"] = f"File not found: {job['exe']}"
+        return job
+    if not prefix_path.exists():
+        job["error"] = f"Prefix '{job['prefix']}' not found"
+        return job
+    profile = profile_for(job["exe"], job["profile"])
+    if profile and get_profile(profile) is None:
+        job["error"] = f"Launch profile '{profile}' not found"
+        return job
+
+    env = get_proton_env(prefix_path, runtime_path, proton_path, exe_path=job["exe"])
+    wrappers = apply_user_options(env, job["options"])
+    cmd = create_proton_command(proton_path, runtime_path, ["run", str(job["exe"])] + job["args"], wrappers, profile)
+    debug_log(f"Batch job {job['index']}: {cmd}")
+
+    safe_name = "".join(c if c.isalnum() or c in ('-', '_') else '_' for c in job["name"])
+    log_path = log_dir / f"{job['index']:03d}-{safe_name}.log"
+    job["log"] = str(log_path)
+    start = time.monotonic()
+    try:
+        ensure_server(proton_path, prefix_path, env)
+        with open(log_path, 'wb') as log:
+            # A new session lets a timeout kill everything the job started
+            proc = subprocess.Popen(cmd, env=env, cwd=job["exe"].parent, stdin=subprocess.DEVNULL,
+                                    stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+            job["_proc"] = proc
+            with _running_lock:
+                _running.setdefault(prefix_path, set()).add(proc)
+            sampler = None
+            if telemetry.enabled():
+                # Jobs run side by side, so their trees are told apart by session
+                sampler = telemetry.Sampler(proc.pid, adopt_session=True)
+                sampler.start()
+            try:
+                job["exit_code"] = proc.wait(timeout=job["timeout"])
+                job["status"] = "ok" if job["exit_code"] == 0 else "failed"
+            except subprocess.TimeoutExpired:
+                _stop_job(proc, proton_path, prefix_path, env)
+                job["exit_code"] = proc.returncode
+                job["status"] = "timeout"
+            finally:
+                with _running_lock:
+                    _running[prefix_path].discard(proc)
+                if sampler:
+                    sampler.stop()
+                    job["telemetry"] = str(sampler.save(job["name"], {"cmd": cmd, "exit_code": proc.returncode}))
+    except Exception as e:
+        job["error"] = str(e)
+    job["wall_time"] = time.monotonic() - start
+    return job
+
+
+def schedule(jobs, concurrency, per_prefix, start_job):
+    """
+    Starts jobs in manifest order while at most `concurrency` jobs run in
+    total and at most `per_prefix` jobs share one prefix.
+    """
+    cond = threading.Condition()
+    pending = list(jobs)
+    running = {"total": 0}
+    per_prefix_running = {}
+    threads = []
+
+    def worker(job):
+        try:
+            start_job(job)
+        finally:
+            with cond:
+                running["total"] -= 1
+                per_prefix_running[job["prefix"]] -= 1
+                cond.notify_all()
+
+    with cond:
+        while pending:
+            job = None
+            if running["total"] < concurrency:
+                for candidate in pending:
+                    if per_prefix_running.get(candidate["prefix"], 0) < per_prefix:
+                        job = candidate
+                        break
+            if job is None:
+                cond.wait()
+                continue
+
+            pending.remove(job)
+            running["total"] += 1
+            per_prefix_running[job["prefix"]] = per_prefix_running.get(job["prefix"], 0) + 1
+            thread = threading.Thread(target=worker, args=(job,), daemon=True)
+            threads.append(thread)
+            thread.start()
+
+    for thread in threads:
+        thread.join()
+
+
+def print_report(jobs):
+    print(f"\n{Colors.HEADER}{'#':<4} {'Job':<24} {'Prefix':<16} {'Status':<8} {'Exit':>5} {'Time':>9}{Colors.ENDC}")
+    print(f"{Colors.GRAY}{'-' * 70}{Colors.ENDC}")
+    for job in jobs:
+        color = Colors.OKGREEN if job["status"] == "ok" else Colors.FAIL
+        exit_code = "-" if job["exit_code"] is None else str(job["exit_code"])
+        print(f"{job['index']:<4} {job['name'][:24]:<24} {job['prefix'][:16]:<16} "
+              f"{color}{job['status']:<8}{Colors.ENDC} {exit_code:>5} {job['wall_time']:>8.1f}s")
+        if job.get("error"):
+            print(f"     {Colors.GRAY}{job['error']}{Colors.ENDC}")
+
+
+def run_batch(manifest_path, concurrency=None, per_prefix=None, timeout=None, report_path=None):
+    """
+    Runs all jobs of a manifest concurrently.
+
+    :return: Number of jobs that did not exit with status 0
+    """
+    conf = load_config()
+    proton_path = conf.get("proton_path")
+    runtime_path = conf.get("runtime_path")
+
+    if not proton_path or not proton_path.exists():
+        print(f"{Colors.FAIL}✖ Proton not found. Please use 'check' command first.{Colors.ENDC}")
+        return 1
+
+    try:
+        data, jobs = load_manifest(manifest_path)
+    except Exception as e:
+        print(f"{Colors.FAIL}✖ Could not read manifest: {e}{Colors.ENDC}")
+        return 1
+
+    if not jobs:
+        print(f"{Colors.WARNING}⚠ Manifest contains no jobs.{Colors.ENDC}")
+        return 0
+
+    concurrency = max(1, concurrency or data.get("concurrency") or os.cpu_count() or 1)
+    per_prefix = max(1, per_prefix or data.get("per_prefix") or 1)
+    if timeout:
+        for job in jobs:
+            job["timeout"] = timeout
+
+    log_dir = LOGS_DIR / f"batch-{time.strftime('%Y%m%d-%H%M%S')}"
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"{Colors.HEADER}➜ Running {len(jobs)} jobs{Colors.ENDC} {Colors.GRAY}(concurrency {concurrency}, {per_prefix} per prefix){Colors.ENDC}")
+    print(f"{Colors.GRAY}Logs: {log_dir}{Colors.ENDC}")
+
+    lock = threading.Lock()
+
+    def start_job(job):
+        with lock:
+            print(f" {Colors.OKBLUE}▶{Colors.ENDC} [{job['index']}] {job['name']} {Colors.GRAY}({job['prefix']}){Colors.ENDC}")
+        run_job(job, proton_path, runtime_path, log_dir)
+        with lock:
+            color = Colors.OKGREEN if job["status"] == "ok" else Colors.FAIL
+            print(f" {color}■{Colors.ENDC} [{job['index']}] {job['name']} {color}{job['status']}{Colors.ENDC} {Colors.GRAY}{job['wall_time']:.1f}s{Colors.ENDC}")
+
+    start = time.monotonic()
+    try:
+        schedule(jobs, concurrency, per_prefix, start_job)
+    except KeyboardInterrupt:
+        print(f"\n{Colors.WARNING}⚠ Batch interrupted, stopping running jobs...{Colors.ENDC}")
+        for job in jobs:
+            proc = job.get("_proc")
+            if proc and proc.poll() is None:
+                _stop_job(proc, proton_path, PREFIXES_DIR / job["prefix"], os.environ)
+        return 1
+
+    print_report(jobs)
+    failed = sum(1 for job in jobs if job["status"] != "ok")
+    print(f"\n{Colors.GRAY}Total wall time: {time.monotonic() - start:.1f}s{Colors.ENDC}")
+
+    if report_path:
+        with open(report_path, 'w') as f:
+            results = [{k: v for k, v in job.items() if not k.startswith("_")} for job in jobs]
+            json.dump([dict(job, exe=str(job["exe"])) for job in results], f, indent=4)
+        print(f"{Colors.OKGREEN}✔ Report saved to: {report_path}{Colors.ENDC}")
+
+    if failed:
+        print(f"{Colors.FAIL}✖ {failed} of {len(jobs)} jobs failed.{Colors.ENDC}")
+    else:
+        print(f"{Colors.OKGREEN}✔ All {len(jobs)} jobs succeeded.{Colors.ENDC}")
+    return failed
@@ -0,0 +1,119 @@
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .core import debug_log
+from .fsutil import file_digest, supports_reflink, reflink, walk_files
+
+HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def manifest_path(runtime_path):
+    return runtime_path.with_name(runtime_path.name + ".manifest.json")
+
+
+def load_manifest(runtime_path):
+    """Returns {relative path: [size, mtime_ns, sha256, mode]} of an installed runtime."""
+    try:
+        with open(manifest_path(runtime_path), 'r') as f:
+            manifest = json.load(f)
+        if isinstance(manifest, dict):
+            return manifest
+    except Exception:
+        pass
+    return {}
+
+
+def build_manifest(runtime_path, previous=None, known=None):
+    """
+    Hashes every regular file of the runtime and saves the manifest next to
+    it. Digests in known (by relative path) are taken as they are, and
+    entries of previous whose size and mtime still match are reused.
+    """
+    previous = previous or {}
+    known = known or {}
+    root = str(runtime_path)
+    manifest = {}
+    to_hash = []
+
+    for entry in walk_files(root):
+        st = entry.stat(follow_symlinks=False)
+        rel = os.path.relpath(entry.path, root)
+        old = previous.get(rel)
+        if rel in known:
+            manifest[rel] = [st.st_size, st.st_mtime_ns, known[rel], st.st_mode & 0o7777]
+        elif old and old[0] == st.st_size and old[1] == st.st_mtime_ns:
+            manifest[rel] = [st.st_size, st.st_mtime_ns, old[2], st.st_mode & 0o7777]
+        else:
+            to_hash.append((rel, entry.path, st))
+
+    def hash_file(job):
+        rel, path, st = job
+        return rel, [st.st_size, st.st_mtime_ns, file_digest(path), st.st_mode & 0o7777]
+
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as executor:
+        manifest.update(executor.map(hash_file, to_hash))
+
+    dest = manifest_path(runtime_path)
+    tmp_file = dest.with_name(dest.name + ".tmp")
+    with open(tmp_file, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_file, dest)
+    debug_log(f"Runtime manifest: {len(manifest)} files, {len(to_hash)} hashed")
+    return manifest
+
+
+class RuntimeLinker:
+    """
+    Stands in for an ObjectStore while a new runtime is unpacked: files
+    whose content already exists in the installed runtime are linked from
+    there instead of being written again. The digests computed on the way
+    are kept for the manifest of the new runtime.
+    """
+
+    def __init__(self, runtime_path, manifest):
+        self.root = str(runtime_path)
+        self.marker = os.sep + runtime_path.name + os.sep
+        self.known = {}
+        self.use_reflink = supports_reflink(os.path.dirname(self.root))
+        self.by_digest = {}
+        for rel, (size, mtime_ns, digest, mode) in manifest.items():
+            self.by_digest.setdefault(digest, (rel, size, mtime_ns, mode))
+        self.lock = threading.Lock()
+        self.linked = 0
+        self.linked_bytes = 0
+
+    def link_data(self, path, data, mode):
+        """
+        Materializes in-memory file content at path from the installed runtime.
+
+        :return: True if the file was linked, False if it has to be written
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        if self.marker in path:
+            with self.lock:
+                self.known[path.split(self.marker, 1)[1]] = digest
+        found = self.by_digest.get(digest)
+        if not found:
+            return False
+        rel, size, mtime_ns, old_mode = found
+        source = os.path.join(self.root, rel)
+        try:
+            st = os.stat(source)
+            # Changed since the manifest was written
+            if st.st_size != size or st.st_mtime_ns != mtime_ns:
+                return False
+            if self.use_reflink:
+                reflink(source, path)
+                os.chmod(path, mode & 0o7777)
+            elif old_mode == mode & 0o7777:
+                os.link(source, path)
+            else:
+                return False
+        except OSError:
+            return False
+        with self.lock:
+            self.linked += 1
+            self.linked_bytes += len(data)
+        return True
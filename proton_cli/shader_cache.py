@@ -0,0 +1,311 @@
+import os
+import sys
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+import subprocess
+from pathlib import Path
+from .constants import Colors, BASE_DIR, PREFIXES_DIR
+from .config import get_setting
+from .core import debug_log
+
+CACHE_DIR = BASE_DIR / "shader-cache"
+INDEX_FILE = CACHE_DIR / "index.json"
+PRUNE_INTERVAL = 24 * 3600
+
+# Every cache location a Proton game may use, all pointed at the same directory
+CACHE_VARS = [
+    "STEAM_COMPAT_SHADER_PATH",
+    "DXVK_STATE_CACHE_PATH",
+    "VKD3D_SHADER_CACHE_PATH",
+    "MESA_SHADER_CACHE_DIR",
+    "__GL_SHADER_DISK_CACHE_PATH",
+]
+# Cache files DXVK and vkd3d-proton write next to the game or into the prefix
+CACHE_FILE_SUFFIXES = (".dxvk-cache", ".dxvk-cache.tmp")
+CACHE_FILE_PREFIXES = ("vkd3d-proton.cache",)
+
+
+def proton_version(proton_path):
+    """Returns the name of a Proton build from its version file, e.g. GE-Proton9-20."""
+    try:
+        with open(proton_path / "version", 'r') as f:
+            parts = f.read().split()
+        if len(parts) >= 2:
+            return parts[1]
+    except OSError:
+        pass
+    return proton_path.name
+
+
+def cache_key(exe_path, proton_path):
+    exe = Path(exe_path).resolve()
+    safe_stem = "".join(c if c.isalnum() or c in ('-', '_') else '_' for c in exe.stem)
+    digest = hashlib.sha1(str(exe).encode()).hexdigest()[:8]
+    return f"{safe_stem}-{digest}", proton_version(proton_path)
+
+
+def cache_path(exe_path, proton_path):
+    exe_key, version = cache_key(exe_path, proton_path)
+    return CACHE_DIR / exe_key / version
+
+
+def _dir_size(path):
+    total = 0
+    stack = [str(path)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_blocks * 512
+        except OSError:
+            continue
+    return total
+
+
+class CacheIndex:
+    """
+    The cache index, guarded by a lock file. Per cache directory it holds
+    the exe, launches, hits and last use, which drives the LRU eviction.
+    """
+
+    def __init__(self):
+        self.lock_file = None
+        self.data = {}
+
+    def __enter__(self):
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        self.lock_file = open(CACHE_DIR / ".index.lock", 'w')
+        fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+        try:
+            with open(INDEX_FILE, 'r') as f:
+                self.data = json.load(f)
+        except Exception:
+            self.data = {}
+        self.data.setdefault("caches", {})
+        return self
+
+    def save(self):
+        tmp_file = INDEX_FILE.with_name(f"{INDEX_FILE.name}.{os.getpid()}.tmp")
+        with open(tmp_file, 'w') as f:
+            json.dump(self.data, f, indent=4)
+        os.replace(tmp_file, INDEX_FILE)
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+        self.lock_file.close()
+
+
+def use_cache(exe_path, proton_path, record=True):
+    """
+    Returns the shared cache directory for a launch and, with record,
+    counts the launch for 'cache show' and the LRU eviction.
+    """
+    path = cache_path(exe_path, proton_path)
+    try:
+        with os.scandir(path) as it:
+            hit = any(it)
+    except FileNotFoundError:
+        hit = False
+        path.mkdir(parents=True, exist_ok=True)
+    if not record:
+        return path
+
+    try:
+        with CacheIndex() as index:
+            rel = str(path.relative_to(CACHE_DIR))
+            entry = index.data["caches"].setdefault(rel, {"exe": str(Path(exe_path).resolve()), "launches": 0, "hits": 0})
+            entry["launches"] += 1
+            entry["hits"] += 1 if hit else 0
+            entry["last_used"] = time.time()
+            due = time.time() - index.data.get("last_prune", 0) > PRUNE_INTERVAL
+            index.save()
+        if due:
+            trigger_prune()
+    except OSError as e:
+        debug_log(f"Could not update shader cache index: {e}")
+    return path
+
+
+def apply_cache_env(env, exe_path, proton_path, record=True):
+    """Points the shader cache variables of env at the shared cache, unless the user set them."""
+    if not get_setting("shader_cache"):
+        return
+    path = None
+    for var in CACHE_VARS:
+        if var in env:
+            continue
+        if path is None:
+            path = use_cache(exe_path, proton_path, record)
+        env[var] = str(path)
+    if path is not None:
+        # The NVIDIA driver otherwise trims caches it didn't create itself
+        env.setdefault("__GL_SHADER_DISK_CACHE_SKIP_CLEANUP", "1")
+
+
+def list_caches():
+    """Returns (relative path, index entry, size) for every cache directory."""
+    with CacheIndex() as index:
+        entries = dict(index.data["caches"])
+    caches = []
+    if not CACHE_DIR.exists():
+        return caches
+    for exe_dir in CACHE_DIR.iterdir():
+        if not exe_dir.is_dir():
+            continue
+        for version_dir in exe_dir.iterdir():
+            if not version_dir.is_dir():
+                continue
+            rel = str(version_dir.relative_to(CACHE_DIR))
+            entry = entries.get(rel) or {"exe": None, "launches": 0, "hits": 0,
+                                         "last_used": version_dir.stat().st_mtime}
+            caches.append((rel, entry, _dir_size(version_dir)))
+    return caches
+
+
+def prune(max_bytes):
+    """
+    Removes the least recently used caches until the total fits into max_bytes.
+
+    :return: Tuple of (caches removed, bytes freed)
+    """
+    from .trash import move_to_trash, trigger_purge
+    caches = sorted(list_caches(), key=lambda c: c[1].get("last_used", 0))
+    total = sum(size for _, _, size in caches)
+    removed = 0
+    freed = 0
+    # Evicted caches are renamed away under the lock, so a launch never gets a half-deleted one
+    with CacheIndex() as index:
+        for rel, _, size in caches:
+            if total <= max_bytes:
+                break
+            try:
+                move_to_trash(CACHE_DIR / rel)
+            except OSError as e:
+                debug_log(f"Could not evict shader cache {rel}: {e}")
+                continue
+            index.data["caches"].pop(rel, None)
+            total -= size
+            freed += size
+            removed += 1
+            parent = (CACHE_DIR / rel).parent
+            try:
+                if not any(parent.iterdir()):
+                    parent.rmdir()
+            except OSError as e:
+                # The cache is already evicted, an empty directory left behind doesn't matter
+                debug_log(f"Could not remove {parent}: {e}")
+        index.data["last_prune"] = time.time()
+        index.save()
+    if removed:
+        trigger_purge()
+    return removed, freed
+
+
+def trigger_prune():
+    """Enforces the size limit in a detached background process."""
+    try:
+        subprocess.Popen(
+            [sys.executable, "-m", "proton_cli", "cache", "prune"],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+    except Exception as e:
+        debug_log(f"Could not start shader cache prune: {e}")
+
+
+def _is_cache_file(name):
+    return name.endswith(CACHE_FILE_SUFFIXES) or name.startswith(CACHE_FILE_PREFIXES)
+
+
+def find_stray_caches(exe_paths):
+    """
+    Finds DXVK/vkd3d cache files in the prefixes and next to known executables.
+
+    :return: List of cache file Paths
+    """
+    roots = [p / "pfx" / "drive_c" for p in PREFIXES_DIR.iterdir() if p.is_dir()] if PREFIXES_DIR.exists() else []
+    found = []
+    for root in roots:
+        for dirpath, _, filenames in os.walk(root):
+            found.extend(Path(dirpath) / name for name in filenames if _is_cache_file(name))
+    for exe in exe_paths:
+        parent = Path(exe).parent
+        if parent.is_dir():
+            found.extend(p for p in parent.iterdir() if p.is_file() and _is_cache_file(p.name))
+    return sorted(set(found))
+
+
+def migrate(proton_path):
+    """
+    Moves stray cache files into the shared cache of the executable they
+    belong to. DXVK names its cache after the executable, so files are
+    matched against the executables of registered shortcuts.
+
+    :return: Tuple of (files moved, files left because no executable matched)
+    """
+    from .shortcuts import _load_registry
+    exes = list(_load_registry())
+    by_stem = {}
+    for exe in exes:
+        by_stem.setdefault(Path(exe).stem.lower(), []).append(exe)
+
+    moved = 0
+    unmatched = 0
+    for cache_file in find_stray_caches(exes):
+        stem = cache_file.name.split(".dxvk-cache")[0].lower()
+        candidates = by_stem.get(stem, [])
+        if not candidates and not cache_file.name.endswith(CACHE_FILE_SUFFIXES):
+            # vkd3d caches carry no exe name, but sit in the game's directory
+            candidates = [exe for exe in exes if Path(exe).parent == cache_file.parent]
+        if len(candidates) != 1:
+            unmatched += 1
+            continue
+        target_dir = cache_path(candidates[0], proton_path)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        target = target_dir / cache_file.name
+        if target.exists() and target.stat().st_size >= cache_file.stat().st_size:
+            cache_file.unlink()
+        else:
+            shutil.move(str(cache_file), str(target))
+        moved += 1
+    return moved, unmatched
+
+
+def run_cache(action, max_size=None):
+    from .downloader import format_size
+    if action == "show":
+        caches = list_caches()
+        if not caches:
+            print(f"{Colors.WARNING}⚠ No shader caches yet.{Colors.ENDC}")
+            return
+        print(f"{Colors.HEADER}{'Cache':<40} {'Size':>10} {'Hits':>10}  Last used{Colors.ENDC}")
+        for rel, entry, size in sorted(caches, key=lambda c: -c[1].get("last_used", 0)):
+            hits = f"{entry['hits']}/{entry['launches']}"
+            last_used = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.get("last_used", 0)))
+            print(f"{rel[:40]:<40} {format_size(size):>10} {hits:>10}  {Colors.GRAY}{last_used}{Colors.ENDC}")
+        total = sum(size for _, _, size in caches)
+        limit = get_setting("shader_cache_max_mb")
+        print(f"\n{Colors.GRAY}Total: {format_size(total)} of {limit} MB{Colors.ENDC}")
+
+    elif action == "migrate":
+        from .config import load_config
+        proton_path = load_config().get("proton_path")
+        if not proton_path or not proton_path.exists():
+            print(f"{Colors.FAIL}✖ Proton not found. Please use 'check' command first.{Colors.ENDC}")
+            return
+        moved, unmatched = migrate(proton_path)
+        print(f"{Colors.OKGREEN}✔ {moved} cache files moved into {CACHE_DIR}.{Colors.ENDC}")
+        if unmatched:
+            print(f"{Colors.GRAY}{unmatched} files left in place: no shortcut matches their executable.{Colors.ENDC}")
+
+    elif action == "prune":
+        limit = max_size if max_size is not None else get_setting("shader_cache_max_mb")
+        removed, freed = prune(limit * 1024 * 1024)
+        if sys.stdout.isatty():
+            print(f"{Colors.OKGREEN}✔ Removed {removed} caches, {format_size(freed)} freed.{Colors.ENDC}")
@@ -0,0 +1,255 @@
+import os
+import re
+import sys
+import json
+import shlex
+from pathlib import Path
+from .constants import Colors, BASE_DIR, CONFIG_FILE, PREFIXES_DIR
+from .config import load_config, get_setting
+from .core import get_proton_env, create_proton_command, apply_user_options, debug_log
+from .shader_cache import apply_cache_env
+from .profiles import PROFILES_FILE, profile_for, launch_wrapper
+
+SHORTCUTS_DIR = BASE_DIR / "shortcuts"
+REGISTRY_FILE = SHORTCUTS_DIR / "registry.json"
+APPLICATIONS_DIR = Path.home() / ".local/share/applications"
+COMPILED_MARKER = "# proton-cli compiled: "
+
+
+def _python_command(exe_path, prefix_name, user_options, args):
+    cmd_parts = [sys.executable, "-m", "proton_cli", "run"]
+    if prefix_name:
+        cmd_parts.extend(["-p", prefix_name])
+    if user_options:
+        cmd_parts.extend(["-o", user_options])
+    cmd_parts.append(str(exe_path))
+    if args:
+        cmd_parts.extend(args)
+    return " ".join(shlex.quote(str(part)) for part in cmd_parts)
+
+
+def compile_script(exe_path, prefix_name, user_options, args):
+    """
+    Returns a launch script that execs Proton directly with the resolved
+    environment, or None if there is nothing to resolve against.
+
+    The script falls back to 'proton-cli run', which also rewrites it,
+    once config.json or the Proton build is newer than the script.
+    """
+    conf = load_config()
+    proton_path = conf.get("proton_path")
+    runtime_path = conf.get("runtime_path")
+    prefix_path = PREFIXES_DIR / prefix_name
+    if not proton_path or not proton_path.exists() or not prefix_path.exists():
+        return None
+
+    # Only the variables proton-cli adds; the rest comes from the session at launch
+    env = get_proton_env(prefix_path, runtime_path, proton_path, base_env={})
+    apply_cache_env(env, exe_path, proton_path, record=False)
+    wrappers = apply_user_options(env, user_options)
+    profile = profile_for(exe_path)
+    cmd = create_proton_command(proton_path, runtime_path, ["run", str(exe_path)] + list(args or []), wrappers, profile)
+
+    watched = [CONFIG_FILE, proton_path / "proton"]
+    if (proton_path / "version").exists():
+        watched.append(proton_path / "version")
+    if PROFILES_FILE.exists():
+        watched.append(PROFILES_FILE)
+    # The entry point used, and the prefix it must still exist in
+    required = [Path(cmd[len(launch_wrapper(profile)) + len(wrappers)]), prefix_path]
+
+    meta = {"exe": str(exe_path), "prefix": prefix_name, "options": user_options, "args": list(args or [])}
+    stale = " || ".join(
+        [f'[ {shlex.quote(str(p))} -nt "$0" ]' for p in watched] +
+        [f'[ ! -e {shlex.quote(str(p))} ]' for p in required]
+    )
+
+    lines = [
+        "#!/bin/bash",
+        COMPILED_MARKER + json.dumps(meta),
+        "# Generated by proton-cli, changes are overwritten.",
+        f"if {stale}; then",
+        f"    PROTON_CLI_SHORTCUT=\"$0\" exec {_python_command(exe_path, prefix_name, user_options, args)}",
+        "fi",
+    ]
+    for key, val in env.items():
+        lines.append(f"export {key}={shlex.quote(str(val))}")
+    lines.append(f"cd {shlex.quote(str(Path(exe_path).parent))} || exit 1")
+    lines.append("exec " + " ".join(shlex.quote(str(part)) for part in cmd))
+    return "\n".join(lines) + "\n"
+
+
+def write_script(script_path, exe_path, prefix_name, user_options, args):
+    """Writes a launch script, compiled if the compiled_shortcuts setting is on."""
+    content = None
+    if get_setting("compiled_shortcuts"):
+        content = compile_script(exe_path, prefix_name, user_options, args)
+    if content is None:
+        content = "#!/bin/bash\n" + _python_command(exe_path, prefix_name, user_options, args)
+
+    tmp_path = script_path.with_name(script_path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    os.chmod(tmp_path, 0o755)
+    os.replace(tmp_path, script_path)
+
+
+def _parse_python_command(line):
+    """Reads the parameters back from a '-m proton_cli run' line."""
+    try:
+        parts = shlex.split(line)
+        parts = parts[parts.index("proton_cli") + 2:]
+    except ValueError:
+        return None
+    meta = {"prefix": None, "options": None}
+    while parts and parts[0] in ("-p", "-o") and len(parts) > 1:
+        meta["prefix" if parts[0] == "-p" else "options"] = parts[1]
+        parts = parts[2:]
+    if not parts:
+        return None
+    meta["exe"] = parts[0]
+    meta["args"] = parts[1:]
+    return meta
+
+
+def read_meta(script_path):
+    """Returns the launch parameters of a launch script, or None."""
+    try:
+        with open(script_path, 'r', errors='ignore') as f:
+            f.readline()
+            line = f.readline()
+    except OSError:
+        return None
+    if line.startswith(COMPILED_MARKER):
+        try:
+            return json.loads(line[len(COMPILED_MARKER):])
+        except ValueError:
+            return None
+    if "-m proton_cli run" in line:
+        return _parse_python_command(line)
+    return None
+
+
+def recompile(script_path):
+    """Rewrites a launch script from its own parameters with the current configuration."""
+    meta = read_meta(script_path)
+    if not meta or not meta.get("prefix"):
+        return False
+    try:
+        write_script(Path(script_path), meta["exe"], meta["prefix"], meta.get("options"), meta.get("args"))
+        debug_log(f"Recompiled shortcut: {script_path}")
+        return True
+    except OSError as e:
+        debug_log(f"Could not recompile {script_path}: {e}")
+        return False
+
+
+def recompile_all():
+    """Rewrites every launch script, e.g. after the configuration changed."""
+    if not SHORTCUTS_DIR.exists():
+        return 0
+    return sum(1 for script in SHORTCUTS_DIR.glob("*.sh") if recompile(script))
+
+
+def _load_registry():
+    if not REGISTRY_FILE.exists():
+        # First use after an upgrade: import the shortcuts made before the registry existed
+        registry = scan_desktop_files()
+        try:
+            _save_registry(registry)
+        except OSError as e:
+            debug_log(f"Could not save shortcut registry: {e}")
+        return registry
+    try:
+        with open(REGISTRY_FILE, 'r') as f:
+            registry = json.load(f)
+        if isinstance(registry, dict):
+            return registry
+    except Exception:
+        pass
+    return {}
+
+
+def _save_registry(registry):
+    SHORTCUTS_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_file = REGISTRY_FILE.with_name(REGISTRY_FILE.name + ".tmp")
+    with open(tmp_file, 'w') as f:
+        json.dump(registry, f, indent=4)
+    os.replace(tmp_file, REGISTRY_FILE)
+
+
+def lookup(exe_path):
+    """Returns the registry entry of the shortcut launching exe_path, or None."""
+    entry = _load_registry().get(str(Path(exe_path).resolve()))
+    if entry and os.path.exists(entry["desktop_file"]):
+        return entry
+    return None
+
+
+def register(exe_path, name, desktop_file, script, prefix_name, user_options, args):
+    registry = _load_registry()
+    registry[str(Path(exe_path).resolve())] = {
+        "name": name,
+        "desktop_file": str(desktop_file),
+        "script": str(script),
+        "prefix": prefix_name,
+        "options": user_options,
+        "args": list(args or [])
+    }
+    try:
+        _save_registry(registry)
+    except OSError as e:
+        debug_log(f"Could not save shortcut registry: {e}")
+
+
+def scan_desktop_files():
+    """Reads all proton-cli .desktop files and their scripts into registry entries."""
+    registry = {}
+    if not APPLICATIONS_DIR.exists():
+        return registry
+
+    for item in APPLICATIONS_DIR.glob("proton-cli-*.desktop"):
+        try:
+            with open(item, 'r', errors='ignore') as f:
+                content = f.read()
+        except OSError:
+            continue
+        match = re.search(r'^Exec=["\']?([^"\']+)["\']?', content, re.MULTILINE)
+        if not match:
+            continue
+        script = Path(match.group(1))
+        meta = read_meta(script) if script.is_file() else None
+        if not meta:
+            debug_log(f"Skipping {item.name}: no proton-cli launch script")
+            continue
+        name = re.search(r'^Name=(.*)$', content, re.MULTILINE)
+        registry[str(Path(meta["exe"]).resolve())] = {
+            "name": name.group(1).strip() if name else Path(meta["exe"]).stem,
+            "desktop_file": str(item),
+            "script": str(script),
+            "prefix": meta.get("prefix"),
+            "options": meta.get("options"),
+            "args": meta.get("args", [])
+        }
+    return registry
+
+
+def run_shortcuts(action):
+    if action == "repair":
+        old = _load_registry()
+        registry = scan_desktop_files()
+        _save_registry(registry)
+        added = len(set(registry) - set(old))
+        removed = len(set(old) - set(registry))
+        changed = sum(1 for k in set(old) & set(registry) if old[k] != registry[k])
+        print(f"{Colors.OKGREEN}✔ Shortcut registry rebuilt: {len(registry)} shortcuts{Colors.ENDC} "
+              f"{Colors.GRAY}({added} added, {removed} removed, {changed} updated){Colors.ENDC}")
+    elif action == "list":
+        registry = _load_registry()
+        if not registry:
+            print(f"{Colors.WARNING}⚠ No shortcuts registered.{Colors.ENDC} {Colors.GRAY}Run 'shortcuts repair' to import existing ones.{Colors.ENDC}")
+            return
+        print(f"{Colors.HEADER}{'Name':<25} {'Prefix':<15} Executable{Colors.ENDC}")
+        for exe, entry in sorted(registry.items(), key=lambda item: item[1]["name"].lower()):
+            color = Colors.OKGREEN if os.path.exists(entry["desktop_file"]) else Colors.FAIL
+            print(f"{color}{entry['name'][:25]:<25}{Colors.ENDC} {str(entry['prefix'])[:15]:<15} {Colors.GRAY}{exe}{Colors.ENDC}")
@@ -0,0 +1,234 @@
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from .constants import Colors, BASE_DIR, STORE_DIR, VERSIONS_DIR
+from .core import debug_log
+from .downloader import format_size
+from .fsutil import file_digest, supports_reflink, reflink, replace_with_link, walk_files
+
+HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+# Steam rewrites these trees on its own, so they are only shared through reflinks
+STEAM_MANAGED_MARKER = os.path.join("steamapps", "common")
+
+
+def _inside(path, directory):
+    directory = Path(directory).resolve()
+    return path == directory or directory in path.parents
+
+
+class ObjectStore:
+    """
+    Content-addressed file store. Objects are named after the sha256 of
+    their content plus their permission bits, and version trees point at
+    them through hardlinks or, where the filesystem supports it, reflinks.
+    """
+
+    def __init__(self, root=STORE_DIR):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.refs_file = self.root / "refs.json"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.device = os.stat(self.objects).st_dev
+        self.use_reflink = supports_reflink(str(self.objects))
+        self.lock = threading.Lock()
+
+    def object_path(self, digest, mode):
+        return self.objects / digest[:2] / f"{digest[2:]}.{mode & 0o7777:o}"
+
+    def _add_object(self, path, obj):
+        obj.parent.mkdir(exist_ok=True)
+        tmp = str(obj) + f".tmp-{os.getpid()}-{threading.get_ident()}"
+        if self.use_reflink:
+            reflink(path, tmp)
+            os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        else:
+            os.link(path, tmp)
+        os.replace(tmp, obj)
+
+    def link_data(self, path, data, mode):
+        """
+        Materializes in-memory file content at path from an existing object.
+
+        :return: True if the file was linked, False if it has to be written
+        """
+        obj = self.object_path(hashlib.sha256(data).hexdigest(), mode)
+        if not obj.exists():
+            return False
+        try:
+            if self.use_reflink:
+                reflink(obj, path)
+                os.chmod(path, mode & 0o7777)
+            else:
+                os.link(obj, path)
+            return True
+        except OSError:
+            return False
+
+    def ingest_file(self, entry):
+        """
+        Moves one file into the store.
+
+        :return: Tuple of (object name, bytes saved)
+        """
+        st = entry.stat(follow_symlinks=False)
+        obj = self.object_path(file_digest(entry.path), st.st_mode)
+        try:
+            obj_stat = os.stat(obj)
+        except FileNotFoundError:
+            self._add_object(entry.path, obj)
+            return obj.name, 0
+
+        if not self.use_reflink and obj_stat.st_ino == st.st_ino:
+            return obj.name, 0
+        replace_with_link(str(obj), entry.path, self.use_reflink)
+        # A hardlinked file only frees its blocks once no other link remains
+        saved = st.st_size if self.use_reflink or st.st_nlink == 1 else 0
+        return obj.name, saved
+
+    def ingest_tree(self, root, explicit=False):
+        """
+        Replaces every regular file below root with a link into the store.
+        Trees outside BASE_DIR belong to other tools, which may update files
+        in place, so they are only hardlinked when named explicitly.
+
+        :return: Dict with files, saved bytes and skipped reason
+        """
+        root = Path(root).resolve()
+        if os.stat(root).st_dev != self.device:
+            return {"files": 0, "saved": 0, "skipped": "different filesystem than the store"}
+        if STEAM_MANAGED_MARKER in str(root) and not self.use_reflink:
+            return {"files": 0, "saved": 0, "skipped": "managed by Steam (needs reflink support)"}
+        if not explicit and not self.use_reflink and not _inside(root, BASE_DIR):
+            return {"files": 0, "saved": 0, "skipped": "not managed by proton-cli (needs reflink support or an explicit path)"}
+
+        ids = set()
+        saved = 0
+        files = 0
+        with ThreadPoolExecutor(max_workers=HASH_WORKERS) as executor:
+            for name, freed in executor.map(self._safe_ingest, walk_files(str(root))):
+                if name:
+                    ids.add(name)
+                    saved += freed
+                    files += 1
+
+        self._record_refs(root, ids)
+        return {"files": files, "saved": saved, "skipped": None}
+
+    def _safe_ingest(self, entry):
+        try:
+            return self.ingest_file(entry)
+        except OSError as e:
+            debug_log(f"Store: could not ingest {entry.path}: {e}")
+            return None, 0
+
+    def _load_refs(self):
+        try:
+            with open(self.refs_file, 'r') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_refs(self, refs):
+        tmp = self.refs_file.with_name(self.refs_file.name + ".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(refs, f)
+        os.replace(tmp, self.refs_file)
+
+    def _record_refs(self, root, ids):
+        with self.lock:
+            refs = self._load_refs()
+            refs[str(root)] = sorted(ids)
+            self._save_refs(refs)
+
+    def gc(self):
+        """
+        Drops objects no longer used by any version tree.
+
+        :return: Tuple of (objects removed, bytes freed)
+        """
+        with self.lock:
+            refs = self._load_refs()
+            live_roots = {root: ids for root, ids in refs.items() if os.path.isdir(root)}
+            if len(live_roots) != len(refs):
+                self._save_refs(live_roots)
+
+        referenced = set()
+        for ids in live_roots.values():
+            referenced.update(ids)
+
+        removed = 0
+        freed = 0
+        for entry in walk_files(str(self.objects)):
+            st = entry.stat(follow_symlinks=False)
+            # Hardlinked objects still used by an unregistered tree are kept too
+            if entry.name in referenced or (not self.use_reflink and st.st_nlink > 1):
+                continue
+            try:
+                os.unlink(entry.path)
+                removed += 1
+                freed += st.st_size
+            except OSError as e:
+                debug_log(f"Store: could not remove {entry.path}: {e}")
+        return removed, freed
+
+    def status(self):
+        count = 0
+        size = 0
+        for entry in walk_files(str(self.objects)):
+            count += 1
+            size += entry.stat(follow_symlinks=False).st_size
+        return {"objects": count, "size": size, "trees": sorted(self._load_refs())}
+
+
+def ingest_version(path, explicit=False):
+    """Adds an installed Proton version to the store and prints a summary."""
+    try:
+        store = ObjectStore()
+        print(f"{Colors.OKBLUE}➜ Deduplicating {path.name} into the version store...{Colors.ENDC}")
+        result = store.ingest_tree(path, explicit)
+    except OSError as e:
+        print(f"{Colors.WARNING}⚠ Could not add {path.name} to the store: {e}{Colors.ENDC}")
+        return
+
+    if result["skipped"]:
+        print(f"{Colors.GRAY}Skipped {path.name}: {result['skipped']}.{Colors.ENDC}")
+    else:
+        mode = "reflinks" if store.use_reflink else "hardlinks"
+        print(f"{Colors.OKGREEN}✔ {result['files']} files linked ({mode}), {format_size(result['saved'])} reclaimed.{Colors.ENDC}")
+
+
+def run_store(action, paths=None):
+    if action == "add":
+        if paths:
+            targets = [Path(p).expanduser().resolve() for p in paths]
+        else:
+            # Versions of Steam, Lutris or Heroic are only added when named explicitly
+            from .check import scan_protons
+            targets = [p for p in scan_protons() if _inside(Path(p).resolve(), VERSIONS_DIR)]
+        if not targets:
+            hint = "" if paths else f" in {VERSIONS_DIR}, name others explicitly"
+            print(f"{Colors.WARNING}⚠ No Proton versions to add{hint}.{Colors.ENDC}")
+            return
+        for target in targets:
+            if not (target / "proton").exists():
+                print(f"{Colors.FAIL}✖ Not a Proton directory: {target}{Colors.ENDC}")
+                continue
+            ingest_version(target, explicit=bool(paths))
+
+    elif action == "gc":
+        print(f"{Colors.HEADER}➜ Collecting unreferenced objects...{Colors.ENDC}")
+        removed, freed = ObjectStore().gc()
+        print(f"{Colors.OKGREEN}✔ Removed {removed} objects, {format_size(freed)} freed.{Colors.ENDC}")
+
+    elif action == "status":
+        store = ObjectStore()
+        info = store.status()
+        print(f"{Colors.HEADER}Version Store:{Colors.ENDC} {Colors.GRAY}{store.root}{Colors.ENDC}")
+        print(f"  Objects: {Colors.OKBLUE}{info['objects']}{Colors.ENDC} ({format_size(info['size'])})")
+        print(f"  Link mode: {Colors.OKBLUE}{'reflink' if store.use_reflink else 'hardlink'}{Colors.ENDC}")
+        for tree in info["trees"]:
+            print(f"  {Colors.OKGREEN}✔{Colors.ENDC} {tree}")
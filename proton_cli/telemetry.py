@@ -0,0 +1,346 @@
+import os
+import json
+import time
+import ctypes
+import threading
+from .constants import Colors, BASE_DIR
+from .config import get_setting
+from .core import debug_log
+from . import trace
+
+TELEMETRY_DIR = BASE_DIR / "telemetry"
+# PSS and per-thread context switches cost more to read, so only every n-th sample
+DETAIL_EVERY = 5
+MIN_INTERVAL = 0.05
+PR_SET_CHILD_SUBREAPER = 36
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+COLUMNS = ["t", "procs", "threads", "cpu_pct", "rss", "pss",
+           "read_bytes", "write_bytes", "io_wait", "ctx_voluntary", "ctx_involuntary"]
+# Cumulative per-process counters, kept for processes that already exited
+COUNTERS = ("cpu", "read_bytes", "write_bytes", "blkio", "ctx_voluntary", "ctx_involuntary")
+
+# Fields of /proc/<pid>/stat, counted after the parenthesized command name
+STAT_STATE = 0
+STAT_PPID = 1
+STAT_SESSION = 3
+STAT_UTIME = 11
+STAT_STIME = 12
+STAT_THREADS = 17
+STAT_START = 19
+STAT_RSS = 21
+STAT_BLKIO = 39
+
+# CPU time of the sampler thread, Python 3.6 only has the whole process's
+_cpu_clock = getattr(time, "thread_time", time.process_time)
+
+# Samplers still running, so parallel launches don't count each other's trees
+_active = set()
+_active_lock = threading.RLock()
+
+
+def enabled():
+    return bool(os.environ.get("PROTON_CLI_TELEMETRY"))
+
+
+def _read(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, 65536)
+    finally:
+        os.close(fd)
+
+
+def _stat(pid):
+    try:
+        return _read(f"/proc/{pid}/stat").rsplit(b")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+
+
+def _fields(data, names):
+    """Reads 'Name: value' lines, e.g. from /proc/<pid>/io."""
+    values = {}
+    for line in data.splitlines():
+        name, _, value = line.partition(b":")
+        if name in names:
+            values[name] = int(value.split()[0])
+    return values
+
+
+def set_subreaper():
+    """
+    Makes orphaned descendants, like a daemonized wineserver, children of
+    this process instead of init, so they stay part of the sampled tree.
+    """
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.prctl(PR_SET_CHILD_SUBREAPER, 1, 0, 0, 0) != 0:
+            debug_log(f"PR_SET_CHILD_SUBREAPER failed: {os.strerror(ctypes.get_errno())}")
+    except (OSError, AttributeError) as e:
+        debug_log(f"PR_SET_CHILD_SUBREAPER not available: {e}")
+
+
+def _active_roots():
+    return {sampler.root for sampler in _active}
+
+
+class Sampler(threading.Thread):
+    """
+    Samples the process tree below root_pid through /proc. A process
+    belongs to the tree when its parent does, when it shares the session
+    of a root that started its own session (adopt_session), or when it was
+    reparented to this process after the root started (adopt_orphans, see
+    set_subreaper()). Orphans are only adopted while no other sampler does,
+    since their origin is unknown once several launches run in parallel.
+    """
+
+    def __init__(self, root_pid, interval=None, adopt_session=False, adopt_orphans=False):
+        super().__init__(daemon=True)
+        self.root = root_pid
+        self.interval = max(MIN_INTERVAL, float(interval or get_setting("telemetry_interval")))
+        self.adopt_session = adopt_session
+        self.adopt_orphans = adopt_orphans
+        self.own_pid = os.getpid()
+        root_stat = _stat(root_pid)
+        self.root_start = int(root_stat[STAT_START]) if root_stat else 0
+        self.members = {}
+        self.others = set()
+        self.exited = dict.fromkeys(COUNTERS, 0)
+        self.rows = []
+        self.count = 0
+        self.started = time.monotonic()
+        self.last = None
+        self.overhead = 0.0
+        self._stop_event = threading.Event()
+        with _active_lock:
+            _active.add(self)
+
+    def _belongs(self, pid, stat):
+        if pid == self.root:
+            return True
+        ppid = int(stat[STAT_PPID])
+        if ppid in self.members:
+            return True
+        if self.adopt_session and int(stat[STAT_SESSION]) == self.root:
+            return True
+        if not self.adopt_orphans or ppid != self.own_pid or pid in _active_roots():
+            return False
+        # With other launches running, a new orphan could have come from any of them
+        if any(other.adopt_orphans for other in _active if other is not self):
+            return False
+        return int(stat[STAT_START]) >= self.root_start
+
+    def _retire(self, pid):
+        record = self.members.pop(pid)
+        for key in COUNTERS:
+            self.exited[key] += record[key]
+
+    def _reap(self, pid, stat):
+        # Orphans adopted as subreaper are our children, the root is left to its Popen
+        if self.adopt_orphans and pid not in _active_roots() and int(stat[STAT_PPID]) == self.own_pid:
+            try:
+                os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                pass
+
+    def _read_details(self, pid, record):
+        try:
+            pss = _fields(_read(f"/proc/{pid}/smaps_rollup"), (b"Pss",)).get(b"Pss", 0) * 1024
+        except OSError:
+            pss = 0
+        voluntary = involuntary = 0
+        try:
+            for tid in os.listdir(f"/proc/{pid}/task"):
+                values = _fields(_read(f"/proc/{pid}/task/{tid}/status"),
+                                 (b"voluntary_ctxt_switches", b"nonvoluntary_ctxt_switches"))
+                voluntary += values.get(b"voluntary_ctxt_switches", 0)
+                involuntary += values.get(b"nonvoluntary_ctxt_switches", 0)
+        except OSError:
+            pass
+        # Threads that exited take their switches with them
+        record["ctx_voluntary"] = max(record["ctx_voluntary"], voluntary)
+        record["ctx_involuntary"] = max(record["ctx_involuntary"], involuntary)
+        return pss
+
+    def sample(self):
+        now = time.monotonic()
+        detail = self.count % DETAIL_EVERY == 0
+        self.count += 1
+        try:
+            pids = {int(name) for name in os.listdir("/proc") if name.isdigit()}
+        except OSError:
+            return
+
+        for pid in [pid for pid in self.members if pid not in pids]:
+            self._retire(pid)
+        self.others &= pids
+
+        # Only processes not seen before need their parent looked up
+        stats = {}
+        for pid in pids:
+            if pid not in self.members and pid not in self.others:
+                stat = _stat(pid)
+                if stat:
+                    stats[pid] = stat
+        with _active_lock:
+            for pid in sorted(stats, key=lambda p: int(stats[p][STAT_START])):
+                if self._belongs(pid, stats[pid]):
+                    self.members[pid] = dict(dict.fromkeys(COUNTERS, 0), start=stats[pid][STAT_START])
+                else:
+                    self.others.add(pid)
+
+        procs = threads = rss = pss = 0
+        for pid, record in list(self.members.items()):
+            stat = stats.get(pid) or _stat(pid)
+            if stat is None or stat[STAT_START] != record["start"]:
+                self._retire(pid)
+                continue
+            if stat[STAT_STATE] == b"Z":
+                with _active_lock:
+                    self._reap(pid, stat)
+                continue
+            procs += 1
+            threads += int(stat[STAT_THREADS])
+            rss += int(stat[STAT_RSS]) * PAGE_SIZE
+            record["cpu"] = int(stat[STAT_UTIME]) + int(stat[STAT_STIME])
+            if len(stat) > STAT_BLKIO:
+                record["blkio"] = int(stat[STAT_BLKIO])
+            try:
+                io = _fields(_read(f"/proc/{pid}/io"), (b"read_bytes", b"write_bytes"))
+                record["read_bytes"] = io.get(b"read_bytes", 0)
+                record["write_bytes"] = io.get(b"write_bytes", 0)
+            except OSError:
+                pass
+            if detail:
+                pss += self._read_details(pid, record)
+
+        totals = {key: self.exited[key] + sum(r[key] for r in self.members.values()) for key in COUNTERS}
+        cpu_pct = 0.0
+        if self.last is not None and now > self.last[0]:
+            cpu_pct = (totals["cpu"] - self.last[1]) / CLK_TCK / (now - self.last[0]) * 100
+        self.last = (now, totals["cpu"])
+
+        self.rows.append([
+            round(now - self.started, 3), procs, threads, round(cpu_pct, 1), rss,
+            pss if detail else None,
+            totals["read_bytes"], totals["write_bytes"], round(totals["blkio"] / CLK_TCK, 2),
+            totals["ctx_voluntary"], totals["ctx_involuntary"]
+        ])
+
+    def run(self):
+        while True:
+            start = _cpu_clock()
+            self.sample()
+            self.overhead += _cpu_clock() - start
+            if self._stop_event.wait(self.interval):
+                break
+
+    def stop(self):
+        """Stops sampling after a last sample, which also catches processes that outlived the root."""
+        self._stop_event.set()
+        self.join()
+        start = _cpu_clock()
+        self.sample()
+        self.overhead += _cpu_clock() - start
+        with _active_lock:
+            _active.discard(self)
+
+    def summary(self):
+        rows = self.rows
+        if not rows:
+            return {}
+        col = {name: i for i, name in enumerate(COLUMNS)}
+        last = rows[-1]
+        duration = last[col["t"]]
+        cpu = [row[col["cpu_pct"]] for row in rows[1:]] or [0.0]
+        pss = [row[col["pss"]] for row in rows if row[col["pss"]] is not None]
+        cpu_time = (self.exited["cpu"] + sum(r["cpu"] for r in self.members.values())) / CLK_TCK
+        return {
+            "duration": duration,
+            "samples": len(rows),
+            "cpu_time": round(cpu_time, 2),
+            "cpu_avg_pct": round(cpu_time / duration * 100, 1) if duration else 0.0,
+            "cpu_peak_pct": max(cpu),
+            "rss_peak": max(row[col["rss"]] for row in rows),
+            "rss_avg": int(sum(row[col["rss"]] for row in rows) / len(rows)),
+            "pss_peak": max(pss) if pss else None,
+            "threads_peak": max(row[col["threads"]] for row in rows),
+            "procs_peak": max(row[col["procs"]] for row in rows),
+            "read_bytes": last[col["read_bytes"]],
+            "write_bytes": last[col["write_bytes"]],
+            "io_wait": last[col["io_wait"]],
+            "ctx_voluntary": last[col["ctx_voluntary"]],
+            "ctx_involuntary": last[col["ctx_involuntary"]],
+            "sampler_cpu": round(self.overhead, 3),
+        }
+
+    def save(self, name, meta=None):
+        """Writes the time series and summary of a launch, see COLUMNS for the sample layout."""
+        data = {
+            "name": name,
+            "started": time.time() - (time.monotonic() - self.started),
+            "interval": self.interval,
+            **(meta or {}),
+            "summary": self.summary(),
+            "columns": COLUMNS,
+            "samples": self.rows,
+        }
+        safe_name = "".join(c if c.isalnum() or c in ('-', '_', '.') else '_' for c in name)
+        path = TELEMETRY_DIR / f"{safe_name}-{time.strftime('%Y%m%d-%H%M%S')}-{self.root}.json"
+        TELEMETRY_DIR.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(data, f, separators=(",", ":"))
+        return path
+
+
+def launch_name(cmd):
+    """Names a launch after the program Proton runs, e.g. game.exe."""
+    parts = [str(part) for part in cmd]
+    if "run" in parts[:-1]:
+        return os.path.basename(parts[parts.index("run") + 1])
+    return os.path.basename(parts[0])
+
+
+def print_summary(summary, path):
+    from .downloader import format_size
+    if not summary:
+        return
+    pss = f", PSS peak {format_size(summary['pss_peak'])}" if summary["pss_peak"] else ""
+    print(f"{Colors.GRAY}📈 {summary['duration']:.1f}s, CPU {summary['cpu_avg_pct']:.0f}% avg / "
+          f"{summary['cpu_peak_pct']:.0f}% peak, RSS peak {format_size(summary['rss_peak'])}{pss}, "
+          f"{summary['procs_peak']} processes / {summary['threads_peak']} threads peak{Colors.ENDC}")
+    print(f"{Colors.GRAY}   Read {format_size(summary['read_bytes'])}, written {format_size(summary['write_bytes'])}, "
+          f"I/O wait {summary['io_wait']:.1f}s, {summary['ctx_voluntary']} voluntary / "
+          f"{summary['ctx_involuntary']} involuntary context switches{Colors.ENDC}")
+    print(f"{Colors.GRAY}   Telemetry saved to: {path}{Colors.ENDC}")
+
+
+def run_sampled(cmd, name=None, **kwargs):
+    """subprocess.run() that samples the child's process tree while it runs."""
+    import subprocess
+    name = name or launch_name(cmd)
+    set_subreaper()
+    start = trace._now_us()
+    # Registers the root before any other sampler can take it for an orphan
+    with _active_lock:
+        proc = subprocess.Popen(cmd, **kwargs)
+        sampler = Sampler(proc.pid, adopt_orphans=True)
+    with proc:
+        trace.child_spawned(proc, name)
+        sampler.start()
+        try:
+            proc.wait()
+        except BaseException:
+            proc.kill()
+            raise
+        finally:
+            trace.child_exited(proc, name, start)
+            sampler.stop()
+            try:
+                path = sampler.save(name, {"cmd": [str(part) for part in cmd], "exit_code": proc.returncode})
+                print_summary(sampler.summary(), path)
+            except OSError as e:
+                print(f"{Colors.FAIL}✖ Could not save telemetry: {e}{Colors.ENDC}")
+    return subprocess.CompletedProcess(proc.args, proc.returncode)
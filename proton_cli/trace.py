@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import threading
+import functools
+from contextlib import contextmanager
+from .constants import Colors, BASE_DIR
+
+TRACES_DIR = BASE_DIR / "traces"
+
+_enabled = False
+_events = []
+_lock = threading.Lock()
+
+
+def enabled():
+    return _enabled
+
+
+def _now_us():
+    # Python 3.6 has no monotonic_ns()
+    if hasattr(time, "monotonic_ns"):
+        return time.monotonic_ns() // 1000
+    return int(time.monotonic() * 1_000_000)
+
+
+def _thread_id():
+    # get_native_id() is new in Python 3.8
+    if hasattr(threading, "get_native_id"):
+        return threading.get_native_id()
+    return threading.get_ident()
+
+
+def _process_start_us():
+    """Start time of this process on the monotonic clock, or None if unknown."""
+    try:
+        with open("/proc/self/stat", 'r') as f:
+            # Field 22, counted after the parenthesized command name
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        age = time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf("SC_CLK_TCK")
+        return _now_us() - int(age * 1_000_000)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _add(event):
+    event.setdefault("pid", os.getpid())
+    event.setdefault("tid", _thread_id())
+    with _lock:
+        _events.append(event)
+
+
+def enable():
+    """Starts recording. The time before this call is recorded as interpreter startup."""
+    global _enabled
+    _enabled = True
+    now = _now_us()
+    start = _process_start_us()
+    if start is not None and start < now:
+        _add({"name": "python startup", "cat": "phase", "ph": "X", "ts": start, "dur": now - start})
+
+
+@contextmanager
+def span(name, cat="phase", **args):
+    """Records the time spent in the with-block as one phase."""
+    if not _enabled:
+        yield
+        return
+    start = _now_us()
+    try:
+        yield
+    finally:
+        event = {"name": name, "cat": cat, "ph": "X", "ts": start, "dur": _now_us() - start}
+        if args:
+            event["args"] = {k: str(v) for k, v in args.items()}
+        _add(event)
+
+
+def traced(func):
+    """Decorator that records each call of func as a phase."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        with span(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def instant(name, cat="event", **args):
+    if _enabled:
+        _add({"name": name, "cat": cat, "ph": "i", "s": "p", "ts": _now_us(),
+              "args": {k: str(v) for k, v in args.items()}})
+
+
+def child_spawned(proc, name):
+    instant(f"spawn {name}", cat="process", child_pid=proc.pid)
+
+
+def child_exited(proc, name, start_us):
+    """Records a child process from spawn to exit on a track of its own."""
+    if _enabled:
+        _add({"name": name, "cat": "process", "ph": "X", "ts": start_us, "dur": _now_us() - start_us,
+              "tid": proc.pid, "args": {"child_pid": proc.pid, "exit_code": proc.returncode}})
+
+
+def run_traced(cmd, name=None, **kwargs):
+    """subprocess.run() that records spawn and exit of the child."""
+    import subprocess
+    name = name or os.path.basename(str(cmd[0]))
+    start = _now_us()
+    with subprocess.Popen(cmd, **kwargs) as proc:
+        child_spawned(proc, name)
+        try:
+            proc.wait()
+        except BaseException:
+            proc.kill()
+            raise
+        finally:
+            child_exited(proc, name, start)
+    return subprocess.CompletedProcess(proc.args, proc.returncode)
+
+
+def summary(events, root):
+    spans = [e for e in events if e["ph"] == "X"]
+    total = next((e["dur"] for e in spans if e["name"] == root), None)
+    if total is None and spans:
+        # The root phase is still open, e.g. right before exec()
+        total = max(e["ts"] + e["dur"] for e in spans) - min(e["ts"] for e in spans)
+    phases = sorted((e for e in spans if e["name"] != root),
+                    key=lambda e: e["dur"], reverse=True)
+    parts = [f"{e['name']} {e['dur'] / 1000:.1f}ms" for e in phases[:6]]
+    return f"{root} {(total or 0) / 1000:.1f}ms total: " + ", ".join(parts)
+
+
+def finish(root):
+    """Writes the recorded events as a Chrome/Perfetto trace and prints a summary line."""
+    global _enabled
+    if not _enabled:
+        return None
+    _enabled = False
+
+    with _lock:
+        events = list(_events)
+        _events.clear()
+
+    trace = {
+        "traceEvents": [{"name": "process_name", "ph": "M", "pid": os.getpid(),
+                         "args": {"name": "proton-cli"}}] + events,
+        "displayTimeUnit": "ms"
+    }
+    trace_file = TRACES_DIR / f"trace-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.json"
+    try:
+        TRACES_DIR.mkdir(parents=True, exist_ok=True)
+        with open(trace_file, 'w') as f:
+            json.dump(trace, f)
+    except OSError as e:
+        print(f"{Colors.FAIL}✖ Could not save trace: {e}{Colors.ENDC}")
+        return None
+
+    print(f"{Colors.GRAY}⏱ {summary(events, root)}{Colors.ENDC}")
+    print(f"{Colors.GRAY}  Trace saved to: {trace_file}{Colors.ENDC}")
+    return trace_file
@@ -0,0 +1,251 @@
+import os
+import sys
+import json
+import time
+import uuid
+import fcntl
+import stat
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .constants import Colors, BASE_DIR
+from .core import debug_log
+
+TRASH_DIR = BASE_DIR / "trash"
+# Trash directories on other filesystems, one path per line
+LOCATIONS_FILE = TRASH_DIR / ".locations"
+LOCAL_TRASH_NAME = ".proton-cli-trash"
+PURGE_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+# Entries that could not be removed, with the time of their next attempt
+FAILURES_FILE = TRASH_DIR / ".failures"
+# Delay before retrying a failed entry, doubled on every failure up to a day
+RETRY_DELAY = 60
+MAX_RETRY_DELAY = 24 * 3600
+
+
+def _trash_dir_for(path):
+    """Returns a trash directory on the same filesystem as path, so rename() works."""
+    TRASH_DIR.mkdir(parents=True, exist_ok=True)
+    if os.stat(path.parent).st_dev == os.stat(TRASH_DIR).st_dev:
+        return TRASH_DIR
+
+    local = path.parent / LOCAL_TRASH_NAME
+    local.mkdir(exist_ok=True)
+    if str(local) not in _locations():
+        with open(LOCATIONS_FILE, 'a') as f:
+            f.write(f"{local}\n")
+    return local
+
+
+def _locations():
+    try:
+        with open(LOCATIONS_FILE, 'r') as f:
+            return [line.strip() for line in f if line.strip()]
+    except OSError:
+        return []
+
+
+def trash_dirs():
+    return [str(TRASH_DIR)] + [d for d in _locations() if os.path.isdir(d)]
+
+
+def move_to_trash(path):
+    """
+    Atomically moves path out of the way. Its content is removed later by purge().
+
+    :return: Path inside the trash
+    """
+    trash = _trash_dir_for(path)
+    target = trash / f"{path.name}.{int(time.time())}.{uuid.uuid4().hex[:8]}"
+    os.rename(path, target)
+    return target
+
+
+def _clear_dir(path):
+    """Unlinks the files of one directory and returns its subdirectories."""
+    subdirs = []
+    try:
+        it = os.scandir(path)
+    except PermissionError:
+        os.chmod(path, stat.S_IRWXU)
+        it = os.scandir(path)
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+                continue
+            try:
+                os.unlink(entry.path)
+            except PermissionError:
+                # The directory itself may be read-only
+                os.chmod(path, stat.S_IRWXU)
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+    return subdirs
+
+
+def remove_tree(root, workers=PURGE_WORKERS):
+    """rmtree() that unlinks the files of many directories in parallel."""
+    if not os.path.isdir(root) or os.path.islink(root):
+        os.unlink(root)
+        return
+
+    directories = [root]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = {executor.submit(_clear_dir, root)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for subdir in future.result():
+                    directories.append(subdir)
+                    pending.add(executor.submit(_clear_dir, subdir))
+
+    # Children are always listed after their parent
+    for directory in reversed(directories):
+        try:
+            os.rmdir(directory)
+        except PermissionError:
+            os.chmod(os.path.dirname(directory), stat.S_IRWXU)
+            os.rmdir(directory)
+
+
+def trash_entries():
+    entries = []
+    for trash in trash_dirs():
+        try:
+            entries.extend(e.path for e in os.scandir(trash) if not e.name.startswith("."))
+        except OSError:
+            continue
+    return entries
+
+
+def _load_failures():
+    try:
+        with open(FAILURES_FILE, 'r') as f:
+            failures = json.load(f)
+        return failures if isinstance(failures, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_failures(failures):
+    tmp_path = FAILURES_FILE.with_name(FAILURES_FILE.name + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(failures, f, indent=4)
+    os.replace(tmp_path, FAILURES_FILE)
+
+
+def _retry_after(failures, entry):
+    failure = failures.get(entry)
+    return failure.get("retry_after", 0) if isinstance(failure, dict) else 0
+
+
+def purge(workers=PURGE_WORKERS, verbose=False, retry_failed=False):
+    """
+    Empties all trash directories. Returns at once if another purge is running.
+    Anything left behind by an interrupted purge is picked up by the next one.
+    Entries that failed before are skipped until their retry time, unless
+    retry_failed is set.
+    """
+    TRASH_DIR.mkdir(parents=True, exist_ok=True)
+    lock_file = open(TRASH_DIR / ".purge.lock", 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        if verbose:
+            print(f"{Colors.GRAY}A purge is already running.{Colors.ENDC}")
+        return
+
+    try:
+        failures = _load_failures()
+        now = time.time()
+        # Skipped entries count as tried, and so do failures of this run
+        tried = {e for e in failures if not retry_failed and _retry_after(failures, e) > now}
+        while True:
+            # Entries may be added while a purge runs
+            entries = [e for e in trash_entries() if e not in tried]
+            if not entries:
+                break
+            for entry in entries:
+                tried.add(entry)
+                try:
+                    remove_tree(entry, workers)
+                    failures.pop(entry, None)
+                    if verbose:
+                        print(f"{Colors.OKGREEN}✔ Removed {os.path.basename(entry)}{Colors.ENDC}")
+                except OSError as e:
+                    failure = failures.get(entry)
+                    attempts = (failure.get("attempts", 0) if isinstance(failure, dict) else 0) + 1
+                    delay = min(MAX_RETRY_DELAY, RETRY_DELAY * 2 ** (attempts - 1))
+                    failures[entry] = {"attempts": attempts, "retry_after": time.time() + delay}
+                    debug_log(f"Trash: could not remove {entry} (attempt {attempts}, next in {delay}s): {e}")
+                    if verbose:
+                        print(f"{Colors.FAIL}✖ Could not remove {os.path.basename(entry)}: {e}{Colors.ENDC}")
+
+        # Entries removed by other means are forgotten
+        failures = {e: f for e, f in failures.items() if os.path.lexists(e)}
+        if failures or FAILURES_FILE.exists():
+            try:
+                _save_failures(failures)
+            except OSError as e:
+                debug_log(f"Trash: could not save failures: {e}")
+    finally:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+
+def pending():
+    """Cheap check for leftovers, e.g. of a purge that was interrupted, that are due for removal."""
+    failures = _load_failures()
+    now = time.time()
+    return any(_retry_after(failures, e) <= now for e in trash_entries())
+
+
+def trigger_purge():
+    """Empties the trash in a detached background process."""
+    try:
+        subprocess.Popen(
+            [sys.executable, "-m", "proton_cli", "trash", "purge"],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+    except Exception as e:
+        debug_log(f"Could not start trash purge: {e}")
+
+
+def _tree_size(root):
+    total = 0
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_blocks * 512
+        except OSError:
+            continue
+    return total
+
+
+def run_trash(action):
+    if action == "purge":
+        # Run by hand, entries that failed before are retried right away
+        interactive = sys.stdout.isatty()
+        purge(verbose=interactive, retry_failed=interactive)
+    elif action == "status":
+        from .downloader import format_size
+        entries = trash_entries()
+        if not entries:
+            print(f"{Colors.OKGREEN}✔ Trash is empty.{Colors.ENDC}")
+            return
+        failures = _load_failures()
+        print(f"{Colors.HEADER}Trash:{Colors.ENDC}")
+        for entry in entries:
+            note = ""
+            if entry in failures:
+                retry = time.strftime('%Y-%m-%d %H:%M', time.localtime(_retry_after(failures, entry)))
+                note = f", {Colors.WARNING}could not be removed, next attempt {retry}{Colors.GRAY}"
+            print(f"  {os.path.basename(entry)} {Colors.GRAY}({format_size(_tree_size(entry))}, {entry}{note}){Colors.ENDC}")
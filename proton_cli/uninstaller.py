@@ -1,7 +1,6 @@
-import subprocess
 from .constants import Colors, PREFIXES_DIR
 from .config import load_config
-from .core import get_proton_env, create_proton_command
+from .core import get_proton_env, create_proton_command, run_proton
 
 def run_uninstaller():
     conf = load_config()
@@ -41,4 +40,4 @@ def run_uninstaller():
     env = get_proton_env(selected_prefix, runtime_path, proton_path)
     
     print(f"{Colors.OKBLUE}➜ Starting Uninstaller...{Colors.ENDC}")
-    subprocess.run(cmd, env=env)
\ No newline at end of file
+    run_proton(cmd, env, selected_prefix, proton_path)
\ No newline at end of file
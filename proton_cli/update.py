@@ -1,19 +1,28 @@
-import json
-import urllib.request
 import re
-import sys
+import shutil
+import hashlib
+import tempfile
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from .constants import Colors, VERSION, REPO_UPDATE_API_URL
+from .core import debug_log
+from .downloader import ConnectionPool, DownloadError
+from .extract import swap_into_place
+from .fsutil import exchange
+from .http_cache import fetch, fetch_json, offline
 
 RAW_CONSTANTS_URL = "https://raw.githubusercontent.com/hhadi34/proton-cli/main/proton_cli/constants.py"
+UPDATE_CONNECTIONS = 4
+PACKAGE_DIR = Path(__file__).parent
+# Modules an update may never remove, the package doesn't start without them
+REQUIRED_FILES = ("__init__.py", "main.py")
 
-def get_remote_version():
+def get_remote_version(url=RAW_CONSTANTS_URL):
     try:
-        with urllib.request.urlopen(RAW_CONSTANTS_URL) as response:
-            content = response.read().decode('utf-8')
-            match = re.search(r'VERSION\s*=\s*"([^"]+)"', content)
-            if match:
-                return match.group(1)
+        content = fetch(url)
+        match = re.search(r'VERSION\s*=\s*"([^"]+)"', content)
+        if match:
+            return match.group(1)
     except Exception:
         return None
     return None
@@ -24,11 +33,92 @@ def parse_version(version_str):
     except (ValueError, AttributeError):
         return (0,)
 
-def update_self():
+def git_blob_sha(data):
+    """The object id git (and the GitHub contents API) gives a file with this content."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+def plan_update(files, package_dir=PACKAGE_DIR):
+    """
+    Compares the remote file list with the installed package.
+
+    :return: Tuple of (file infos to download, local file names to remove)
+    :raises ValueError: If the listing is unusable, e.g. an API error body
+    """
+    if not isinstance(files, list):
+        raise ValueError("No files found to update.")
+    py_files = [f for f in files if f.get('type', 'file') == 'file' and f['name'].endswith('.py')]
+    if not py_files:
+        raise ValueError("No files found to update.")
+    changed = []
+    for file_info in py_files:
+        try:
+            local_sha = git_blob_sha((package_dir / file_info['name']).read_bytes())
+        except FileNotFoundError:
+            local_sha = None
+        if local_sha != file_info['sha']:
+            changed.append(file_info)
+
+    remote_names = {f['name'] for f in py_files}
+    removed = sorted(p.name for p in package_dir.glob("*.py") if p.name not in remote_names)
+    missing = [name for name in REQUIRED_FILES if name in removed]
+    if missing:
+        raise ValueError(f"Refusing an update that removes {', '.join(missing)}.")
+    return changed, removed
+
+def fetch_files(file_infos, connections=UPDATE_CONNECTIONS):
+    """
+    Downloads files concurrently over keep-alive connections and checks
+    each one against its blob sha.
+
+    :return: Dict of file name to content
+    """
+    pool = ConnectionPool()
+
+    def fetch_one(file_info):
+        _, response = pool.request("GET", file_info['download_url'])
+        if response.status != 200:
+            pool.discard(response)
+            raise DownloadError(f"{file_info['name']}: HTTP {response.status} {response.reason}")
+        data = response.read()
+        if git_blob_sha(data) != file_info['sha']:
+            raise DownloadError(f"{file_info['name']}: content does not match its sha")
+        return file_info['name'], data
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(connections, len(file_infos)))) as executor:
+            return dict(executor.map(fetch_one, file_infos))
+    finally:
+        pool.close()
+
+def install_files(new_files, removed, package_dir=PACKAGE_DIR):
+    """
+    Builds the updated package next to the installed one and swaps it in,
+    so the package is never left with a mix of old and new modules.
+    """
+    staging = Path(tempfile.mkdtemp(prefix=f".{package_dir.name}-update-", dir=package_dir.parent))
+    try:
+        staged = staging / package_dir.name
+        shutil.copytree(package_dir, staged, ignore=shutil.ignore_patterns("__pycache__"))
+        for name, data in new_files.items():
+            with open(staged / name, 'wb') as f:
+                f.write(data)
+        for name in removed:
+            (staged / name).unlink()
+        shutil.copymode(package_dir, staged)
+
+        try:
+            exchange(staged, package_dir)
+        except OSError as e:
+            debug_log(f"Atomic exchange not possible ({e}), renaming instead")
+            swap_into_place(staged, package_dir)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+def update_self(api_url=REPO_UPDATE_API_URL, version_url=RAW_CONSTANTS_URL, package_dir=PACKAGE_DIR, assume_yes=False):
     print(f"{Colors.HEADER}➜ Checking for updates...{Colors.ENDC}")
-    
-    remote_version = get_remote_version()
-    
+
+    remote_version = get_remote_version(version_url)
+
     if not remote_version:
         print(f"{Colors.FAIL}✖ Could not fetch update information.{Colors.ENDC}")
         return
@@ -38,39 +128,44 @@ def update_self():
 
     if parse_version(remote_version) > parse_version(VERSION):
         print(f"\n{Colors.WARNING}⚠ New version available!{Colors.ENDC}")
-        choice = input(f"{Colors.OKGREEN}Do you want to update? (Y/n): {Colors.ENDC}")
-        if choice.lower() not in ["", "y", "yes"]:
-            return
+        if not assume_yes:
+            choice = input(f"{Colors.OKGREEN}Do you want to update? (Y/n): {Colors.ENDC}")
+            if choice.lower() not in ["", "y", "yes"]:
+                return
     else:
         print(f"\n{Colors.OKGREEN}✔ You are using the latest version.{Colors.ENDC}")
         return
 
+    if offline():
+        print(f"{Colors.FAIL}✖ Can't update in offline mode.{Colors.ENDC}")
+        return
+
     print(f"\n{Colors.HEADER}➜ Updating...{Colors.ENDC}")
-    
+
     try:
-        req = urllib.request.Request(REPO_UPDATE_API_URL, headers={'User-Agent': 'proton-cli'})
-        with urllib.request.urlopen(req) as response:
-            files = json.loads(response.read().decode())
-        
-        py_files = [f for f in files if f['name'].endswith('.py')]
-        
-        if not py_files:
-            print(f"{Colors.FAIL}✖ No files found to update.{Colors.ENDC}")
+        files = fetch_json(api_url)
+        try:
+            changed, removed = plan_update(files, package_dir)
+        except ValueError as e:
+            print(f"{Colors.FAIL}✖ {e}{Colors.ENDC}")
             return
 
-        current_dir = Path(__file__).parent
-        
-        for file_info in py_files:
-            file_name = file_info['name']
-            download_url = file_info['download_url']
-            dest_path = current_dir / file_name
-            
-            print(f"  Downloading: {Colors.OKBLUE}{file_name}{Colors.ENDC}")
-            urllib.request.urlretrieve(download_url, dest_path)
-            
-        print(f"\n{Colors.OKGREEN}✔ Update complete!.{Colors.ENDC}")
-        
+        if not changed and not removed:
+            print(f"{Colors.OKGREEN}✔ All files are already up to date.{Colors.ENDC}")
+            return
+
+        for file_info in changed:
+            print(f"  Downloading: {Colors.OKBLUE}{file_info['name']}{Colors.ENDC}")
+        for name in removed:
+            print(f"  Removing:    {Colors.GRAY}{name}{Colors.ENDC}")
+
+        new_files = fetch_files(changed)
+        install_files(new_files, removed, package_dir)
+
+        unchanged = sum(1 for f in files if f["name"].endswith(".py")) - len(changed)
+        print(f"\n{Colors.OKGREEN}✔ Update complete!{Colors.ENDC} {Colors.GRAY}({len(changed)} files updated, {unchanged} unchanged){Colors.ENDC}")
+
     except PermissionError:
         print(f"{Colors.FAIL}✖ Permission denied. Try running with sudo.{Colors.ENDC}")
     except Exception as e:
-        print(f"{Colors.FAIL}✖ Update failed: {e}{Colors.ENDC}")
\ No newline at end of file
+        print(f"{Colors.FAIL}✖ Update failed: {e}{Colors.ENDC}")
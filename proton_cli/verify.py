@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import hashlib
+from .constants import Colors, BASE_DIR
+from .core import debug_log
+from .http_cache import fetch
+
+VERIFIED_FILE = BASE_DIR / "verified.json"
+READ_SIZE = 1024 * 1024
+
+
+class ChecksumError(Exception):
+    pass
+
+
+class Checksum:
+    """Expected digest of a download, fed incrementally while the bytes arrive."""
+
+    def __init__(self, algorithm, digest, source=None):
+        self.algorithm = algorithm
+        self.expected = digest.lower()
+        self.source = source
+        self.hasher = hashlib.new(algorithm)
+
+    def update(self, data):
+        self.hasher.update(data)
+
+    def check(self, name):
+        actual = self.hasher.hexdigest()
+        if actual != self.expected:
+            raise ChecksumError(f"{self.algorithm} mismatch for {name}: expected {self.expected[:16]}..., got {actual[:16]}...")
+        debug_log(f"{name}: {self.algorithm} verified")
+
+
+class HashingReader:
+    """File-like wrapper feeding everything read to a Checksum."""
+
+    def __init__(self, fileobj, checksum):
+        self.fileobj = fileobj
+        self.checksum = checksum
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        if data:
+            self.checksum.update(data)
+        return data
+
+    def drain(self):
+        """Reads what the consumer left, e.g. padding after the end of a tar archive."""
+        while self.read(READ_SIZE):
+            pass
+
+
+def parse_checksums(text, filename):
+    """
+    Returns the digest for filename from a sha*sum style listing, or None.
+    Names must match exactly apart from the binary mode '*' and a leading
+    './', lines with a bare digest are ignored.
+    """
+    for line in text.splitlines():
+        parts = line.strip().split(None, 1)
+        if len(parts) < 2:
+            continue
+        name = parts[1].strip()
+        if name.startswith("*"):
+            name = name[1:]
+        if name.startswith("./"):
+            name = name[2:]
+        if name == filename:
+            return parts[0]
+    return None
+
+
+def release_checksum(release, asset_name):
+    """
+    Looks up the published checksum of a GitHub release asset, e.g.
+    GE-Proton's '<name>.sha512sum' next to '<name>.tar.gz'.
+
+    :return: Checksum or None if the release has no checksum asset
+    """
+    base = asset_name.split(".tar")[0]
+    for algorithm in ("sha512", "sha256"):
+        for asset in release.get("assets", []):
+            name = asset["name"]
+            if name.endswith(f".{algorithm}sum") and name.startswith(base):
+                digest = parse_checksums(fetch(asset["browser_download_url"]), asset_name)
+                if digest:
+                    return Checksum(algorithm, digest, asset["browser_download_url"])
+    return None
+
+
+def manifest_checksum(manifest_url, filename, algorithm="sha256"):
+    """Looks up filename in a checksum manifest like SHA256SUMS."""
+    digest = parse_checksums(fetch(manifest_url), filename)
+    if not digest:
+        return None
+    return Checksum(algorithm, digest, manifest_url)
+
+
+def _load_records():
+    try:
+        with open(VERIFIED_FILE, 'r') as f:
+            records = json.load(f)
+        if isinstance(records, dict):
+            return records
+    except Exception:
+        pass
+    return {}
+
+
+def record_verified(checksum, url, path):
+    """
+    Remembers a verified archive, or the directory it was unpacked to, so
+    a later install can use it instead of downloading it again.
+    """
+    records = _load_records()
+    record = {"url": url, "path": str(path), "verified": int(time.time())}
+    if os.path.isfile(path):
+        record["size"] = os.path.getsize(path)
+    records[f"{checksum.algorithm}:{checksum.expected}"] = record
+    try:
+        BASE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_file = VERIFIED_FILE.with_name(VERIFIED_FILE.name + ".tmp")
+        with open(tmp_file, 'w') as f:
+            json.dump(records, f, indent=4)
+        os.replace(tmp_file, VERIFIED_FILE)
+    except OSError as e:
+        debug_log(f"Could not save verified record: {e}")
+
+
+def find_verified(checksum):
+    """Returns the recorded path for an archive with this digest, if it is still there."""
+    record = _load_records().get(f"{checksum.algorithm}:{checksum.expected}")
+    if not record or not os.path.exists(record["path"]):
+        return None
+    if "size" in record and os.path.getsize(record["path"]) != record["size"]:
+        return None
+    return record["path"]
+
+
+def warn_unverified(name):
+    print(f"{Colors.WARNING}⚠ No checksum published for {name}, skipping verification.{Colors.ENDC}")
@@ -1,7 +1,6 @@
-import subprocess
 from .constants import Colors, PREFIXES_DIR
 from .config import load_config
-from .core import get_proton_env, create_proton_command, debug_log
+from .core import get_proton_env, create_proton_command, debug_log, run_proton
 
 def run_winecfg():
     conf = load_config()
@@ -40,4 +39,4 @@ def run_winecfg():
     cmd = create_proton_command(proton_path, runtime_path, ["run", "winecfg"])
     env = get_proton_env(selected_prefix, runtime_path, proton_path)
     print(f"{Colors.OKBLUE}➜ Starting Wine configuration...{Colors.ENDC}")
-    subprocess.run(cmd, env=env)
\ No newline at end of file
+    run_proton(cmd, env, selected_prefix, proton_path)
\ No newline at end of file
@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import signal
+from pathlib import Path
+from .constants import Colors, BASE_DIR, PREFIXES_DIR
+from .config import load_config, get_setting
+from .core import get_wine_bin, run_wineserver, debug_log
+
+SERVERS_DIR = BASE_DIR / "servers"
+
+
+def server_dir(prefix_path):
+    """
+    Returns the directory wineserver uses for a prefix. Wine names it after the
+    device and inode of the prefix, and the server process runs inside it.
+    """
+    st = os.stat(prefix_path / "pfx")
+    return Path(f"/tmp/.wine-{os.getuid()}") / f"server-{st.st_dev:x}-{st.st_ino:x}"
+
+
+def find_server(prefix_path):
+    """Returns the pid of the wineserver running for a prefix, or None."""
+    try:
+        target = str(server_dir(prefix_path))
+    except OSError:
+        return None
+    if not os.path.exists(os.path.join(target, "socket")):
+        return None
+
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(os.path.join(entry.path, "comm"), 'r') as f:
+                if not f.read().startswith("wineserver"):
+                    continue
+            if os.readlink(os.path.join(entry.path, "cwd")) == target:
+                return int(entry.name)
+        except OSError:
+            continue
+    return None
+
+
+def _state_file(prefix_path):
+    return SERVERS_DIR / f"{prefix_path.name}.json"
+
+
+def _load_state(prefix_path):
+    try:
+        with open(_state_file(prefix_path), 'r') as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else None
+    except (OSError, ValueError):
+        return None
+
+
+def _server_env(env):
+    """Matches the sync mode Proton picks for its clients, which must agree with the server's."""
+    server_env = dict(env)
+    server_env["WINEESYNC"] = "0" if env.get("PROTON_NO_ESYNC") else "1"
+    server_env["WINEFSYNC"] = "0" if env.get("PROTON_NO_FSYNC") else "1"
+    return server_env
+
+
+def ensure_server(proton_path, prefix_path, env):
+    """
+    Starts a persistent wineserver for a prefix when wineserver_timeout is set,
+    so the following Proton runs connect to it instead of starting their own.
+
+    :return: pid of the running server, or None
+    """
+    timeout = get_setting("wineserver_timeout")
+    if not timeout or timeout <= 0 or not (prefix_path / "pfx").exists():
+        return None
+
+    pid = find_server(prefix_path)
+    if pid:
+        state = _load_state(prefix_path)
+        if not state or state.get("pid") != pid:
+            # Started by a plain Proton run that is still going, it can't be replaced under it
+            debug_log(f"wineserver {pid} for {prefix_path.name} was not started by proton-cli, not reusing it")
+            return None
+        if state.get("proton_path") == str(proton_path):
+            debug_log(f"Reusing wineserver {pid} for {prefix_path.name}")
+            return pid
+        # Clients of another Proton build would fail on a protocol mismatch
+        debug_log(f"Replacing wineserver {pid} of {state.get('proton_path')} for {prefix_path.name}")
+        stop_server(prefix_path, Path(state["proton_path"]) if state.get("proton_path") else None)
+
+    if not get_wine_bin(proton_path, "wineserver"):
+        return None
+
+    start = time.monotonic()
+    # wineserver forks into the background once its socket accepts connections
+    result = run_wineserver(proton_path, prefix_path, _server_env(env), f"-p{int(timeout)}")
+    pid = find_server(prefix_path)
+    debug_log(f"Started wineserver {pid} for {prefix_path.name} in {time.monotonic() - start:.2f}s "
+              f"(exit {result.returncode})")
+    if not pid:
+        return None
+
+    try:
+        SERVERS_DIR.mkdir(parents=True, exist_ok=True)
+        with open(_state_file(prefix_path), 'w') as f:
+            json.dump({
+                "pid": pid,
+                "prefix": str(prefix_path),
+                "proton_path": str(proton_path),
+                "timeout": int(timeout),
+                "started": int(time.time())
+            }, f, indent=4)
+    except OSError as e:
+        debug_log(f"Could not save wineserver state: {e}")
+    return pid
+
+
+def stop_server(prefix_path, proton_path=None):
+    """
+    Shuts down the wineserver of a prefix, letting it save the registry first.
+
+    :return: True if a server was running
+    """
+    state_file = _state_file(prefix_path)
+    pid = find_server(prefix_path)
+    if pid:
+        if not proton_path:
+            try:
+                with open(state_file, 'r') as f:
+                    proton_path = Path(json.load(f)["proton_path"])
+            except Exception:
+                proton_path = load_config().get("proton_path")
+
+        # "wineserver -k" kills the programs in the prefix, then the server saves and exits
+        if proton_path and proton_path.exists() and get_wine_bin(proton_path, "wineserver"):
+            env = os.environ.copy()
+            run_wineserver(proton_path, prefix_path, env, "-k")
+            run_wineserver(proton_path, prefix_path, env, "-w")
+        elif find_server(prefix_path) == pid:
+            os.kill(pid, signal.SIGTERM)
+
+    try:
+        state_file.unlink()
+    except FileNotFoundError:
+        pass
+    return pid is not None
+
+
+def run_server(action, names=None):
+    if not PREFIXES_DIR.exists():
+        print(f"{Colors.WARNING}⚠ No prefixes found.{Colors.ENDC}")
+        return
+
+    prefixes = sorted((p for p in PREFIXES_DIR.iterdir() if p.is_dir()), key=lambda x: x.name)
+    if names:
+        missing = [n for n in names if not (PREFIXES_DIR / n).is_dir()]
+        for name in missing:
+            print(f"{Colors.FAIL}✖ Prefix '{name}' not found.{Colors.ENDC}")
+        prefixes = [p for p in prefixes if p.name in names]
+
+    if action == "status":
+        timeout = get_setting("wineserver_timeout")
+        mode = f"persistent, {timeout}s idle timeout" if timeout and timeout > 0 else "off"
+        print(f"{Colors.HEADER}Wineservers:{Colors.ENDC} {Colors.GRAY}({mode}){Colors.ENDC}")
+        running = 0
+        for prefix in prefixes:
+            pid = find_server(prefix)
+            if not pid:
+                continue
+            running += 1
+            try:
+                with open(_state_file(prefix), 'r') as f:
+                    kind = "persistent" if json.load(f).get("pid") == pid else "session"
+            except Exception:
+                kind = "session"
+            print(f"  {Colors.OKGREEN}{prefix.name:<24}{Colors.ENDC} pid {pid:<8} {Colors.GRAY}{kind}{Colors.ENDC}")
+        if not running:
+            print(f"  {Colors.GRAY}No wineserver running.{Colors.ENDC}")
+        if not timeout or timeout <= 0:
+            print(f"{Colors.GRAY}Enable with: proton-cli config wineserver_timeout <seconds>{Colors.ENDC}")
+
+    elif action == "stop":
+        stopped = 0
+        for prefix in prefixes:
+            if stop_server(prefix):
+                stopped += 1
+                print(f"{Colors.OKGREEN}✔ Stopped wineserver of {prefix.name}.{Colors.ENDC}")
+        if not stopped:
+            print(f"{Colors.GRAY}No wineserver running.{Colors.ENDC}")